@@ -1,3 +1,5 @@
 from django.contrib import admin
+from .models import SummaryJob, SummaryCacheEntry
 
-# Register your models here.
+admin.site.register(SummaryJob)
+admin.site.register(SummaryCacheEntry)
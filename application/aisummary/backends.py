@@ -0,0 +1,236 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Sentences end with ., ! or ? followed by whitespace, or at a line break.
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\s*\n+\s*")
+
+WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Common words that say nothing about what an issue is about.
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers him his how i if in into is it its itself just me more most my no nor not
+now of off on once only or other our out over own same she should so some such than that the their
+them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your please there's it's i'm i've we've
+""".split())
+
+
+def split_sentences(text):
+    """
+    Split text into sentences.
+    :param text: The text to split.
+    :return: A list of non-empty sentences, in order.
+    """
+
+    return [sentence.strip() for sentence in SENTENCE_BREAK.split(text) if sentence.strip()]
+
+
+def content_words(sentence):
+    """
+    Return the words of a sentence that carry meaning, lower-cased and without stop words.
+    """
+
+    return [word for word in WORD.findall(sentence.lower()) if word not in STOP_WORDS]
+
+
+def truncate_words(text, max_words):
+    """
+    Shorten text to at most `max_words` words, dropping trailing punctuation left by the cut.
+    """
+
+    words = text.split()
+    if len(words) <= max_words:
+        return text
+    return " ".join(words[:max_words]).rstrip(",;:-")
+
+
+def extractive_summary(text, max_words=20):
+    """
+    Summarise text by picking its most representative sentences.
+    Each sentence is weighted by TF-IDF, treating the sentences as the documents, and scored by its
+    cosine similarity to the description as a whole, so sentences about what the description keeps
+    coming back to score highest. Sentences are taken best first while they fit in `max_words`, and
+    returned in their original order. Ties go to the earlier sentence, so the result is deterministic.
+    :param text: The text to summarise.
+    :param max_words: The most words in the summary.
+    :return: The summary, or an empty string if the text has no sentences.
+    """
+
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return truncate_words(sentences[0], max_words) if sentences else ""
+
+    words = [content_words(sentence) for sentence in sentences]
+    document_frequency = Counter(word for sentence_words in words for word in set(sentence_words))
+    idf = {
+        word: math.log((1 + len(sentences)) / (1 + frequency)) + 1
+        for word, frequency in document_frequency.items()
+    }
+
+    vectors = [
+        {word: count * idf[word] for word, count in Counter(sentence_words).items()}
+        for sentence_words in words
+    ]
+    centroid = Counter()
+    for vector in vectors:
+        centroid.update(vector)
+    centroid_norm = math.sqrt(sum(weight * weight for weight in centroid.values()))
+
+    def score(index):
+        vector = vectors[index]
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm or not centroid_norm:
+            return 0.0
+        return sum(weight * centroid[word] for word, weight in vector.items()) / (norm * centroid_norm)
+
+    ranked = sorted(range(len(sentences)), key=lambda index: (-score(index), index))
+
+    chosen = [ranked[0]]
+    length = len(sentences[ranked[0]].split())
+    for index in ranked[1:]:
+        sentence_length = len(sentences[index].split())
+        if length + sentence_length <= max_words:
+            chosen.append(index)
+            length += sentence_length
+
+    return truncate_words(" ".join(sentences[index] for index in sorted(chosen)), max_words)
+
+
+class SummaryBackend:
+    """
+    The interface for the ways of summarising an issue description.
+    The backend is chosen with the AI_SUMMARY_BACKEND setting (see get_backend).
+    """
+
+    # A short name for the backend, used in log messages.
+    name = "base"
+
+    # Whether this backend's summaries are worth keeping in the summary cache.
+    cacheable = False
+
+    # Whether draft() returns drafts.
+    drafts = False
+
+    def summarise(self, description_text):
+        """
+        Summarise a description.
+        :param description_text: The trimmed issue description.
+        :return: The summary text.
+        """
+
+        raise NotImplementedError
+
+    def summarise_batch(self, description_texts):
+        """
+        Summarise several descriptions. Backends that can do this in one request override it.
+        :param description_texts: The trimmed issue descriptions.
+        :return: A list of summaries in the same order as the descriptions.
+        :raises ValueError: If the backend returned a malformed batch.
+        """
+
+        return [self.summarise(description_text) for description_text in description_texts]
+
+    async def asummarise(self, description_text):
+        """
+        Async version of summarise(). Runs summarise() in a thread unless overridden.
+        :param description_text: The trimmed issue description.
+        :return: The summary text.
+        """
+
+        return await sync_to_async(self.summarise)(description_text)
+
+    def draft(self, description_text):
+        """
+        Return a quick summary to show until summarise() has finished, if the backend offers one.
+        Issues showing a draft are marked with Issue.ai_summary_is_draft.
+        :param description_text: The trimmed issue description.
+        :return: The draft summary, or None.
+        """
+
+        return None
+
+
+class OpenAIBackend(SummaryBackend):
+    """
+    Summarises with the OpenAI API, through the shared resilient client (see aisummary.client).
+    """
+
+    name = "openai"
+    cacheable = True
+
+    def summarise(self, description_text):
+        from . import utils
+        return utils.request_summary(description_text)
+
+    def summarise_batch(self, description_texts):
+        from . import utils
+        return utils.request_batch_summaries(description_texts)
+
+    async def asummarise(self, description_text):
+        from . import utils
+        return await utils.request_completion_async(utils.build_prompt(description_text))
+
+
+class LocalBackend(SummaryBackend):
+    """
+    Summarises on the CPU with extractive_summary, in a millisecond or so and with no network.
+    The summary is made of sentences from the description rather than written afresh.
+    """
+
+    name = "local"
+
+    def __init__(self, max_words=None):
+        """
+        :param max_words: The most words in a summary, defaults to AI_SUMMARY_LOCAL_MAX_WORDS.
+        """
+
+        self.max_words = max_words or getattr(settings, 'AI_SUMMARY_LOCAL_MAX_WORDS', 20)
+
+    def summarise(self, description_text):
+        return extractive_summary(description_text, self.max_words)
+
+    async def asummarise(self, description_text):
+        # Fast enough to run on the event loop.
+        return self.summarise(description_text)
+
+
+class LocalFirstBackend(OpenAIBackend):
+    """
+    Shows a local extractive summary as soon as an issue is created, and replaces it with the
+    OpenAI summary when that arrives.
+    """
+
+    name = "local-first"
+    drafts = True
+
+    def __init__(self):
+        self.local = LocalBackend()
+
+    def draft(self, description_text):
+        return self.local.summarise(description_text)
+
+
+@lru_cache(maxsize=None)
+def load_backend(path):
+    """
+    Create the backend with the given dotted path. Each backend is created once per process.
+    :param path: The dotted path of a SummaryBackend subclass.
+    :return: The backend instance.
+    """
+
+    return import_string(path)()
+
+
+def get_backend():
+    """
+    Return the backend chosen by the AI_SUMMARY_BACKEND setting.
+    """
+
+    return load_backend(getattr(settings, 'AI_SUMMARY_BACKEND', 'aisummary.backends.OpenAIBackend'))
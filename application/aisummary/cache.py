@@ -0,0 +1,162 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from .metrics import CACHE_LOOKUPS
+from .models import SummaryCacheEntry
+
+
+def normalise_description(description_text):
+    """
+    Normalise a description so that trivially different reports share a cache entry.
+    Case, punctuation and runs of whitespace are ignored.
+    :param description_text: The issue description.
+    :return: The normalised description.
+    """
+
+    text = re.sub(r"[^\w\s]", " ", description_text.lower())
+    return " ".join(text.split())
+
+
+class SummaryCache:
+    """
+    A content-addressed cache of generated summaries.
+    Lookups go to an in-process LRU first and then to the SummaryCacheEntry table, so entries
+    are shared between processes and survive restarts.
+    """
+
+    def __init__(self, version, max_entries=1024):
+        """
+        :param version: The model and prompt version, part of every key so that changing either
+            invalidates the old summaries.
+        :param max_entries: The maximum number of summaries held in memory.
+        """
+
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, description_text):
+        """
+        Return the cache key for a description.
+        :param description_text: The issue description.
+        :return: A hex SHA-256 digest.
+        """
+
+        content = f"{self.version}\n{normalise_description(description_text)}"
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, summary):
+        """
+        Add a summary to the in-memory LRU, evicting the least recently used entry if it is full.
+        Must be called with the lock held.
+        """
+
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, description_text):
+        """
+        Look up the summary of a description.
+        :param description_text: The issue description.
+        :return: The cached summary, or None on a miss.
+        """
+
+        key = self.make_key(description_text)
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(result="hit")
+                return summary
+
+        summary = SummaryCacheEntry.objects.filter(key=key).values_list("summary", flat=True).first()
+        with self._lock:
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, summary)
+        CACHE_LOOKUPS.inc(result="miss" if summary is None else "hit")
+        return summary
+
+    async def aget(self, description_text):
+        """
+        Async version of get(), reading the database with the async ORM.
+        :param description_text: The issue description.
+        :return: The cached summary, or None on a miss.
+        """
+
+        key = self.make_key(description_text)
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(result="hit")
+                return summary
+
+        summary = await SummaryCacheEntry.objects.filter(key=key).values_list("summary", flat=True).afirst()
+        with self._lock:
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, summary)
+        CACHE_LOOKUPS.inc(result="miss" if summary is None else "hit")
+        return summary
+
+    def set(self, description_text, summary):
+        """
+        Store the summary of a description.
+        :param description_text: The issue description.
+        :param summary: The generated summary.
+        """
+
+        key = self.make_key(description_text)
+        SummaryCacheEntry.objects.update_or_create(key=key, defaults={"summary": summary})
+        with self._lock:
+            self._remember(key, summary)
+
+    async def aset(self, description_text, summary):
+        """
+        Async version of set(), writing the database with the async ORM.
+        :param description_text: The issue description.
+        :param summary: The generated summary.
+        """
+
+        key = self.make_key(description_text)
+        await SummaryCacheEntry.objects.aupdate_or_create(key=key, defaults={"summary": summary})
+        with self._lock:
+            self._remember(key, summary)
+
+    def clear(self):
+        """
+        Empty the in-memory layer and reset the counters. The database table is left alone.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Return the cache counters.
+        :return: A dictionary of hits, misses, hit ratio and in-memory size.
+        """
+
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
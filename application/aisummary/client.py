@@ -0,0 +1,458 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+import openai
+from django.conf import settings
+from .metrics import API_ERRORS, API_REQUESTS, TOKENS
+
+# Errors that are worth retrying: rate limits, server errors, timeouts and dropped connections
+# (APITimeoutError is a kind of APIConnectionError).
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+
+class SummaryUnavailable(Exception):
+    """
+    Raised when a summary cannot be generated right now, because the API kept failing or the
+    circuit breaker is open. The job should be tried again later rather than given up on.
+    """
+
+    def __init__(self, message, retry_after=None):
+        """
+        :param message: The reason.
+        :param retry_after: The number of seconds after which trying again makes sense, if known.
+        """
+
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that spaces requests out to a steady rate, allowing short bursts.
+    Callers reserve a token and are told how long to wait for it, so the same bucket serves threads
+    (which sleep) and event loops (which await).
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        """
+        :param rate: The number of tokens added per second.
+        :param capacity: The most tokens the bucket holds, which is the largest burst allowed.
+        :param clock: A function returning the current time in seconds.
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token, going into debt if the bucket is empty.
+        :return: The number of seconds to wait before using the token.
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """
+        Take a token, sleeping until it is available.
+        """
+
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        """
+        Take a token, waiting on the event loop until it is available.
+        """
+
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """
+    Stops calls to an endpoint that keeps failing.
+    After `failure_threshold` failures in a row the circuit opens and calls are refused for
+    `reset_timeout` seconds. Then a single trial call is let through: if it succeeds the circuit
+    closes again, and if it fails the circuit stays open for another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        :param failure_threshold: The number of failures in a row that opens the circuit.
+        :param reset_timeout: The number of seconds the circuit stays open before a trial call.
+        :param clock: A function returning the current time in seconds.
+        """
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        Return the state of the circuit: CLOSED, OPEN or HALF_OPEN.
+        """
+
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        """
+        Work out the state of the circuit. Must be called with the lock held.
+        """
+
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def retry_after(self):
+        """
+        Return the number of seconds until the circuit lets a trial call through, 0 if it would now.
+        """
+
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def allow(self):
+        """
+        Decide whether a call may be made now.
+        :return: True if the circuit is closed, or it is half-open and no trial call is running.
+        """
+
+        return self.begin_call()[0]
+
+    def begin_call(self):
+        """
+        Decide whether a call may be made now, as allow() does, and whether it is the trial call.
+        A trial call that ends without record_success() or record_failure(), for example because it
+        was cancelled, must call end_trial(), or no other trial call would be let through.
+        :return: A tuple of (allowed, trial).
+        """
+
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True, False
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True, True
+            return False, False
+
+    def end_trial(self):
+        """
+        Let another trial call through. Does nothing if the trial's outcome has been recorded.
+        """
+
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        """
+        Record a successful call, closing the circuit.
+        """
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        """
+        Record a failed call, opening the circuit if there have been too many in a row.
+        """
+
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, rng=random):
+    """
+    Return how long to wait before retrying, with exponential backoff and full jitter.
+    :param attempt: The number of attempts made so far, from 1.
+    :param base: The delay ceiling after the first attempt, in seconds.
+    :param cap: The largest delay ceiling, in seconds.
+    :param rng: The random number generator.
+    :return: A delay between 0 and min(cap, base * 2 ** (attempt - 1)) seconds.
+    """
+
+    return rng.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def retry_after_header(error):
+    """
+    Return the delay the API asked for in a Retry-After header, if the error has one.
+    :param error: The exception raised by the OpenAI client.
+    :return: The number of seconds, or None.
+    """
+
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def record_usage(response):
+    """
+    Add the tokens used by a chat completion to the token counters.
+    :param response: The ChatCompletion response.
+    """
+
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+        TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+
+
+class ResilientClient:
+    """
+    Sends chat completion requests to the OpenAI API with rate limiting, retries and a circuit breaker.
+    Every request first takes a token from the bucket. Requests that fail with a rate limit, server
+    error or connection error are retried with exponential backoff and jitter, honouring any
+    Retry-After header. Each request's final outcome is recorded by the circuit breaker, and while
+    the circuit is open requests fail straight away without reaching the API.
+    """
+
+    def __init__(self, bucket, breaker, max_attempts=4, backoff_base=0.5, backoff_cap=30.0,
+                 api_key=None, base_url=None, rng=random):
+        """
+        :param bucket: The TokenBucket shared by every request.
+        :param breaker: The CircuitBreaker shared by every request.
+        :param max_attempts: The most times a request is sent before giving up.
+        :param backoff_base: The delay ceiling after the first failure, in seconds.
+        :param backoff_cap: The largest delay ceiling, in seconds.
+        :param api_key: The OpenAI API key.
+        :param base_url: The API base URL, or None for the OpenAI default.
+        :param rng: The random number generator used for jitter.
+        """
+
+        self.bucket = bucket
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.api_key = api_key
+        self.base_url = base_url
+        self.rng = rng
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # One async client per event loop, as a client's connection pool belongs to the loop that created it.
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def get_client(self):
+        """
+        Return the OpenAI client, creating it on first use.
+        The client's own retries are turned off, as this class does the retrying.
+        """
+
+        with self._client_lock:
+            if self._client is None:
+                self._client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            return self._client
+
+    def get_async_client(self):
+        """
+        Return the AsyncOpenAI client for the running event loop, creating it on first use.
+        """
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            self._async_clients[loop] = client
+        return client
+
+    def _check_circuit(self):
+        """
+        Raise SummaryUnavailable if the circuit breaker is refusing calls.
+        :return: True if the request is the circuit breaker's trial call.
+        """
+
+        allowed, trial = self.breaker.begin_call()
+        if not allowed:
+            raise SummaryUnavailable(
+                "The OpenAI API is failing, so calls are paused.", retry_after=self.breaker.retry_after()
+            )
+        return trial
+
+    def _retry_delay(self, error, attempt):
+        """
+        Decide whether to retry after a failed attempt.
+        :param error: The exception raised by the attempt.
+        :param attempt: The number of attempts made so far.
+        :return: The number of seconds to wait before the next attempt, or None to give up.
+        """
+
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt >= self.max_attempts:
+            return None
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, self.rng)
+        requested = retry_after_header(error)
+        if requested is not None:
+            delay = max(delay, min(requested, self.backoff_cap))
+        return delay
+
+    def _give_up(self, error):
+        """
+        Record a request that has failed for good, and return the exception to raise.
+        Retryable errors count against the circuit breaker and become SummaryUnavailable so that the
+        job is tried again later. Other errors, such as a rejected prompt, show that the API is up.
+        """
+
+        if isinstance(error, RETRYABLE_ERRORS):
+            self.breaker.record_failure()
+            return SummaryUnavailable(f"The OpenAI API failed: {error}", retry_after=retry_after_header(error))
+        self.breaker.record_success()
+        return error
+
+    def complete(self, messages, model, timeout):
+        """
+        Send a chat completion request, retrying it if it fails.
+        :param messages: The chat messages.
+        :param model: The model name.
+        :param timeout: The timeout of each attempt, in seconds.
+        :return: The ChatCompletion response.
+        :raises SummaryUnavailable: If the circuit is open or the retries ran out.
+        """
+
+        trial = self._check_circuit()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                self.bucket.acquire()
+                API_REQUESTS.inc()
+                try:
+                    response = self.get_client().chat.completions.create(
+                        model=model, messages=messages, timeout=timeout
+                    )
+                except Exception as e:
+                    API_ERRORS.inc(type=type(e).__name__)
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise self._give_up(e) from e
+                    time.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                record_usage(response)
+                return response
+        finally:
+            # A trial interrupted by KeyboardInterrupt or SystemExit records no outcome.
+            if trial:
+                self.breaker.end_trial()
+
+    async def acomplete(self, messages, model, timeout):
+        """
+        Async version of complete(), waiting on the event loop instead of sleeping.
+        :param messages: The chat messages.
+        :param model: The model name.
+        :param timeout: The timeout of each attempt, in seconds.
+        :return: The ChatCompletion response.
+        :raises SummaryUnavailable: If the circuit is open or the retries ran out.
+        """
+
+        trial = self._check_circuit()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                await self.bucket.aacquire()
+                API_REQUESTS.inc()
+                try:
+                    response = await self.get_async_client().chat.completions.create(
+                        model=model, messages=messages, timeout=timeout
+                    )
+                except Exception as e:
+                    API_ERRORS.inc(type=type(e).__name__)
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise self._give_up(e) from e
+                    await asyncio.sleep(delay)
+                    continue
+                self.breaker.record_success()
+                record_usage(response)
+                return response
+        finally:
+            # A cancelled trial records no outcome.
+            if trial:
+                self.breaker.end_trial()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def build_client():
+    """
+    Create a ResilientClient from the AI_SUMMARY_* settings.
+    """
+
+    requests_per_minute = getattr(settings, 'AI_SUMMARY_REQUESTS_PER_MINUTE', 60)
+    return ResilientClient(
+        bucket=TokenBucket(
+            rate=requests_per_minute / 60,
+            capacity=getattr(settings, 'AI_SUMMARY_BURST', 10),
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=getattr(settings, 'AI_SUMMARY_BREAKER_THRESHOLD', 5),
+            reset_timeout=getattr(settings, 'AI_SUMMARY_BREAKER_RESET', 30.0),
+        ),
+        max_attempts=getattr(settings, 'AI_SUMMARY_MAX_ATTEMPTS', 4),
+        api_key=settings.OPENAI_API_KEY,
+        base_url=getattr(settings, 'OPENAI_BASE_URL', None),
+    )
+
+
+def get_client():
+    """
+    Return the process-wide ResilientClient, creating it from the settings the first time.
+    Every summary path shares it, so the rate limit and the circuit breaker apply to the process as a whole.
+    """
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = build_client()
+    return _client
+
+
+def reset_client():
+    """
+    Throw away the process-wide client so that it is rebuilt from the settings on next use.
+    """
+
+    global _client
+    with _client_lock:
+        _client = None
@@ -0,0 +1,54 @@
+import signal
+from django.core.management.base import BaseCommand
+from aisummary.queue import SummaryWorkerPool, get_concurrency, queue_depth
+
+
+class Command(BaseCommand):
+    """
+    Runs a fixed-size pool of workers that generate AI summaries from the job queue.
+    """
+
+    help = "Run the AI summary workers."
+
+    def add_arguments(self, parser):
+        """
+        Add the command line arguments.
+        :param parser: The argument parser.
+        """
+
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=get_concurrency(),
+            help="The number of batches to summarise at the same time.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="The maximum number of issues summarised in a single request.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of waiting for new jobs.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Start the worker pool and run until interrupted.
+        """
+
+        pool = SummaryWorkerPool(
+            concurrency=options["concurrency"], batch_size=options["batch_size"]
+        )
+
+        # Finish the jobs in flight on Ctrl+C or a service manager stop.
+        signal.signal(signal.SIGINT, lambda *_: pool.stop())
+        signal.signal(signal.SIGTERM, lambda *_: pool.stop())
+
+        self.stdout.write(
+            f"Starting {pool.concurrency} summary workers ({queue_depth()} jobs pending)."
+        )
+        processed = pool.run(once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} summary jobs."))
@@ -0,0 +1,348 @@
+import math
+import threading
+from bisect import bisect_left
+
+
+def escape_label_value(value):
+    """
+    Escape a label value for the Prometheus text format.
+    """
+
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    """
+    Format a dictionary of labels as {name="value",...}, or an empty string if there are none.
+    """
+
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def format_value(value):
+    """
+    Format a sample value for the Prometheus text format.
+    """
+
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Registry:
+    """
+    The metrics exposed by a process, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Add a metric.
+        :raises ValueError: If a metric with the same name is already registered.
+        """
+
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"A metric called {metric.name} is already registered.")
+            self._metrics.append(metric)
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text format.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# The metrics of this process, served at /metrics.
+REGISTRY = Registry()
+
+
+class ShardedMetric:
+    """
+    A metric whose values are kept per thread. A thread only ever writes its own shard, so updating
+    a metric takes no lock: the lock is only taken the first time a thread uses the metric and when
+    the metric is read. Shards of threads that have finished are folded into one when read.
+    A reader may see an update to a histogram half applied, which is harmless for monitoring.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        """
+        :param name: The metric name.
+        :param documentation: The help text.
+        :param labelnames: The names of the labels every update must give.
+        :param registry: The Registry to add the metric to, or None to leave it out.
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._labelset = frozenset(self.labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _shard(self):
+        """
+        Return this thread's values, a dictionary mapping label values to a value.
+        """
+
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _key(self, labels):
+        """
+        Return the label values for an update, in labelnames order.
+        :raises ValueError: If the labels do not match labelnames.
+        """
+
+        if labels.keys() != self._labelset:
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}, not {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _merge(self, into, values):
+        """
+        Add one shard's values into a dictionary of totals.
+        """
+
+        raise NotImplementedError
+
+    def collect(self):
+        """
+        Return the values summed over every thread, as a dictionary mapping label values to a value.
+        """
+
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    self._merge(self._retired, values)
+            self._shards = live
+            totals = {}
+            self._merge(totals, self._retired)
+            for _, values in live:
+                # Copying a dictionary is atomic, so the owner may carry on updating it meanwhile.
+                self._merge(totals, values.copy())
+        return totals
+
+    def samples(self):
+        """
+        Yield (name, labels, value) for every sample of the metric.
+        """
+
+        raise NotImplementedError
+
+
+class Counter(ShardedMetric):
+    """
+    A count that only goes up.
+    """
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        """
+        Add to the count.
+        :param amount: The amount to add, which must not be negative.
+        :param labels: A value for each of the metric's labels.
+        """
+
+        values = self._shard()
+        key = self._key(labels)
+        values[key] = values.get(key, 0) + amount
+
+    def _merge(self, into, values):
+        for key, value in values.items():
+            into[key] = into.get(key, 0) + value
+
+    def value(self, **labels):
+        """
+        Return the count for the given labels.
+        """
+
+        return self.collect().get(self._key(labels), 0)
+
+    def samples(self):
+        for key, value in sorted(self.collect().items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(ShardedMetric):
+    """
+    Counts observations, such as durations, in buckets by size, along with their sum.
+    """
+
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        """
+        :param buckets: The upper bounds of the buckets, in increasing order. A +Inf bucket is added.
+        """
+
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        """
+        Record an observation.
+        :param value: The observed value.
+        :param labels: A value for each of the metric's labels.
+        """
+
+        values = self._shard()
+        key = self._key(labels)
+        # One count per bucket, not yet cumulative, then the +Inf bucket and the sum.
+        counts = values.get(key)
+        if counts is None:
+            counts = values[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, **labels):
+        """
+        Return the number of observations for the given labels.
+        """
+
+        counts = self.collect().get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def _merge(self, into, values):
+        for key, counts in values.items():
+            totals = into.get(key)
+            if totals is None:
+                into[key] = list(counts)
+            else:
+                for index, count in enumerate(counts):
+                    totals[index] += count
+
+    def samples(self):
+        for key, counts in sorted(self.collect().items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, counts[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Gauge:
+    """
+    A value that is worked out when the metrics are read, by calling a function.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, function, registry=REGISTRY):
+        """
+        :param name: The metric name.
+        :param documentation: The help text.
+        :param function: A function returning the current value.
+        :param registry: The Registry to add the metric to, or None to leave it out.
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        if registry is not None:
+            registry.register(self)
+
+    def samples(self):
+        yield self.name, {}, self.function()
+
+
+SUMMARY_SECONDS = Histogram(
+    "aisummary_summary_duration_seconds",
+    "Time taken by the summary backend to summarise one description or one batch.",
+    ["backend"],
+    buckets=(0.001, 0.01, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+SUMMARIES = Counter(
+    "aisummary_summaries_total",
+    "Issues the summary pipeline finished with, by outcome: generated, reused, stale, empty or failed.",
+    ["outcome"],
+)
+
+API_REQUESTS = Counter(
+    "aisummary_api_requests_total",
+    "Requests sent to the OpenAI API, counting each retry.",
+)
+
+API_ERRORS = Counter(
+    "aisummary_api_errors_total",
+    "Failed requests to the OpenAI API, by exception type.",
+    ["type"],
+)
+
+TOKENS = Counter(
+    "aisummary_tokens_total",
+    "Tokens used by the OpenAI API, by kind: prompt or completion.",
+    ["kind"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "aisummary_cache_lookups_total",
+    "Summary cache lookups, by result: hit or miss.",
+    ["result"],
+)
+
+
+def cache_hit_ratio():
+    """
+    Return the fraction of summary cache lookups that were hits, or 0 if there have been none.
+    """
+
+    hits, misses = CACHE_LOOKUPS.value(result="hit"), CACHE_LOOKUPS.value(result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def pending_jobs():
+    """
+    Return the number of summary jobs waiting for a worker.
+    """
+
+    from .queue import queue_depth
+    return queue_depth()
+
+
+def unsummarised_issues():
+    """
+    Return the number of issues with no summary yet. Issues showing a draft summary are not counted,
+    and nor are issues with no description, which are never summarised.
+    """
+
+    from council.models import Issue
+    return Issue.objects.filter(ai_summary="").exclude(description="").count()
+
+
+Gauge("aisummary_cache_hit_ratio", "The fraction of summary cache lookups that were hits.", cache_hit_ratio)
+Gauge("aisummary_queue_depth", "Summary jobs waiting for a worker.", pending_jobs)
+Gauge("aisummary_issues_waiting", "Issues with no summary yet.", unsummarised_issues)
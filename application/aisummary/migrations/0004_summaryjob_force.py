@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aisummary', '0003_summaryjob_run_after'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='summaryjob',
+            name='force',
+            field=models.BooleanField(default=False),
+        ),
+    ]
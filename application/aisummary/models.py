@@ -1,3 +1,77 @@
 from django.db import models
 
-# Create your models here.
+
+class SummaryJob(models.Model):
+    """
+    A queued request to generate the AI summary for an issue.
+    Jobs are stored in the database so that they survive worker restarts.
+    """
+
+    # Enumerated choices for the job lifecycle:
+    JOB_STATUS = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    issue = models.ForeignKey(
+        'council.Issue',
+        on_delete=models.CASCADE,
+        related_name='summary_jobs'
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=JOB_STATUS,
+        default='PENDING'
+    )
+
+    # The number of times a worker has picked up this job.
+    attempts = models.PositiveIntegerField(default=0)
+
+    # When a worker claimed the job, used to recover jobs from crashed workers.
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    # When a job put back on the queue because the API was unavailable may next be claimed.
+    run_after = models.DateTimeField(null=True, blank=True)
+
+    # Summarise from scratch, without reusing a cached summary or a near-duplicate issue's, as when
+    # staff ask for a summary to be regenerated.
+    force = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """
+        The meta class for the SummaryJob.
+        """
+
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        """
+        Return a string representation of the job.
+        """
+        return f"Summary job for issue {self.issue_id} (Status: {self.get_status_display()})"
+
+
+class SummaryCacheEntry(models.Model):
+    """
+    A previously generated summary, keyed on a hash of the normalised description and the
+    model and prompt version it was generated with.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    summary = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        """
+        Return a string representation of the cache entry.
+        """
+        return f"Cached summary {self.key[:12]}"
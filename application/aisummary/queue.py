@@ -0,0 +1,361 @@
+import asyncio
+import logging
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from asgiref.sync import sync_to_async
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import SummaryJob
+
+logger = logging.getLogger(__name__)
+
+
+def get_concurrency():
+    """
+    Return the configured number of summary workers.
+    :return: The maximum number of summaries generated at the same time.
+    """
+
+    return getattr(settings, 'AI_SUMMARY_CONCURRENCY', 4)
+
+
+def enqueue_summary(issue_id):
+    """
+    Adds a summary job for the given issue to the queue, unless one is already waiting.
+    :param issue_id: The ID of the issue to generate a summary for.
+    :return: The queued SummaryJob.
+    """
+
+    job = SummaryJob.objects.filter(issue_id=issue_id, status='PENDING').first()
+    if job is None:
+        job = SummaryJob.objects.create(issue_id=issue_id)
+    return job
+
+
+async def aenqueue_summary(issue_id):
+    """
+    Async version of enqueue_summary, using the async ORM.
+    :param issue_id: The ID of the issue to generate a summary for.
+    :return: The queued SummaryJob.
+    """
+
+    job = await SummaryJob.objects.filter(issue_id=issue_id, status='PENDING').afirst()
+    if job is None:
+        job = await SummaryJob.objects.acreate(issue_id=issue_id)
+    return job
+
+
+def enqueue_summaries(issue_ids, force=False):
+    """
+    Adds summary jobs for many issues in a single insert, for example after a bulk import.
+    Unlike enqueue_summary, this does not check for jobs that are already waiting, so it should
+    only be given issues that have never been queued.
+    :param issue_ids: The IDs of the issues to generate summaries for.
+    :param force: Summarise from scratch rather than reuse an earlier summary (see SummaryJob.force).
+    :return: The number of jobs queued.
+    """
+
+    jobs = SummaryJob.objects.bulk_create([SummaryJob(issue_id=issue_id, force=force) for issue_id in issue_ids])
+    return len(jobs)
+
+
+def queue_depth():
+    """
+    Return the number of jobs waiting for a worker.
+    """
+
+    return SummaryJob.objects.filter(status='PENDING').count()
+
+
+def ready_jobs():
+    """
+    Return the pending jobs that may be claimed now, leaving out jobs put back on the queue until later.
+    """
+
+    return SummaryJob.objects.filter(
+        Q(run_after__isnull=True) | Q(run_after__lte=timezone.now()), status='PENDING'
+    )
+
+
+def recover_stale_jobs(lease_seconds=None):
+    """
+    Puts jobs claimed by a worker that has since died back on the queue.
+    :param lease_seconds: How long a worker may hold a job before it is considered lost.
+    :return: The number of jobs recovered.
+    """
+
+    if lease_seconds is None:
+        lease_seconds = getattr(settings, 'AI_SUMMARY_JOB_LEASE', 300)
+
+    cutoff = timezone.now() - timedelta(seconds=lease_seconds)
+    return SummaryJob.objects.filter(status='RUNNING', locked_at__lt=cutoff).update(
+        status='PENDING', locked_at=None, updated_at=timezone.now()
+    )
+
+
+def claim_jobs(limit):
+    """
+    Claims up to `limit` pending jobs that are ready (see ready_jobs), oldest first.
+    A job is only claimed if its status is still PENDING when the update runs, so two workers
+    can never pick up the same job.
+    :param limit: The maximum number of jobs to claim.
+    :return: A list of claimed SummaryJob instances.
+    """
+
+    claimed = []
+    if limit <= 0:
+        return claimed
+
+    candidate_ids = ready_jobs().values_list('id', flat=True)[:limit]
+    for job_id in list(candidate_ids):
+        now = timezone.now()
+        updated = ready_jobs().filter(pk=job_id).update(
+            status='RUNNING', locked_at=now, updated_at=now
+        )
+        if updated:
+            claimed.append(SummaryJob.objects.get(pk=job_id))
+    return claimed
+
+
+def batch_ready(batch_size, flush_interval):
+    """
+    Decide whether the workers should take the next batch now or wait for more jobs to arrive.
+    A batch is taken when it is full or when the oldest waiting job has waited for `flush_interval`.
+    :param batch_size: The maximum number of jobs in a batch.
+    :param flush_interval: The maximum number of seconds a job waits for its batch to fill.
+    :return: True if a batch should be claimed.
+    """
+
+    pending = ready_jobs()
+    if pending[batch_size - 1:batch_size].exists():
+        return True
+
+    oldest = pending.values_list('created_at', flat=True).first()
+    if oldest is None:
+        return False
+    return oldest <= timezone.now() - timedelta(seconds=flush_interval)
+
+
+def requeue_jobs(job_ids, retry_after=None):
+    """
+    Puts claimed jobs back on the queue after the API was unavailable, to be claimed again once a
+    delay has passed. Jobs that have already been tried AI_SUMMARY_MAX_JOB_ATTEMPTS times are marked
+    as failed instead.
+    :param job_ids: The IDs of the jobs.
+    :param retry_after: The number of seconds the API asked us to wait, if it did.
+    :return: The number of jobs put back on the queue.
+    """
+
+    max_attempts = getattr(settings, 'AI_SUMMARY_MAX_JOB_ATTEMPTS', 5)
+    delay = max(retry_after or 0, getattr(settings, 'AI_SUMMARY_REQUEUE_DELAY', 60))
+    now = timezone.now()
+    jobs = SummaryJob.objects.filter(pk__in=job_ids)
+    jobs.filter(attempts__gte=max_attempts).update(status='FAILED', locked_at=None, updated_at=now)
+    return jobs.filter(attempts__lt=max_attempts).update(
+        status='PENDING', locked_at=None, run_after=now + timedelta(seconds=delay), updated_at=now
+    )
+
+
+def run_jobs(jobs):
+    """
+    Generates the summaries for a batch of claimed jobs and records the outcome.
+    Forced jobs are summarised without reusing earlier summaries.
+    If the API is unavailable the jobs are put back on the queue to be tried again later.
+    :param jobs: The claimed SummaryJob instances.
+    """
+
+    from .client import SummaryUnavailable
+    from .utils import generate_ai_summaries_batch
+
+    job_ids = [job.pk for job in jobs]
+    try:
+        SummaryJob.objects.filter(pk__in=job_ids).update(attempts=F('attempts') + 1)
+        issue_ids = [job.issue_id for job in jobs if not job.force]
+        forced_issue_ids = [job.issue_id for job in jobs if job.force]
+        if issue_ids:
+            generate_ai_summaries_batch(issue_ids)
+        if forced_issue_ids:
+            generate_ai_summaries_batch(forced_issue_ids, reuse=False)
+        SummaryJob.objects.filter(pk__in=job_ids).update(
+            status='DONE', locked_at=None, updated_at=timezone.now()
+        )
+    except SummaryUnavailable as e:
+        requeued = requeue_jobs(job_ids, e.retry_after)
+        logger.warning("Summary jobs %s put back on the queue (%s requeued): %s", job_ids, requeued, e)
+    except Exception:
+        logger.exception("Summary jobs %s failed.", job_ids)
+        SummaryJob.objects.filter(pk__in=job_ids).update(
+            status='FAILED', locked_at=None, updated_at=timezone.now()
+        )
+
+
+def _run_jobs_in_worker(jobs):
+    """
+    Runs a batch of jobs on a pool thread, then closes the thread's database connection if it has
+    outlived CONN_MAX_AGE or broken, so that a healthy connection is reused for the next batch.
+    :param jobs: The claimed SummaryJob instances.
+    """
+
+    try:
+        run_jobs(jobs)
+    finally:
+        close_old_connections()
+
+
+class SummaryWorkerPool:
+    """
+    A fixed-size pool of threads that works through the summary job queue.
+    Each thread summarises a batch of up to `batch_size` jobs in one request, and at most
+    `concurrency` batches are in flight at once, however many jobs are waiting.
+    """
+
+    def __init__(self, concurrency=None, poll_interval=None, batch_size=None, flush_interval=None):
+        """
+        :param concurrency: The number of worker threads, defaults to AI_SUMMARY_CONCURRENCY.
+        :param poll_interval: Seconds to wait between queue polls when idle.
+        :param batch_size: The maximum jobs per request, defaults to AI_SUMMARY_BATCH_SIZE.
+        :param flush_interval: Seconds a job may wait for its batch to fill, defaults to AI_SUMMARY_BATCH_INTERVAL.
+        """
+
+        self.concurrency = concurrency or get_concurrency()
+        if poll_interval is None:
+            poll_interval = getattr(settings, 'AI_SUMMARY_POLL_INTERVAL', 1.0)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size or getattr(settings, 'AI_SUMMARY_BATCH_SIZE', 10)
+        if flush_interval is None:
+            flush_interval = getattr(settings, 'AI_SUMMARY_BATCH_INTERVAL', 2.0)
+        self.flush_interval = flush_interval
+        self._stopping = False
+
+    def stop(self):
+        """
+        Ask the pool to stop claiming new jobs. Jobs already running are allowed to finish.
+        """
+
+        self._stopping = True
+
+    def run(self, once=False):
+        """
+        Runs the pool until stopped.
+        :param once: If True, exit as soon as no job is ready instead of waiting for more jobs. Jobs
+            put back on the queue until later are left for the next run. Partial batches are sent
+            straight away rather than waiting for the flush interval.
+        :return: The number of jobs processed.
+        """
+
+        recovered = recover_stale_jobs()
+        if recovered:
+            logger.warning("Recovered %s summary jobs from a previous worker.", recovered)
+
+        processed = 0
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self._stopping:
+                while len(in_flight) < self.concurrency and (once or batch_ready(self.batch_size, self.flush_interval)):
+                    jobs = claim_jobs(self.batch_size)
+                    if not jobs:
+                        break
+                    in_flight[executor.submit(_run_jobs_in_worker, jobs)] = len(jobs)
+
+                if not in_flight:
+                    if once and not ready_jobs().exists():
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    processed += in_flight.pop(future)
+                if done and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Summary queue depth: %s pending, %s batches running.", queue_depth(), len(in_flight))
+
+            wait(in_flight)
+            processed += sum(in_flight.values())
+
+        return processed
+
+
+# The tasks started by start_summary_task. The event loop only keeps weak references to tasks, so
+# they are held here until they finish.
+_background_tasks = set()
+
+# A semaphore per event loop, limiting the summaries in flight on that loop.
+_loop_semaphores = weakref.WeakKeyDictionary()
+
+
+def get_async_concurrency():
+    """
+    Return the configured number of summaries that may be in flight at once on one event loop.
+    """
+
+    return getattr(settings, 'AI_SUMMARY_ASYNC_CONCURRENCY', 50)
+
+
+def _loop_semaphore():
+    """
+    Return the semaphore for the running event loop, creating it on first use.
+    """
+
+    loop = asyncio.get_running_loop()
+    semaphore = _loop_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(get_async_concurrency())
+        _loop_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def arun_summary_job(job_id):
+    """
+    Claims a queued job and generates its summary on the running event loop.
+    The job is claimed with the same conditional update as claim_jobs, so it is never run by both
+    the event loop and a worker. If the process dies while the summary is in flight, the job is
+    put back on the queue by recover_stale_jobs once its lease expires. If the API is unavailable,
+    the job is put back on the queue for the workers to try again later.
+    :param job_id: The ID of the job.
+    :return: True if the job was claimed and run, False if someone else had already claimed it.
+    """
+
+    from .client import SummaryUnavailable
+    from .utils import agenerate_ai_summary
+
+    async with _loop_semaphore():
+        now = timezone.now()
+        claimed = await ready_jobs().filter(pk=job_id).aupdate(
+            status='RUNNING', locked_at=now, updated_at=now, attempts=F('attempts') + 1
+        )
+        if not claimed:
+            return False
+
+        job = await SummaryJob.objects.aget(pk=job_id)
+        try:
+            await agenerate_ai_summary(job.issue_id, reuse=not job.force)
+            await SummaryJob.objects.filter(pk=job_id).aupdate(
+                status='DONE', locked_at=None, updated_at=timezone.now()
+            )
+        except SummaryUnavailable as e:
+            logger.warning("Summary job %s put back on the queue: %s", job_id, e)
+            await sync_to_async(requeue_jobs)([job_id], e.retry_after)
+        except Exception:
+            logger.exception("Summary job %s failed.", job_id)
+            await SummaryJob.objects.filter(pk=job_id).aupdate(
+                status='FAILED', locked_at=None, updated_at=timezone.now()
+            )
+        return True
+
+
+def start_summary_task(job_id):
+    """
+    Runs a queued job in the background on the running event loop.
+    Only use this where the loop outlives the request, as it does under an ASGI server.
+    :param job_id: The ID of the job.
+    :return: The asyncio Task.
+    """
+
+    task = asyncio.create_task(arun_summary_job(job_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
@@ -0,0 +1,204 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest.mock import patch, AsyncMock
+from council.duplicates import reset_duplicate_index
+from council.forms import EditForm
+from council.models import Issue
+from aisummary.backends import LocalBackend, extractive_summary
+from aisummary.models import SummaryJob
+from aisummary.queue import claim_jobs, run_jobs
+from aisummary.utils import (
+    agenerate_ai_summary, agenerate_ai_summary_async, generate_ai_summary_async, generate_ai_summary_sync,
+    generate_ai_summaries_batch, summary_cache
+)
+
+User = get_user_model()
+
+DESCRIPTION = (
+    "There is a deep pothole on Mill Road outside the school. "
+    "I walked my dog this morning. "
+    "The pothole has already damaged two cars on Mill Road and it is getting deeper."
+)
+
+
+class ExtractiveSummaryTests(TestCase):
+    """
+    Tests for the local extractive summariser.
+    """
+
+    def test_picks_central_sentences(self):
+        """
+        Test that the sentences about what the description keeps coming back to are chosen, in order.
+        """
+
+        summary = extractive_summary(DESCRIPTION, max_words=30)
+        self.assertEqual(
+            summary,
+            "There is a deep pothole on Mill Road outside the school. "
+            "The pothole has already damaged two cars on Mill Road and it is getting deeper."
+        )
+
+    def test_word_limit(self):
+        """
+        Test that the summary keeps to the word limit, cutting the best sentence if it is too long.
+        """
+
+        self.assertLessEqual(len(extractive_summary(DESCRIPTION, max_words=20).split()), 20)
+        self.assertEqual(extractive_summary("One two three four five, six seven.", max_words=5), "One two three four five")
+
+    def test_empty_and_deterministic(self):
+        """
+        Test that an empty description gives an empty summary, and the same description always
+        gives the same summary.
+        """
+
+        self.assertEqual(extractive_summary("   "), "")
+        self.assertEqual(extractive_summary(DESCRIPTION), extractive_summary(DESCRIPTION))
+
+
+class BackendSelectionTests(TestCase):
+    """
+    Tests for summarising with the backends chosen by AI_SUMMARY_BACKEND.
+    """
+
+    def setUp(self):
+        # Start each test with an empty in-memory summary cache and duplicate index.
+
+        summary_cache.clear()
+        reset_duplicate_index()
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalBackend')
+    @patch('aisummary.utils.request_summary')
+    def test_local_backend(self, mock_request):
+        """
+        Test that the local backend saves an extractive summary without calling the API or the cache.
+        """
+
+        issue = Issue.objects.create(description=DESCRIPTION, ai_summary="")
+
+        summary = generate_ai_summary_sync(issue.id)
+        self.assertEqual(summary, LocalBackend().summarise(DESCRIPTION))
+        mock_request.assert_not_called()
+        self.assertIsNone(summary_cache.get(DESCRIPTION))
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalFirstBackend')
+    @patch('aisummary.utils.request_summary', return_value="Deep pothole on Mill Road damaging cars")
+    def test_local_first_draft_replaced(self, mock_request):
+        """
+        Test that local-first mode shows a local summary when the issue is queued, and replaces it
+        with the OpenAI summary when the job runs.
+        """
+
+        issue = Issue.objects.create(description=DESCRIPTION, ai_summary="")
+        generate_ai_summary_async(issue.id)
+
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, LocalBackend().summarise(DESCRIPTION))
+        self.assertEqual(SummaryJob.objects.filter(issue=issue, status='PENDING').count(), 1)
+
+        self.assertEqual(generate_ai_summary_sync(issue.id), "Deep pothole on Mill Road damaging cars")
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "Deep pothole on Mill Road damaging cars")
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalFirstBackend')
+    @patch('aisummary.utils.request_summary', return_value="Deep pothole on Mill Road")
+    def test_local_first_keeps_edited_summary(self, mock_request):
+        """
+        Test that a summary written over the draft by staff is not replaced.
+        """
+
+        issue = Issue.objects.create(description=DESCRIPTION, ai_summary="", title="Pothole", email="a@example.com")
+        generate_ai_summary_async(issue.id)
+        issue.refresh_from_db()
+        self.assertTrue(issue.ai_summary_is_draft)
+        form = EditForm({
+            "title": issue.title, "ai_summary": "Pothole reported by a parent", "description": issue.description,
+            "category": issue.category, "email": issue.email, "status": issue.status,
+        }, instance=issue)
+        form.save()
+
+        self.assertIsNone(generate_ai_summary_sync(issue.id))
+        mock_request.assert_not_called()
+        issue.refresh_from_db()
+        self.assertFalse(issue.ai_summary_is_draft)
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalFirstBackend')
+    @patch('aisummary.utils.request_summary', return_value="Deep pothole on Mill Road")
+    def test_local_first_draft_replaced_after_description_edit(self, mock_request):
+        """
+        Test that a draft is still replaced after the description it was made from has been edited.
+        """
+
+        issue = Issue.objects.create(description=DESCRIPTION, ai_summary="")
+        generate_ai_summary_async(issue.id)
+        Issue.objects.filter(pk=issue.pk).update(description=DESCRIPTION + " Please fix it soon.")
+
+        self.assertEqual(generate_ai_summary_sync(issue.id), "Deep pothole on Mill Road")
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "Deep pothole on Mill Road")
+        self.assertFalse(issue.ai_summary_is_draft)
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalFirstBackend')
+    def test_local_first_draft_requeued_after_edit(self):
+        """
+        Test that editing the description of an issue showing a draft while its summary is being
+        generated queues it again, so that the stale summary is thrown away and the draft still replaced.
+        """
+
+        self.client.force_login(User.objects.create_user(username="officer", password="password", is_staff=True))
+        issue = Issue.objects.create(description=DESCRIPTION, ai_summary="", title="Pothole", email="a@example.com")
+        generate_ai_summary_async(issue.id)
+        issue.refresh_from_db()
+        job = claim_jobs(1)[0]
+
+        def edit_during_request(description_text):
+            self.client.post(reverse('update-issue', args=[issue.pk]), {
+                "title": issue.title, "ai_summary": issue.ai_summary, "description": DESCRIPTION + " Please hurry.",
+                "category": issue.category, "email": issue.email, "status": issue.status,
+            })
+            return "Summary of the old description"
+
+        with patch('aisummary.utils.request_summary', side_effect=edit_during_request):
+            run_jobs([job])
+        issue.refresh_from_db()
+        self.assertTrue(issue.ai_summary_is_draft)
+        self.assertEqual(SummaryJob.objects.filter(issue=issue, status='PENDING').count(), 1)
+
+        with patch('aisummary.utils.request_summary', return_value="Deep pothole on Mill Road, please hurry"):
+            run_jobs(claim_jobs(1))
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "Deep pothole on Mill Road, please hurry")
+        self.assertFalse(issue.ai_summary_is_draft)
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalFirstBackend')
+    @patch('aisummary.utils.request_completion', return_value='{"1": "Pothole", "2": "Graffiti"}')
+    def test_local_first_batch(self, mock_request):
+        """
+        Test that the batch path replaces drafts too.
+        """
+
+        issues = [
+            Issue.objects.create(description=DESCRIPTION, ai_summary=""),
+            Issue.objects.create(description="Graffiti has been sprayed on the bridge.", ai_summary=""),
+        ]
+        for issue in issues:
+            generate_ai_summary_async(issue.id)
+
+        saved = generate_ai_summaries_batch([issue.id for issue in issues])
+        self.assertEqual(saved, {issues[0].id: "Pothole", issues[1].id: "Graffiti"})
+
+    @override_settings(AI_SUMMARY_BACKEND='aisummary.backends.LocalFirstBackend')
+    @patch('aisummary.utils.request_completion_async', new_callable=AsyncMock, return_value="Deep pothole")
+    async def test_local_first_async(self, mock_request):
+        """
+        Test that the async path saves the draft when queueing and replaces it when summarising.
+        """
+
+        issue = await Issue.objects.acreate(description=DESCRIPTION, ai_summary="")
+        await agenerate_ai_summary_async(issue.id)
+
+        await issue.arefresh_from_db()
+        self.assertEqual(issue.ai_summary, LocalBackend().summarise(DESCRIPTION))
+
+        self.assertEqual(await agenerate_ai_summary(issue.id), "Deep pothole")
@@ -0,0 +1,77 @@
+from django.test import TestCase
+from aisummary.cache import SummaryCache, normalise_description
+from aisummary.models import SummaryCacheEntry
+
+
+class NormaliseDescriptionTests(TestCase):
+    def test_ignores_case_punctuation_and_whitespace(self):
+        """
+        Test that descriptions differing only in case, punctuation and whitespace normalise the same.
+        """
+
+        self.assertEqual(
+            normalise_description("Streetlight OUT on X road!!"),
+            normalise_description("  streetlight out,\n on x   road "),
+        )
+
+
+class SummaryCacheTests(TestCase):
+    """
+    Tests for the SummaryCache.
+    """
+
+    def setUp(self):
+        # Create a small cache so eviction is easy to trigger.
+
+        self.cache = SummaryCache(version="test-model:1", max_entries=2)
+
+    def test_miss_then_hit(self):
+        """
+        Test that a lookup misses until a summary is stored, and the counters record both.
+        """
+
+        self.assertIsNone(self.cache.get("Pothole on High Street"))
+        self.cache.set("Pothole on High Street", "Pothole on High Street")
+        self.assertEqual(self.cache.get("pothole on high street."), "Pothole on High Street")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_persistent_layer(self):
+        """
+        Test that a summary stored by one cache is found by another through the database.
+        """
+
+        self.cache.set("Graffiti on the bridge", "Graffiti on bridge")
+        other = SummaryCache(version="test-model:1")
+
+        self.assertEqual(other.get("Graffiti on the bridge"), "Graffiti on bridge")
+        self.assertEqual(SummaryCacheEntry.objects.count(), 1)
+
+    def test_version_is_part_of_key(self):
+        """
+        Test that a summary from another model or prompt version is not reused.
+        """
+
+        self.cache.set("Graffiti on the bridge", "Graffiti on bridge")
+        other = SummaryCache(version="test-model:2")
+
+        self.assertIsNone(other.get("Graffiti on the bridge"))
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used summary is evicted from memory once the cache is full.
+        """
+
+        self.cache.set("first", "1")
+        self.cache.set("second", "2")
+        self.cache.get("first")
+        self.cache.set("third", "3")
+
+        self.assertEqual(self.cache.stats()["size"], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get("first"), "1")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.get("second"), "2")
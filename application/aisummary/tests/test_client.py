@@ -0,0 +1,341 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+import openai
+from django.test import SimpleTestCase, TestCase, override_settings
+from council.models import Issue
+from aisummary.client import CircuitBreaker, ResilientClient, SummaryUnavailable, TokenBucket, reset_client
+from aisummary.metrics import API_ERRORS, API_REQUESTS, TOKENS
+from aisummary.utils import generate_ai_summary_sync, summary_cache
+
+
+class FakeClock:
+    """
+    A clock that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeOpenAIServer:
+    """
+    A local HTTP server that answers chat completion requests like the OpenAI API.
+    Each request takes the next scripted reply, a (status, delay, headers) tuple, and once the
+    script runs out every request succeeds straight away.
+    """
+
+    def __init__(self, replies=(), content="Summary"):
+        self.replies = list(replies)
+        self.content = content
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, delay, headers = server.next_reply()
+                time.sleep(delay)
+                if status == 200:
+                    body = {
+                        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test",
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": server.content}}],
+                        "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+                    }
+                else:
+                    body = {"error": {"message": f"Injected error {status}", "type": "test"}}
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting.
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def next_reply(self):
+        with self._lock:
+            self.requests += 1
+            return self.replies.pop(0) if self.replies else (200, 0, {})
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_client(server, max_attempts=3, failure_threshold=5):
+    """
+    Create a ResilientClient for the fake server with no rate limit to speak of and short backoffs.
+    """
+
+    return ResilientClient(
+        bucket=TokenBucket(rate=1000, capacity=1000),
+        breaker=CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=60),
+        max_attempts=max_attempts,
+        backoff_base=0.01,
+        backoff_cap=5,
+        api_key="test",
+        base_url=server.base_url,
+        rng=random.Random(0),
+    )
+
+
+MESSAGES = [{"role": "user", "content": "Summarise this."}]
+
+
+class TokenBucketTests(SimpleTestCase):
+    """
+    Tests for the TokenBucket.
+    """
+
+    def test_burst_then_steady_rate(self):
+        """
+        Test that a full bucket allows a burst, after which requests are spaced out at the rate.
+        """
+
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+        self.assertAlmostEqual(bucket.reserve(), 1.0)
+
+        # After the debt is paid off, the bucket refills up to its capacity and no further.
+        clock.now = 10
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    """
+    Tests for the CircuitBreaker.
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        """
+        Test that the circuit opens after enough failures in a row, and a success resets the count.
+        """
+
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual(self.breaker.retry_after(), 30)
+
+    def test_half_open_allows_one_trial(self):
+        """
+        Test that once the reset timeout passes a single trial call is allowed, and its outcome
+        closes the circuit or opens it again.
+        """
+
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        self.clock.now = 60
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class ResilientClientTests(SimpleTestCase):
+    """
+    Tests for the ResilientClient against a fake OpenAI server.
+    """
+
+    def test_retries_rate_limit_and_server_errors(self):
+        """
+        Test that 429 and 5xx replies are retried until a request succeeds.
+        """
+
+        with FakeOpenAIServer([(429, 0, {}), (503, 0, {})]) as server:
+            response = make_client(server).complete(MESSAGES, "test", timeout=5)
+
+        self.assertEqual(response.choices[0].message.content, "Summary")
+        self.assertEqual(server.requests, 3)
+
+    def test_metrics(self):
+        """
+        Test that every attempt, each failed attempt by type and the tokens used are counted.
+        """
+
+        requests, rate_limits = API_REQUESTS.value(), API_ERRORS.value(type="RateLimitError")
+        prompt_tokens = TOKENS.value(kind="prompt")
+        with FakeOpenAIServer([(429, 0, {})]) as server:
+            make_client(server).complete(MESSAGES, "test", timeout=5)
+
+        self.assertEqual(API_REQUESTS.value() - requests, 2)
+        self.assertEqual(API_ERRORS.value(type="RateLimitError") - rate_limits, 1)
+        self.assertEqual(TOKENS.value(kind="prompt") - prompt_tokens, 12)
+
+    def test_honours_retry_after(self):
+        """
+        Test that the client waits at least as long as a Retry-After header asks.
+        """
+
+        with FakeOpenAIServer([(429, 0, {"Retry-After": "2"})]) as server:
+            with patch('aisummary.client.time.sleep') as mock_sleep:
+                make_client(server).complete(MESSAGES, "test", timeout=5)
+
+        mock_sleep.assert_any_call(2.0)
+
+    def test_gives_up_after_max_attempts(self):
+        """
+        Test that a request that keeps failing raises SummaryUnavailable after max_attempts tries.
+        """
+
+        with FakeOpenAIServer([(500, 0, {})] * 5) as server:
+            with self.assertRaises(SummaryUnavailable):
+                make_client(server, max_attempts=3).complete(MESSAGES, "test", timeout=5)
+
+        self.assertEqual(server.requests, 3)
+
+    def test_retries_timeouts(self):
+        """
+        Test that a reply slower than the timeout is retried.
+        """
+
+        with FakeOpenAIServer([(200, 1, {})]) as server:
+            response = make_client(server).complete(MESSAGES, "test", timeout=0.2)
+
+        self.assertEqual(response.choices[0].message.content, "Summary")
+        self.assertEqual(server.requests, 2)
+
+    def test_does_not_retry_client_errors(self):
+        """
+        Test that a 400 reply is raised straight away and does not count against the circuit breaker.
+        """
+
+        with FakeOpenAIServer([(400, 0, {})]) as server:
+            client = make_client(server, failure_threshold=1)
+            with self.assertRaises(openai.BadRequestError):
+                client.complete(MESSAGES, "test", timeout=5)
+
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_open_circuit_stops_calls(self):
+        """
+        Test that once the circuit opens, requests fail without reaching the server.
+        """
+
+        with FakeOpenAIServer([(500, 0, {})] * 2) as server:
+            client = make_client(server, max_attempts=1, failure_threshold=2)
+            for _ in range(2):
+                with self.assertRaises(SummaryUnavailable):
+                    client.complete(MESSAGES, "test", timeout=5)
+
+            with self.assertRaises(SummaryUnavailable) as raised:
+                client.complete(MESSAGES, "test", timeout=5)
+
+        self.assertEqual(server.requests, 2)
+        self.assertGreater(raised.exception.retry_after, 0)
+
+    async def test_async_retries(self):
+        """
+        Test that acomplete retries failed requests like complete.
+        """
+
+        with FakeOpenAIServer([(502, 0, {})]) as server:
+            response = await make_client(server).acomplete(MESSAGES, "test", timeout=5)
+
+        self.assertEqual(response.choices[0].message.content, "Summary")
+        self.assertEqual(server.requests, 2)
+
+
+    async def test_cancelled_trial_is_released(self):
+        """
+        Test that cancelling the half-open trial call lets another trial call through.
+        """
+
+        clock = FakeClock()
+        with FakeOpenAIServer([(200, 2, {})]) as server:
+            client = make_client(server)
+            client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+            client.breaker.record_failure()
+            clock.now = 30
+
+            task = asyncio.create_task(client.acomplete(MESSAGES, "test", timeout=5))
+            while not server.requests:
+                await asyncio.sleep(0.01)
+            self.assertFalse(client.breaker.allow())
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertEqual(client.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(client.breaker.allow())
+
+class SummaryThroughClientTests(TestCase):
+    """
+    Tests that summaries are generated through the shared client.
+    """
+
+    def setUp(self):
+        summary_cache.clear()
+        reset_client()
+        self.addCleanup(reset_client)
+
+    def test_summary_after_transient_errors(self):
+        """
+        Test that a summary is saved when the API recovers within the retries.
+        """
+
+        issue = Issue.objects.create(description="The bins on Mill Road were not collected.", ai_summary="")
+        with FakeOpenAIServer([(429, 0, {}), (500, 0, {})], content="Missed bins on Mill Road") as server:
+            with override_settings(OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="test"), \
+                    patch('aisummary.client.time.sleep'):
+                self.assertEqual(generate_ai_summary_sync(issue.id), "Missed bins on Mill Road")
+
+    def test_unavailable_api_is_raised(self):
+        """
+        Test that an unavailable API is raised rather than swallowed, so the job can be requeued.
+        """
+
+        issue = Issue.objects.create(description="The streetlight on Mill Road is out.", ai_summary="")
+        with FakeOpenAIServer([(503, 0, {})] * 10) as server:
+            with override_settings(OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY="test"), \
+                    patch('aisummary.client.time.sleep'):
+                with self.assertRaises(SummaryUnavailable):
+                    generate_ai_summary_sync(issue.id)
+
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "")
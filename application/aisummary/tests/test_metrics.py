@@ -0,0 +1,162 @@
+import threading
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from council.duplicates import reset_duplicate_index
+from council.models import Issue
+from aisummary.metrics import SUMMARIES, SUMMARY_SECONDS, Counter, Gauge, Histogram, Registry
+from aisummary.queue import enqueue_summary
+from aisummary.utils import generate_ai_summary_sync, summary_cache
+
+User = get_user_model()
+
+
+class MetricTests(SimpleTestCase):
+    """
+    Tests for the metric types and the Prometheus text format.
+    """
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_summed_over_threads(self):
+        """
+        Test that counts made by several threads, including threads that have finished, are added up.
+        """
+
+        counter = Counter("test_total", "A test counter.", ["kind"], registry=self.registry)
+
+        def count():
+            for _ in range(1000):
+                counter.inc(kind="a")
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(5, kind="b")
+
+        self.assertEqual(counter.value(kind="a"), 4000)
+        # Reading again after the finished threads' shards were folded together gives the same totals.
+        self.assertEqual(counter.value(kind="a"), 4000)
+        self.assertEqual(counter.value(kind="b"), 5)
+
+    def test_wrong_labels(self):
+        """
+        Test that an update with the wrong labels is refused.
+        """
+
+        counter = Counter("test_total", "A test counter.", ["kind"], registry=self.registry)
+        with self.assertRaises(ValueError):
+            counter.inc(type="a")
+
+    def test_duplicate_name(self):
+        """
+        Test that two metrics cannot share a name.
+        """
+
+        Counter("test_total", "A test counter.", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("test_total", "Another test counter.", registry=self.registry)
+
+    def test_render(self):
+        """
+        Test that counters, histograms and gauges are rendered in the Prometheus text format, with
+        cumulative histogram buckets and escaped label values.
+        """
+
+        counter = Counter("test_errors_total", "Errors.", ["type"], registry=self.registry)
+        histogram = Histogram("test_seconds", "Durations.", buckets=(0.1, 1), registry=self.registry)
+        Gauge("test_depth", "Depth.", lambda: 3, registry=self.registry)
+
+        counter.inc(type='Bad "quote"')
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        self.assertEqual(self.registry.render(), "\n".join([
+            "# HELP test_errors_total Errors.",
+            "# TYPE test_errors_total counter",
+            'test_errors_total{type="Bad \\"quote\\""} 1.0',
+            "# HELP test_seconds Durations.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{le="0.1"} 2.0',
+            'test_seconds_bucket{le="1.0"} 3.0',
+            'test_seconds_bucket{le="+Inf"} 4.0',
+            "test_seconds_sum 2.65",
+            "test_seconds_count 4.0",
+            "# HELP test_depth Depth.",
+            "# TYPE test_depth gauge",
+            "test_depth 3.0",
+        ]) + "\n")
+
+
+class SummaryMetricsTests(TestCase):
+    """
+    Tests for the metrics recorded by the summary pipeline.
+    """
+
+    def setUp(self):
+        summary_cache.clear()
+        reset_duplicate_index()
+
+    @patch('aisummary.utils.request_summary', return_value="Streetlight out on Mill Road")
+    def test_summary_counted(self, mock_request):
+        """
+        Test that a generated summary is timed and counted, and a reused one only counted.
+        """
+
+        generated, reused = SUMMARIES.value(outcome="generated"), SUMMARIES.value(outcome="reused")
+        timed = SUMMARY_SECONDS.count(backend="openai")
+        description = "The streetlight on Mill Road is out."
+        for _ in range(2):
+            issue = Issue.objects.create(description=description, ai_summary="")
+            generate_ai_summary_sync(issue.id)
+
+        self.assertEqual(SUMMARIES.value(outcome="generated") - generated, 1)
+        self.assertEqual(SUMMARIES.value(outcome="reused") - reused, 1)
+        self.assertEqual(SUMMARY_SECONDS.count(backend="openai") - timed, 1)
+        mock_request.assert_called_once()
+
+
+class MetricsViewTests(TestCase):
+    """
+    Tests for the /metrics endpoint.
+    """
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username="manager", password="password", is_staff=True)
+        self.user = User.objects.create_user(username="resident", password="password")
+        issue = Issue.objects.create(title="Pothole", description="Deep.", category="POTHOLE", email="a@example.com")
+        enqueue_summary(issue.id)
+        # Issues with no description are never summarised, so are not waiting for a summary.
+        Issue.objects.create(title="Graffiti", description="", category="GRAFFITI", email="a@example.com")
+
+    def test_staff_only(self):
+        """
+        Test that only staff can read the metrics without a token.
+        """
+
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("aisummary_queue_depth 1.0\n", response.content.decode())
+        self.assertIn("aisummary_issues_waiting 1.0\n", response.content.decode())
+
+    @override_settings(METRICS_TOKEN="scraper-token")
+    def test_token(self):
+        """
+        Test that a scraper can read the metrics with the right bearer token, and not with a wrong one.
+        """
+
+        response = self.client.get(reverse('metrics'), headers={"Authorization": "Bearer scraper-token"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+        response = self.client.get(reverse('metrics'), headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from unittest.mock import call, patch
+from council.models import Issue
+from aisummary.client import SummaryUnavailable
+from aisummary.models import SummaryJob
+from aisummary.queue import (
+    SummaryWorkerPool, claim_jobs, enqueue_summary, queue_depth, recover_stale_jobs, run_jobs,
+    batch_ready
+)
+
+
+class SummaryQueueTests(TestCase):
+    """
+    Tests for the summary job queue.
+    """
+
+    def setUp(self):
+        # Create a few issues with queued summary jobs.
+
+        self.issues = [
+            Issue.objects.create(title=f"Issue {i}", description=f"Description {i}", ai_summary="")
+            for i in range(3)
+        ]
+        for issue in self.issues:
+            enqueue_summary(issue.id)
+
+    def test_queue_depth(self):
+        """
+        Test that queue_depth counts the pending jobs only.
+        """
+
+        self.assertEqual(queue_depth(), 3)
+        claim_jobs(1)
+        self.assertEqual(queue_depth(), 2)
+
+    def test_claim_jobs_respects_limit(self):
+        """
+        Test that claim_jobs claims the oldest jobs first and never more than the limit.
+        """
+
+        claimed = claim_jobs(2)
+        self.assertEqual([job.issue_id for job in claimed], [self.issues[0].id, self.issues[1].id])
+        self.assertTrue(all(job.status == 'RUNNING' for job in claimed))
+
+    def test_claimed_job_is_not_claimed_again(self):
+        """
+        Test that a job claimed by one worker is not handed to another.
+        """
+
+        first = claim_jobs(3)
+        second = claim_jobs(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(second, [])
+
+    def test_recover_stale_jobs(self):
+        """
+        Test that jobs left running by a dead worker go back on the queue after the lease expires.
+        """
+
+        claim_jobs(3)
+        SummaryJob.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(recover_stale_jobs(lease_seconds=60), 3)
+        self.assertEqual(queue_depth(), 3)
+
+    @patch('aisummary.utils.generate_ai_summaries_batch')
+    def test_run_jobs_marks_done(self, mock_batch):
+        """
+        Test that a batch of jobs is summarised together and marked as done.
+        """
+
+        jobs = claim_jobs(2)
+        run_jobs(jobs)
+
+        mock_batch.assert_called_once_with([self.issues[0].id, self.issues[1].id])
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'DONE')
+            self.assertEqual(job.attempts, 1)
+
+    @patch('aisummary.utils.generate_ai_summaries_batch')
+    def test_run_jobs_forced(self, mock_batch):
+        """
+        Test that forced jobs are summarised without reusing earlier summaries.
+        """
+
+        SummaryJob.objects.filter(issue=self.issues[1]).update(force=True)
+        run_jobs(claim_jobs(2))
+
+        mock_batch.assert_has_calls([call([self.issues[0].id]), call([self.issues[1].id], reuse=False)])
+
+    @patch('aisummary.utils.generate_ai_summaries_batch', side_effect=RuntimeError("boom"))
+    def test_run_jobs_marks_failed(self, mock_batch):
+        """
+        Test that jobs are marked as failed if generating the summaries raises.
+        """
+
+        job = claim_jobs(1)[0]
+        run_jobs([job])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'FAILED')
+
+    @override_settings(AI_SUMMARY_REQUEUE_DELAY=60, AI_SUMMARY_MAX_JOB_ATTEMPTS=2)
+    @patch('aisummary.utils.generate_ai_summaries_batch', side_effect=SummaryUnavailable("down", retry_after=120))
+    def test_run_jobs_requeues_when_unavailable(self, mock_batch):
+        """
+        Test that jobs are put back on the queue, not claimable until the delay has passed, when
+        the API is unavailable, and are marked as failed once they run out of attempts.
+        """
+
+        job = claim_jobs(1)[0]
+        run_jobs([job])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'PENDING')
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=90))
+        self.assertNotIn(job.pk, [claimed.pk for claimed in claim_jobs(3)])
+
+        SummaryJob.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([claimed.pk for claimed in claim_jobs(1)], [job.pk])
+        run_jobs([job])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+
+    def test_batch_ready_when_full(self):
+        """
+        Test that a batch is ready as soon as enough jobs are waiting to fill it.
+        """
+
+        self.assertTrue(batch_ready(batch_size=3, flush_interval=60))
+        self.assertFalse(batch_ready(batch_size=4, flush_interval=60))
+
+    def test_batch_ready_after_flush_interval(self):
+        """
+        Test that a partial batch is ready once the oldest job has waited for the flush interval.
+        """
+
+        SummaryJob.objects.update(created_at=timezone.now() - timedelta(seconds=120))
+        self.assertTrue(batch_ready(batch_size=10, flush_interval=60))
+
+
+class SummaryWorkerPoolTests(TestCase):
+    """
+    Tests for the SummaryWorkerPool.
+    """
+
+    @patch('aisummary.queue.run_jobs')
+    def test_pool_drains_queue_in_batches(self, mock_run_jobs):
+        """
+        Test that running the pool once processes every queued job, in batches of at most batch_size.
+        """
+
+        for i in range(5):
+            issue = Issue.objects.create(title=f"Issue {i}", description="Description", ai_summary="")
+            enqueue_summary(issue.id)
+
+        pool = SummaryWorkerPool(concurrency=2, poll_interval=0.01, batch_size=2)
+        processed = pool.run(once=True)
+
+        self.assertEqual(processed, 5)
+        batch_sizes = sorted(len(call.args[0]) for call in mock_run_jobs.call_args_list)
+        self.assertEqual(batch_sizes, [1, 2, 2])
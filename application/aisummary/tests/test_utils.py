@@ -1,8 +1,19 @@
+import asyncio
+import threading
 import time
-from django.test import TestCase
-from unittest.mock import patch, MagicMock
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from unittest.mock import patch, AsyncMock, MagicMock
+from council.duplicates import reset_duplicate_index
 from council.models import Issue
-from aisummary.utils import generate_ai_summary_sync, generate_ai_summary_async
+from aisummary.models import SummaryJob
+from aisummary.queue import arun_summary_job, claim_jobs
+from aisummary.utils import (
+    generate_ai_summary_sync, generate_ai_summary_async, generate_ai_summaries_batch, parse_batch_response,
+    summary_cache, agenerate_ai_summary, agenerate_ai_summary_async
+)
 
 
 class GenerateAISummarySyncTests(TestCase):
@@ -10,7 +21,13 @@ class GenerateAISummarySyncTests(TestCase):
     Tests for the generate_ai_summary_sync function.
     """
 
-    @patch('aisummary.utils.openai.ChatCompletion.create') # Mock the OpenAI API call.
+    def setUp(self):
+        # Start each test with an empty in-memory summary cache and duplicate index.
+
+        summary_cache.clear()
+        reset_duplicate_index()
+
+    @patch('aisummary.utils.request_summary') # Mock the OpenAI API call.
     def test_empty_description(self, mock_create):
         """
         For an issue with a whitespace-only description, the function should not call
@@ -34,17 +51,350 @@ class GenerateAISummarySyncTests(TestCase):
         issue.refresh_from_db()
         self.assertEqual(issue.ai_summary, "")
 
+    @patch('aisummary.utils.request_summary', return_value="Streetlight out on Mill Road")
+    def test_summary_saved(self, mock_request):
+        """
+        Test that a generated summary is saved to the issue.
+        """
+
+        issue = Issue.objects.create(description="The streetlight on Mill Road is out.", ai_summary="")
+
+        self.assertEqual(generate_ai_summary_sync(issue.id), "Streetlight out on Mill Road")
+        mock_request.assert_called_once_with("The streetlight on Mill Road is out.")
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "Streetlight out on Mill Road")
+
+    @patch('aisummary.utils.request_summary')
+    def test_cached_summary_used(self, mock_request):
+        """
+        Test that a near-identical description is summarised from the cache without an API call.
+        """
+
+        summary_cache.set("Streetlight out on Mill Road.", "Streetlight out on Mill Road")
+        issue = Issue.objects.create(description="  streetlight OUT on mill road!  ", ai_summary="")
+
+        self.assertEqual(generate_ai_summary_sync(issue.id), "Streetlight out on Mill Road")
+        mock_request.assert_not_called()
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "Streetlight out on Mill Road")
+
+    @patch('aisummary.utils.request_summary')
+    def test_near_duplicate_summary_used(self, mock_request):
+        """
+        Test that an issue reuses the summary of a near-identical issue without an API call.
+        """
+
+        Issue.objects.create(
+            title="Pothole",
+            description="There is a large pothole on Mill Road outside the primary school gates",
+            ai_summary="Large pothole on Mill Road by the school",
+        )
+        issue = Issue.objects.create(
+            title="Pothole",
+            description="There is a large pothole on Mill Road outside the primary school gates.",
+            ai_summary="",
+        )
+
+        self.assertEqual(generate_ai_summary_sync(issue.id), "Large pothole on Mill Road by the school")
+        mock_request.assert_not_called()
+
+    @patch('aisummary.utils.request_summary', return_value="Streetlight on Mill Road not working")
+    def test_forced_summary_replaces_cached_summary(self, mock_request):
+        """
+        Test that a summary generated without reuse calls the API and replaces the cached summary.
+        """
+
+        summary_cache.set("Streetlight out on Mill Road.", "Streetlight out on Mill Road")
+        issue = Issue.objects.create(description="Streetlight out on Mill Road.", ai_summary="")
+
+        self.assertEqual(generate_ai_summary_sync(issue.id, reuse=False), "Streetlight on Mill Road not working")
+        mock_request.assert_called_once_with("Streetlight out on Mill Road.")
+        self.assertEqual(summary_cache.get("Streetlight out on Mill Road."), "Streetlight on Mill Road not working")
+
+    def test_stale_summary_discarded(self):
+        """
+        Test that a summary generated from an outdated description is not saved.
+        """
+
+        issue = Issue.objects.create(description="Original description", ai_summary="")
+
+        def edit_during_request(description_text):
+            # Simulate a staff edit landing while the API call is in flight.
+            Issue.objects.filter(pk=issue.pk).update(description="Edited description")
+            return "Summary of the original description"
+
+        with patch('aisummary.utils.request_summary', side_effect=edit_during_request):
+            self.assertIsNone(generate_ai_summary_sync(issue.id))
+
+        issue.refresh_from_db()
+        self.assertEqual(issue.ai_summary, "")
+
+
+class GenerateAISummaryConcurrencyTests(TransactionTestCase):
+    """
+    Tests that generating a summary does not block other writes while the API call is in progress.
+    """
+
+    def setUp(self):
+        # Start each test with an empty in-memory summary cache and duplicate index.
+
+        summary_cache.clear()
+        reset_duplicate_index()
+
+    def test_writes_proceed_during_slow_summary(self):
+        """
+        While a slow summary request is in flight, updating the issue and creating new issues
+        must not wait for it, and the summary of the outdated description must be discarded.
+        """
+
+        issue = Issue.objects.create(title="Slow", description="Original description", ai_summary="")
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_request(description_text):
+            started.set()
+            release.wait(timeout=10)
+            return "Summary of the original description"
+
+        def run_summary():
+            try:
+                generate_ai_summary_sync(issue.id)
+            finally:
+                connections.close_all()
+
+        with patch('aisummary.utils.request_summary', side_effect=slow_request):
+            worker = threading.Thread(target=run_summary)
+            worker.start()
+            self.assertTrue(started.wait(timeout=5))
+
+            try:
+                start = time.monotonic()
+                response = self.client.post(reverse('update-issue', kwargs={'pk': issue.pk}), data={
+                    "title": "Slow",
+                    "ai_summary": "Written by staff",
+                    "description": "Edited description",
+                    "category": "OTHER",
+                    "email": "slow@example.com",
+                    "status": "OPEN",
+                })
+                self.assertEqual(response.status_code, 302)
+                response = self.client.post(reverse('create-issue'), data={
+                    "title": "Another issue",
+                    "description": "Created during a slow summary.",
+                    "category": "POTHOLE",
+                    "email": "another@example.com",
+                })
+                self.assertEqual(response.status_code, 302)
+                elapsed = time.monotonic() - start
+            finally:
+                release.set()
+                worker.join(timeout=10)
+
+        # Both writes finished while the summary request was still blocked.
+        self.assertLess(elapsed, 2)
+        self.assertTrue(Issue.objects.filter(title="Another issue").exists())
+
+        issue.refresh_from_db()
+        self.assertEqual(issue.description, "Edited description")
+        self.assertEqual(issue.ai_summary, "Written by staff")
+
+
+class GenerateAISummariesBatchTests(TestCase):
+    """
+    Tests for batched summary generation.
+    """
+
+    def setUp(self):
+        # Create issues waiting for a summary, with an empty in-memory summary cache and duplicate index.
+
+        summary_cache.clear()
+        reset_duplicate_index()
+        self.issues = [
+            Issue.objects.create(title=f"Issue {i}", description=f"Description {i}", ai_summary="")
+            for i in range(3)
+        ]
+        self.issue_ids = [issue.id for issue in self.issues]
+
+    @patch('aisummary.utils.request_completion', return_value='{"1": "Two", "2": "Three"}')
+    def test_batch_skips_cached_descriptions(self, mock_completion):
+        """
+        Test that issues with a cached summary are filled in without being sent.
+        """
+
+        summary_cache.set("Description 0", "Cached")
+
+        saved = generate_ai_summaries_batch(self.issue_ids)
+
+        self.assertEqual(saved[self.issue_ids[0]], "Cached")
+        self.assertNotIn("Description 0", mock_completion.call_args.args[0])
+
+    def test_parse_batch_response(self):
+        """
+        Test that a JSON reply is parsed into summaries in issue order, including a fenced reply.
+        """
+
+        self.assertEqual(parse_batch_response('{"2": "Second", "1": "First"}', 2), ["First", "Second"])
+        self.assertEqual(parse_batch_response('```json\n{"1": "First"}\n```', 1), ["First"])
+
+    def test_parse_batch_response_malformed(self):
+        """
+        Test that invalid JSON, a non-object reply or a missing summary raises ValueError.
+        """
+
+        for content in ['not json', '["First", "Second"]', '{"1": "First"}', '{"1": "First", "2": ""}']:
+            with self.assertRaises(ValueError):
+                parse_batch_response(content, 2)
+
+    @patch('aisummary.utils.request_summary')
+    @patch('aisummary.utils.request_completion', return_value='{"1": "One", "2": "Two", "3": "Three"}')
+    def test_batch_uses_single_request(self, mock_completion, mock_single):
+        """
+        Test that a batch of issues is summarised with one request.
+        """
+
+        saved = generate_ai_summaries_batch(self.issue_ids)
+
+        mock_completion.assert_called_once()
+        mock_single.assert_not_called()
+        self.assertEqual(saved, dict(zip(self.issue_ids, ["One", "Two", "Three"])))
+        self.assertEqual(
+            list(Issue.objects.order_by('id').values_list('ai_summary', flat=True)), ["One", "Two", "Three"]
+        )
+
+    @patch('aisummary.utils.request_summary', side_effect=lambda text: f"Summary of {text}")
+    @patch('aisummary.utils.request_completion', return_value='{"1": "One"}')
+    def test_malformed_batch_falls_back(self, mock_completion, mock_single):
+        """
+        Test that an incomplete batched reply falls back to one request per issue.
+        """
+
+        saved = generate_ai_summaries_batch(self.issue_ids)
+
+        self.assertEqual(mock_single.call_count, 3)
+        self.assertEqual(saved[self.issue_ids[0]], "Summary of Description 0")
+
+    @patch('aisummary.utils.request_completion', return_value='{"1": "One", "2": "Two"}')
+    def test_batch_size_limit(self, mock_completion):
+        """
+        Test that issues are split into requests of at most AI_SUMMARY_BATCH_SIZE.
+        """
+
+        with self.settings(AI_SUMMARY_BATCH_SIZE=2), \
+                patch('aisummary.utils.request_summary', return_value="Single") as mock_single:
+            generate_ai_summaries_batch(self.issue_ids)
+
+        mock_completion.assert_called_once()
+        mock_single.assert_called_once()
+
 
 class GenerateAISummaryAsyncTests(TestCase):
-    @patch('aisummary.utils.generate_ai_summary_sync') # Mock the synchronous function.
-    def test_async_calls_sync(self, mock_sync):
+    def test_async_queues_job(self):
+        """
+        Test that generate_ai_summary_async queues a summary job for the issue instead of
+        starting a thread.
+        """
+
+        issue = Issue.objects.create(description="Async test description", ai_summary="")
+        generate_ai_summary_async(issue.id)
+
+        self.assertEqual(SummaryJob.objects.filter(issue=issue, status='PENDING').count(), 1)
+
+    def test_async_does_not_queue_duplicates(self):
         """
-        Test that generate_ai_summary_async eventually calls generate_ai_summary_sync with the correct issue ID.
+        Test that queueing the same issue twice only creates one pending job.
         """
 
         issue = Issue.objects.create(description="Async test description", ai_summary="")
         generate_ai_summary_async(issue.id)
+        generate_ai_summary_async(issue.id)
+
+        self.assertEqual(SummaryJob.objects.filter(issue=issue).count(), 1)
+
+
+class AGenerateAISummaryTests(TestCase):
+    """
+    Tests for the async summary path.
+    """
+
+    def setUp(self):
+        # Start each test with an empty in-memory summary cache and duplicate index.
+
+        summary_cache.clear()
+        reset_duplicate_index()
+
+    @patch('aisummary.utils.request_completion_async', new_callable=AsyncMock, return_value="Streetlight out")
+    async def test_summary_saved(self, mock_request):
+        """
+        Test that the async function saves the summary and caches it.
+        """
+
+        issue = await Issue.objects.acreate(description="The streetlight is out.", ai_summary="")
+
+        self.assertEqual(await agenerate_ai_summary(issue.id), "Streetlight out")
+        mock_request.assert_awaited_once()
+        await issue.arefresh_from_db()
+        self.assertEqual(issue.ai_summary, "Streetlight out")
+        self.assertEqual(await summary_cache.aget("The streetlight is out."), "Streetlight out")
+
+    @patch('aisummary.utils.request_completion_async', new_callable=AsyncMock)
+    async def test_cached_summary_used(self, mock_request):
+        """
+        Test that a cached summary is reused without calling the API.
+        """
+
+        await summary_cache.aset("Bins not collected.", "Missed bin collection")
+        issue = await Issue.objects.acreate(description="Bins not collected!", ai_summary="")
+
+        self.assertEqual(await agenerate_ai_summary(issue.id), "Missed bin collection")
+        mock_request.assert_not_awaited()
+
+    async def test_stale_summary_discarded(self):
+        """
+        Test that a summary of a description edited during the request is not saved.
+        """
+
+        issue = await Issue.objects.acreate(description="Original description", ai_summary="")
+
+        async def edit_during_request(prompt, timeout=10):
+            await Issue.objects.filter(pk=issue.pk).aupdate(description="Edited description")
+            return "Summary of the original description"
+
+        with patch('aisummary.utils.request_completion_async', side_effect=edit_during_request):
+            self.assertIsNone(await agenerate_ai_summary(issue.id))
+
+        await issue.arefresh_from_db()
+        self.assertEqual(issue.ai_summary, "")
+
+    @patch('aisummary.utils.request_completion_async', new_callable=AsyncMock, return_value="Graffiti on the bridge")
+    async def test_run_in_loop(self, mock_request):
+        """
+        Test that run_in_loop queues the job and runs it on the event loop.
+        """
+
+        issue = await Issue.objects.acreate(description="Graffiti on the bridge.", ai_summary="")
+        await agenerate_ai_summary_async(issue.id, run_in_loop=True)
+        job = await SummaryJob.objects.aget(issue=issue)
+
+        # Wait for the background task to finish.
+        while job.status in ('PENDING', 'RUNNING'):
+            await asyncio.sleep(0.01)
+            await job.arefresh_from_db()
+
+        self.assertEqual((job.status, job.attempts), ('DONE', 1))
+        await issue.arefresh_from_db()
+        self.assertEqual(issue.ai_summary, "Graffiti on the bridge")
+
+    @patch('aisummary.utils.request_completion_async', new_callable=AsyncMock)
+    async def test_claimed_job_not_run_twice(self, mock_request):
+        """
+        Test that a job already claimed by a worker is not run on the event loop as well.
+        """
+
+        issue = await Issue.objects.acreate(description="Blocked drain.", ai_summary="")
+        await agenerate_ai_summary_async(issue.id)
+        job = await SummaryJob.objects.aget(issue=issue)
+        claimed = await sync_to_async(claim_jobs)(1)
 
-        # Allow a short delay for the background thread to run.
-        time.sleep(0.1)
-        mock_sync.assert_called_once_with(issue.id) # Verify that the synchronous function was called.
+        self.assertEqual([claimed_job.pk for claimed_job in claimed], [job.pk])
+        self.assertFalse(await arun_summary_job(job.pk))
+        mock_request.assert_not_awaited()
@@ -1,71 +1,515 @@
-import threading
-import openai
-from django.db import transaction
+import json
+import logging
+import time
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from council.duplicates import find_duplicates
+from council.events import publish_summary
 from council.models import Issue
+from .backends import get_backend
+from .cache import SummaryCache
+from .client import SummaryUnavailable, get_client
+from .metrics import SUMMARIES, SUMMARY_SECONDS
+from .queue import aenqueue_summary, enqueue_summary, start_summary_task
+
+logger = logging.getLogger(__name__)
+
+# The model used for summaries.
+MODEL = "gpt-3.5-turbo"
+
+# Bump this whenever the prompts change, so that cached summaries from the old prompts are not reused.
+PROMPT_VERSION = 1
+
+# Summaries of previously seen descriptions, shared by every summary path. Only summaries from
+# backends that are worth caching (see SummaryBackend.cacheable) are added.
+summary_cache = SummaryCache(
+    version=f"{MODEL}:{PROMPT_VERSION}",
+    max_entries=getattr(settings, 'AI_SUMMARY_CACHE_SIZE', 1024),
+)
+
+
+def build_prompt(description_text):
+    """
+    Build the prompt used to summarise an issue description.
+    :param description_text: The trimmed issue description.
+    :return: The prompt.
+    """
+
+    return (
+        "Please provide a concise summary of around 10 words for the following issue description:\n\n"
+        f"{description_text}\n\nSummary:"
+    )
+
+
+def build_batch_prompt(description_texts):
+    """
+    Build a single prompt that asks for a summary of each of several issue descriptions.
+    The descriptions are numbered from 1 and the model is asked to answer with a JSON object
+    mapping each number to its summary.
+    :param description_texts: The trimmed issue descriptions.
+    :return: The prompt.
+    """
+
+    numbered = "\n\n".join(
+        f"Issue {number}:\n{text}" for number, text in enumerate(description_texts, start=1)
+    )
+    return (
+        "Please provide a concise summary of around 10 words for each of the following numbered issue descriptions. "
+        "Reply with only a JSON object that maps each issue number to its summary, "
+        'for example {"1": "First summary", "2": "Second summary"}.\n\n'
+        f"{numbered}"
+    )
+
+
+def build_messages(prompt):
+    """
+    Build the chat messages for a prompt.
+    :param prompt: The user prompt.
+    :return: The list of messages.
+    """
+
+    return [
+        {"role": "system", "content": "You are a helpful assistant that summarises text."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def request_completion(prompt, timeout=10):
+    """
+    Sends a prompt to the OpenAI API through the shared client, which limits the request rate,
+    retries failed requests and stops calling the API while it is down (see aisummary.client).
+    No database locks or transactions may be held while this runs, as the call can take seconds.
+    :param prompt: The user prompt.
+    :param timeout: The request timeout in seconds.
+    :return: The text of the reply.
+    :raises SummaryUnavailable: If the API is unavailable.
+    """
+
+    response = get_client().complete(build_messages(prompt), MODEL, timeout)
+    return response.choices[0].message.content.strip()
+
+
+async def request_completion_async(prompt, timeout=10):
+    """
+    Async version of request_completion, using openai.AsyncOpenAI so that the event loop is free to
+    run other requests while it waits for the reply.
+    :param prompt: The user prompt.
+    :param timeout: The request timeout in seconds.
+    :return: The text of the reply.
+    :raises SummaryUnavailable: If the API is unavailable.
+    """
+
+    response = await get_client().acomplete(build_messages(prompt), MODEL, timeout)
+    return response.choices[0].message.content.strip()
+
+
+def request_summary(description_text):
+    """
+    Asks the OpenAI API for a summary of the given description.
+    :param description_text: The trimmed issue description.
+    :return: The summary text.
+    """
+
+    return request_completion(build_prompt(description_text))
+
+
+def request_batch_summaries(description_texts):
+    """
+    Asks the OpenAI API for summaries of several descriptions in a single request.
+    :param description_texts: The trimmed issue descriptions.
+    :return: A list of summaries in the same order as the descriptions.
+    :raises ValueError: If the reply is not a JSON object with a summary for every description.
+    """
+
+    # Allow a little longer than a single summary, as the reply is longer.
+    content = request_completion(build_batch_prompt(description_texts), timeout=30)
+    return parse_batch_response(content, len(description_texts))
+
+
+def parse_batch_response(content, expected_count):
+    """
+    Parses the reply to a batch prompt.
+    :param content: The text of the reply.
+    :param expected_count: The number of descriptions that were sent.
+    :return: A list of summaries, one per description, in order.
+    :raises ValueError: If the reply is malformed or incomplete.
+    """
+
+    # Models sometimes wrap JSON in a markdown code fence.
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`")
+        if content.startswith("json"):
+            content = content[len("json"):]
+
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Batch reply is not valid JSON: {e}")
+
+    if not isinstance(data, dict):
+        raise ValueError("Batch reply is not a JSON object.")
+
+    summaries = []
+    for number in range(1, expected_count + 1):
+        summary = data.get(str(number))
+        if not isinstance(summary, str) or not summary.strip():
+            raise ValueError(f"Batch reply has no summary for issue {number}.")
+        summaries.append(summary.strip())
+    return summaries
+
+
+def store_summary(issue, summary):
+    """
+    Saves a summary with a compare-and-set on the issue as it was read before the summary was requested.
+    If the issue was edited in the meantime (its description or updated_at changed) or a summary has
+    been written by someone else, the summary is stale and is thrown away. A draft summary read with
+    the issue is replaced, and the issue is no longer marked as showing a draft. Open pages are told
+    about a saved summary once it is committed (see council.events).
+    :param issue: The Issue instance the summary was generated from.
+    :param summary: The generated summary.
+    :return: True if the summary was saved, False if it was stale.
+    """
+
+    updated = Issue.objects.filter(
+        pk=issue.pk,
+        description=issue.description,
+        updated_at=issue.updated_at,
+        ai_summary=issue.ai_summary,
+    ).update(ai_summary=summary, ai_summary_is_draft=False, updated_at=timezone.now())
+    if updated:
+        transaction.on_commit(lambda: publish_summary(issue.pk, summary))
+    return updated == 1
+
+
+async def astore_summary(issue, summary):
+    """
+    Async version of store_summary, using the async ORM.
+    :param issue: The Issue instance the summary was generated from.
+    :param summary: The generated summary.
+    :return: True if the summary was saved, False if it was stale.
+    """
+
+    updated = await Issue.objects.filter(
+        pk=issue.pk,
+        description=issue.description,
+        updated_at=issue.updated_at,
+        ai_summary=issue.ai_summary,
+    ).aupdate(ai_summary=summary, ai_summary_is_draft=False, updated_at=timezone.now())
+    if updated:
+        publish_summary(issue.pk, summary)
+    return updated == 1
+
+
+def needs_summary(issue):
+    """
+    Return True if the issue has no summary, or only a draft (see SummaryBackend.draft).
+    """
+
+    return not issue.ai_summary or issue.ai_summary_is_draft
 
 
-def generate_ai_summary_sync(issue_id):
+def store_draft_summary(issue_id):
     """
-    Synchronously generates an AI summary for the given issue.
-    If the issue description is empty (after trimming), it sets ai_summary to an empty string
-    and does not call the OpenAI API.
+    Saves the backend's draft summary for a new issue, to show until the real summary arrives, and
+    marks the issue as showing a draft so that the real summary replaces it. Editing the description
+    of an issue showing a draft queues it again (see council.views.UpdateIssueView).
+    Does nothing if the backend has no drafts or the issue already has a summary.
+    :param issue_id: The ID of the issue.
+    :return: The draft, or None if none was saved.
+    """
+
+    backend = get_backend()
+    if not backend.drafts:
+        return None
+    description = Issue.objects.filter(pk=issue_id, ai_summary="").values_list("description", flat=True).first()
+    draft = backend.draft(description.strip()) if description else None
+    if not draft:
+        return None
+    Issue.objects.filter(pk=issue_id, ai_summary="").update(
+        ai_summary=draft, ai_summary_is_draft=True, updated_at=timezone.now()
+    )
+    return draft
+
+
+async def astore_draft_summary(issue_id):
+    """
+    Async version of store_draft_summary, using the async ORM.
+    :param issue_id: The ID of the issue.
+    :return: The draft, or None if none was saved.
+    """
+
+    backend = get_backend()
+    if not backend.drafts:
+        return None
+    description = await Issue.objects.filter(pk=issue_id, ai_summary="").values_list("description", flat=True).afirst()
+    draft = backend.draft(description.strip()) if description else None
+    if not draft:
+        return None
+    await Issue.objects.filter(pk=issue_id, ai_summary="").aupdate(
+        ai_summary=draft, ai_summary_is_draft=True, updated_at=timezone.now()
+    )
+    return draft
+
+
+def find_duplicate_summary(issue):
+    """
+    Look for a near-identical issue that already has a summary.
+    :param issue: The Issue instance to summarise.
+    :return: The summary of the most similar duplicate, or None if there is none.
+    """
+
+    min_similarity = getattr(settings, 'AI_SUMMARY_DUPLICATE_SIMILARITY', 0.9)
+    for duplicate in find_duplicates(issue, k=3, min_similarity=min_similarity):
+        if not needs_summary(duplicate):
+            return duplicate.ai_summary
+    return None
+
+
+def reuse_summary(issue, description_text):
+    """
+    Find a summary that can be reused for an issue without calling the API, either from the cache
+    or from a near-identical issue.
+    :param issue: The Issue instance to summarise.
+    :param description_text: The trimmed issue description.
+    :return: The summary, or None if there is nothing to reuse.
+    """
+
+    summary = summary_cache.get(description_text)
+    if summary is None:
+        summary = find_duplicate_summary(issue)
+    return summary
+
+
+def log_outcome(issue_id, outcome, backend=None):
+    """
+    Count and log what became of an issue's summary. The summary text is never logged, as it is
+    taken from what residents wrote.
+    :param issue_id: The ID of the issue.
+    :param outcome: "generated", "reused", "stale" or "empty".
+    :param backend: The backend that made the summary, if one was saved.
+    """
+
+    SUMMARIES.inc(outcome=outcome)
+    if backend:
+        logger.info("Summary for issue %s: %s by the %s backend.", issue_id, outcome, backend.name)
+    else:
+        logger.info("Summary for issue %s: %s.", issue_id, outcome)
+
+
+def generate_ai_summary_sync(issue_id, reuse=True):
+    """
+    Synchronously generates an AI summary for the given issue with the configured backend (see
+    aisummary.backends), replacing a draft summary if the issue has one.
+    The issue is read without taking a lock, the backend is called with no lock held, and the
+    result is written with a compare-and-set so that a summary of an outdated description is discarded.
+    If the issue description is empty (after trimming), ai_summary is left empty and the backend
+    is not called.
+    :param issue_id: The ID of the issue to generate a summary for.
+    :param reuse: Reuse a cached summary or a near-duplicate issue's summary if there is one. If
+        False, the backend is always called, and a cacheable summary replaces the cached one.
+    :return: The saved summary, or None if no summary was saved.
+    :raises SummaryUnavailable: If the API is unavailable, so that the job can be tried again later.
+    """
+
+    try:
+        issue = Issue.objects.get(pk=issue_id)
+        backend = get_backend()
+
+        # If a summary already exists, do not regenerate.
+        if not needs_summary(issue):
+            return None
+
+        # Trim the description.
+        description_text = issue.description.strip()
+        if description_text == "":
+            log_outcome(issue_id, "empty")
+            return None
+
+        # Reuse the summary of an identical or near-identical issue if we have one.
+        summary = reuse_summary(issue, description_text) if reuse else None
+        outcome = "reused"
+        if summary is None:
+            start = time.perf_counter()
+            summary = backend.summarise(description_text)
+            SUMMARY_SECONDS.observe(time.perf_counter() - start, backend=backend.name)
+            outcome = "generated"
+            if backend.cacheable:
+                summary_cache.set(description_text, summary)
+
+        # Save the generated summary, unless the issue changed while we were waiting.
+        if not store_summary(issue, summary):
+            log_outcome(issue_id, "stale")
+            return None
+        log_outcome(issue_id, outcome, backend)
+        return summary
+    except SummaryUnavailable:
+        raise
+    except Exception:
+        SUMMARIES.inc(outcome="failed")
+        logger.exception("Error generating an AI summary for issue %s.", issue_id)
+        return None
+
+
+async def agenerate_ai_summary(issue_id, reuse=True):
+    """
+    Async version of generate_ai_summary_sync, for use on an event loop.
+    The issue is read and the summary written with the async ORM, and the backend is called with
+    SummaryBackend.asummarise, so many OpenAI summaries can be in flight on one loop without a thread
+    each. Only the duplicate lookup, which works on the in-process index, runs in a thread.
     :param issue_id: The ID of the issue to generate a summary for.
+    :param reuse: Reuse a cached summary or a near-duplicate issue's summary if there is one.
+    :return: The saved summary, or None if no summary was saved.
+    :raises SummaryUnavailable: If the API is unavailable, so that the job can be tried again later.
     """
 
     try:
-        # Set the API key.
-        openai.api_key = settings.OPENAI_API_KEY
-
-        with transaction.atomic():
-            issue = Issue.objects.select_for_update().get(pk=issue_id) # Lock the row for update.
-
-            # If a summary already exists, do not regenerate.
-            if issue.ai_summary:
-                return
-
-            # Trim the description.
-            description_text = issue.description.strip()
-            if description_text == "":
-                # For an empty description, ensure the summary remains empty.
-                issue.ai_summary = ""
-                issue.save(update_fields=['ai_summary'])
-                print(f"Issue {issue_id} has no valid description to summarise.")
-                return
-
-            # Build the prompt.
-            prompt = (
-                "Please provide a concise summary of around 10 words for the following issue description:\n\n"
-                f"{description_text}\n\nSummary:"
-            )
-            print(f"Generating summary for issue {issue_id} with prompt:\n{prompt}")
-
-            # Call the OpenAI API.
-            response = openai.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that summarises text."},
-                    {"role": "user", "content": prompt}
-                ],
-                timeout=10
-            )
-
-            summary = response.choices[0].message.content.strip()
-            print(f"Received summary for issue {issue_id}: {summary}")
-
-            # Save the generated summary.
-            issue.ai_summary = summary
-            issue.save(update_fields=['ai_summary'])
-    except Exception as e:
-        print(f"Error generating AI summary for issue {issue_id}: {e}")
+        issue = await Issue.objects.aget(pk=issue_id)
+        backend = get_backend()
+
+        # If a summary already exists, do not regenerate.
+        if not needs_summary(issue):
+            return None
+
+        # Trim the description.
+        description_text = issue.description.strip()
+        if description_text == "":
+            log_outcome(issue_id, "empty")
+            return None
+
+        # Reuse the summary of an identical or near-identical issue if we have one.
+        summary = None
+        if reuse:
+            summary = await summary_cache.aget(description_text)
+            if summary is None:
+                summary = await sync_to_async(find_duplicate_summary)(issue)
+        outcome = "reused"
+        if summary is None:
+            start = time.perf_counter()
+            summary = await backend.asummarise(description_text)
+            SUMMARY_SECONDS.observe(time.perf_counter() - start, backend=backend.name)
+            outcome = "generated"
+            if backend.cacheable:
+                await summary_cache.aset(description_text, summary)
+
+        # Save the generated summary, unless the issue changed while we were waiting.
+        if not await astore_summary(issue, summary):
+            log_outcome(issue_id, "stale")
+            return None
+        log_outcome(issue_id, outcome, backend)
+        return summary
+    except SummaryUnavailable:
+        raise
+    except Exception:
+        SUMMARIES.inc(outcome="failed")
+        logger.exception("Error generating an AI summary for issue %s.", issue_id)
+        return None
+
+
+def get_batch_size():
+    """
+    Return the maximum number of issues summarised in a single request.
+    """
+
+    return getattr(settings, 'AI_SUMMARY_BATCH_SIZE', 10)
+
+
+def generate_ai_summaries_batch(issue_ids, reuse=True):
+    """
+    Generates AI summaries for several issues, sending up to AI_SUMMARY_BATCH_SIZE descriptions
+    to the backend at a time instead of one request per issue. Draft summaries are replaced.
+    If a batched reply is malformed, the issues in that batch are summarised one at a time instead.
+    :param issue_ids: The IDs of the issues to generate summaries for.
+    :param reuse: Reuse cached summaries and near-duplicate issues' summaries (see generate_ai_summary_sync).
+    :return: A dictionary mapping issue IDs to the summaries that were saved.
+    :raises SummaryUnavailable: If the API is unavailable. Summaries saved before then are kept.
+    """
+
+    backend = get_backend()
+    candidates = Issue.objects.filter(Q(ai_summary="") | Q(ai_summary_is_draft=True), pk__in=issue_ids).order_by("pk")
+
+    issues = []
+    saved = {}
+    for issue in candidates:
+        description_text = issue.description.strip()
+        if not description_text:
+            continue
+
+        # Issues with a reusable summary do not need to be sent at all.
+        summary = reuse_summary(issue, description_text) if reuse else None
+        if summary is None:
+            issues.append(issue)
+        elif store_summary(issue, summary):
+            saved[issue.pk] = summary
+            log_outcome(issue.pk, "reused", backend)
+        else:
+            log_outcome(issue.pk, "stale")
+
+    batch_size = get_batch_size()
+
+    for start in range(0, len(issues), batch_size):
+        batch = issues[start:start + batch_size]
+
+        # A batch of one gains nothing from the batch prompt.
+        if len(batch) == 1:
+            summary = generate_ai_summary_sync(batch[0].pk, reuse)
+            if summary:
+                saved[batch[0].pk] = summary
+            continue
+
+        try:
+            started = time.perf_counter()
+            summaries = backend.summarise_batch([issue.description.strip() for issue in batch])
+            SUMMARY_SECONDS.observe(time.perf_counter() - started, backend=backend.name)
+        except SummaryUnavailable:
+            raise
+        except ValueError as e:
+            logger.warning("Malformed batch reply, summarising %s issues one at a time: %s", len(batch), e)
+            for issue in batch:
+                summary = generate_ai_summary_sync(issue.pk, reuse)
+                if summary:
+                    saved[issue.pk] = summary
+            continue
+        except Exception:
+            SUMMARIES.inc(len(batch), outcome="failed")
+            logger.exception("Error generating AI summaries for issues %s.", [issue.pk for issue in batch])
+            continue
+
+        for issue, summary in zip(batch, summaries):
+            if backend.cacheable:
+                summary_cache.set(issue.description.strip(), summary)
+            if store_summary(issue, summary):
+                saved[issue.pk] = summary
+                log_outcome(issue.pk, "generated", backend)
+            else:
+                log_outcome(issue.pk, "stale")
+
+    return saved
 
 
 def generate_ai_summary_async(issue_id):
     """
-    Spawns a background thread to run generate_ai_summary_sync.
+    Queues the issue for summarising by the summary workers (see run_summary_workers), first saving
+    a draft summary if the backend offers one.
+    :param issue_id: The ID of the issue to generate a summary for.
+    """
+
+    store_draft_summary(issue_id)
+    enqueue_summary(issue_id)
+
+
+async def agenerate_ai_summary_async(issue_id, run_in_loop=False):
+    """
+    Async version of generate_ai_summary_async.
     :param issue_id: The ID of the issue to generate a summary for.
+    :param run_in_loop: Also start the summary on the running event loop rather than leaving it to
+        the summary workers. Only pass True where the loop outlives the request, as under ASGI.
     """
 
-    thread = threading.Thread(target=generate_ai_summary_sync, args=(issue_id,))
-    thread.daemon = True
-    thread.start()
+    await astore_draft_summary(issue_id)
+    job = await aenqueue_summary(issue_id)
+    if run_in_loop:
+        start_summary_task(job.pk)
@@ -1,3 +1,35 @@
-from django.shortcuts import render
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+from .metrics import REGISTRY
 
-# Create your views here.
+
+class MetricsView(View):
+    """
+    Serves the AI summary metrics in the Prometheus text format.
+    Staff can read them when logged in. A scraper sends the METRICS_TOKEN setting as a bearer token.
+    """
+
+    # The session and the user, when logged in, and the queue depth and waiting issue counts.
+    query_budget = 4
+
+    def get(self, request):
+        """
+        Return the metrics, or 403 if the request is not allowed to read them.
+        """
+
+        if not self.is_allowed(request):
+            return HttpResponseForbidden("Staff only, or send the metrics token.")
+        return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    def is_allowed(self, request):
+        """
+        Return True if the request carries the metrics token or comes from a staff user.
+        """
+
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        authorization = request.headers.get("Authorization", "")
+        if token and hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            return True
+        return request.user.is_staff
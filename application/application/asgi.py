@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "application.settings")
+# Requests' sync code runs on short-lived threads, so persistent connections would pile up unused.
+os.environ.setdefault("DJANGO_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
+
+# Load the duplicate index while the server starts taking requests, rather than in the first
+# request to show an issue.
+from council.duplicates import load_duplicate_index_in_background  # noqa: E402
+
+load_duplicate_index_in_background()
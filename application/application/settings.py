@@ -63,6 +63,7 @@ INSTALLED_APPS = [
     "aisummary.apps.AisummaryConfig",]
 
 MIDDLEWARE = [
+    "council.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -96,13 +97,74 @@ WSGI_APPLICATION = "application.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite is tuned on every new connection. WAL lets readers carry on while a write is in progress,
+# and with it synchronous=NORMAL is still safe against corruption, only losing the last commits if
+# the machine loses power. busy_timeout is set by "timeout" below.
+SQLITE_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    # Read the database through a memory map of up to 256 MiB rather than with read calls.
+    "PRAGMA mmap_size=268435456",
+    # Keep up to 64 MiB of pages in each connection's cache (negative sizes are in KiB).
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+]
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Keep connections open between requests, checking they still work before reuse. asgi.py
+        # turns this off, as under ASGI a request's queries may run on a new thread each time.
+        "CONN_MAX_AGE": int(os.environ.get("DJANGO_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": ";".join(SQLITE_PRAGMAS),
+            # Transactions take the write lock when they begin. A deferred transaction that reads and
+            # then writes fails with "database is locked" at once if another writer got in first,
+            # as SQLite cannot wait for that lock without deadlocking.
+            "transaction_mode": "IMMEDIATE",
+            # Seconds a connection waits for a lock before giving up (SQLite's busy_timeout).
+            "timeout": 20,
+        },
+        "TEST": {
+            # Tests use an in-memory database unless DJANGO_TEST_DB names a file. Benchmarks that
+            # write from several threads at once need a file, as in-memory SQLite cannot wait for locks.
+            "NAME": os.environ.get("DJANGO_TEST_DB"),
+        },
+    },
+}
+
+# A second, read-only connection to the same database, used for the issue list and detail pages
+# when READ_REPLICA is True (see council.routers). Reads on it never wait for a writer's transaction.
+READ_REPLICA = False
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "OPTIONS": {
+        "init_command": ";".join(SQLITE_PRAGMAS + ["PRAGMA query_only=ON"]),
+        "timeout": 20,
+    },
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_ROUTERS = ["council.routers.ReadReplicaRouter"] if READ_REPLICA else []
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+        },
     }
 }
 
+# Seconds a rendered issue card on the home page stays cached. Cards are keyed on the issue's
+# updated_at, so edits show up straight away whatever this is set to.
+ISSUE_CARD_CACHE_TIMEOUT = 3600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -149,3 +211,93 @@ LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
 
 OPENAI_API_KEY = get_secret('OPENAI_API_KEY')
+# The OpenAI API base URL, or None for the OpenAI default. Set it to use a proxy or a compatible server.
+OPENAI_BASE_URL = None
+
+# The bearer token a Prometheus scraper sends to read /metrics, if set in secrets.json. Staff can
+# always read it when logged in.
+METRICS_TOKEN = secrets.get('METRICS_TOKEN')
+
+# AI summary job queue.
+# How summaries are made: aisummary.backends.OpenAIBackend, LocalBackend (a local extractive summary,
+# with no network) or LocalFirstBackend (a local summary at once, replaced by the OpenAI one later).
+AI_SUMMARY_BACKEND = "aisummary.backends.OpenAIBackend"
+# The most words in a local extractive summary.
+AI_SUMMARY_LOCAL_MAX_WORDS = 20
+# The number of summaries the workers generate at the same time.
+AI_SUMMARY_CONCURRENCY = 4
+# Seconds between queue polls when the workers are idle.
+AI_SUMMARY_POLL_INTERVAL = 1.0
+# The maximum number of issues summarised in a single request.
+AI_SUMMARY_BATCH_SIZE = 10
+# The maximum number of seconds a job waits for its batch to fill before it is sent anyway.
+AI_SUMMARY_BATCH_INTERVAL = 2.0
+# The number of summaries held in each process's in-memory cache.
+AI_SUMMARY_CACHE_SIZE = 1024
+# The similarity (0 to 1) above which an issue reuses the summary of a near-duplicate.
+AI_SUMMARY_DUPLICATE_SIMILARITY = 0.9
+# Seconds after which a job claimed by a worker that died is put back on the queue.
+AI_SUMMARY_JOB_LEASE = 300
+# The number of summaries in flight at once on each event loop when served with ASGI.
+AI_SUMMARY_ASYNC_CONCURRENCY = 50
+
+# Resilient OpenAI client, shared by every summary path in a process.
+# The sustained number of API requests per minute, which should be within our rate limit.
+AI_SUMMARY_REQUESTS_PER_MINUTE = 60
+# The number of requests that may be sent at once after a quiet spell.
+AI_SUMMARY_BURST = 10
+# The most times a request is sent when it fails with a rate limit, server or connection error.
+AI_SUMMARY_MAX_ATTEMPTS = 4
+# The number of failed requests in a row after which calls to the API are paused.
+AI_SUMMARY_BREAKER_THRESHOLD = 5
+# Seconds calls stay paused before a single trial request is let through.
+AI_SUMMARY_BREAKER_RESET = 30.0
+# Seconds before a job that failed because the API was unavailable is tried again.
+AI_SUMMARY_REQUEUE_DELAY = 60
+# The most times a job is tried before it is marked as failed.
+AI_SUMMARY_MAX_JOB_ATTEMPTS = 5
+
+# Request profiling (see council.profiling).
+# Record the queries, database time and render time of every request.
+REQUEST_PROFILING = True
+# The number of recent request profiles each process keeps for /debug/requests/.
+REQUEST_PROFILE_BUFFER_SIZE = 200
+# The number of slowest queries kept for each request.
+REQUEST_PROFILE_SLOW_QUERIES = 5
+
+# The assignee picker (see council.assignees).
+# The most seconds a process keeps its staff directory before reloading it, to pick up changes
+# made without saving a user. Saving or deleting a user reloads it straight away.
+STAFF_DIRECTORY_TTL = 300
+
+# Archiving (see council.archive).
+# The default age, in days since they were resolved, at which archive_issues archives issues.
+ARCHIVE_AFTER_DAYS = 365
+
+# Live page updates (see council.events).
+# The number of recent issue events each process keeps, to send to browsers that reconnect.
+ISSUE_EVENT_HISTORY = 1000
+# The most events that may wait for one browser. A browser further behind is disconnected and
+# catches up when it reconnects.
+ISSUE_EVENT_QUEUE_SIZE = 100
+# Seconds between keepalive comments on an idle event stream, so that proxies keep it open.
+ISSUE_EVENT_KEEPALIVE = 15
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request, at DEBUG, or at WARNING when a view goes over its query budget.
+        # Only requests over budget are logged unless DJANGO_PROFILE_LOG_LEVEL is set to DEBUG.
+        "council.profiling": {
+            "handlers": ["console"],
+            "level": os.environ.get("DJANGO_PROFILE_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+        # What became of each summary, and jobs that failed or were put back on the queue.
+        "aisummary": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "application.settings")
 
 application = get_wsgi_application()
+
+# Load the duplicate index while the server starts taking requests, rather than in the first
+# request to show an issue.
+from council.duplicates import load_duplicate_index_in_background  # noqa: E402
+
+load_duplicate_index_in_background()
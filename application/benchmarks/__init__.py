@@ -0,0 +1,8 @@
+"""
+Benchmarks for the council issue app.
+
+Benchmarks are Django test cases in files named bench_*.py, so they run against a throwaway test
+database but are not picked up by the normal test run. Run them with:
+
+    python manage.py test benchmarks --pattern "bench_*.py"
+"""
@@ -0,0 +1,91 @@
+import os
+import random
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from council.models import ArchivedIssue, Issue
+from council.stats import rebuild_issue_stats
+from .results import ScenarioRecorder, write_results
+from .seed import seed_issues, seed_users
+
+
+class ArchiveBenchmark(TestCase):
+    """
+    Seeds a large dataset in which most resolved issues were resolved long ago, times the issue list
+    and the filtered list, archives the old issues with the archive_issues command and times them again.
+
+    The size of the run is set with environment variables:
+
+        BENCH_ISSUES    the number of issues to seed (default 2,000,000)
+        BENCH_REQUESTS  the number of timed requests per scenario (default 200)
+        BENCH_RESULTS   a file to write the results to as JSON, for python -m benchmarks.compare
+
+    For example:
+
+        BENCH_ISSUES=200000 python manage.py test benchmarks.bench_archive --pattern "bench_*.py"
+    """
+
+    ISSUES = int(os.environ.get("BENCH_ISSUES", 2_000_000))
+    REQUESTS = int(os.environ.get("BENCH_REQUESTS", 200))
+    RESULTS = os.environ.get("BENCH_RESULTS")
+
+    # The share of resolved issues old enough to archive.
+    OLD_SHARE = 0.9
+
+    WARMUP_REQUESTS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officers = seed_users(20)
+        seed_issues(cls.ISSUES, assignees=cls.officers)
+        long_ago = timezone.now() - timedelta(days=800)
+        resolved = Issue.objects.filter(status='RESOLVED').order_by("id").values_list("id", flat=True)
+        last_old = resolved[int(resolved.count() * cls.OLD_SHARE)]
+        Issue.objects.filter(status='RESOLVED', id__lt=last_old).update(resolved_at=long_ago)
+        rebuild_issue_stats()
+
+    def setUp(self):
+        cache.clear()
+        self.rng = random.Random(0)
+
+    def list_page(self):
+        # A page at a random depth, as reached by following the keyset cursor.
+        return self.client.get(reverse('home'), {"before": self.rng.randint(1, self.ISSUES)})
+
+    def open_issues_page(self):
+        return self.client.get(reverse('home'), {"status": "OPEN", "before": self.rng.randint(1, self.ISSUES)})
+
+    def run_scenario(self, name, make_request):
+        recorder = ScenarioRecorder(name)
+        for _ in range(self.WARMUP_REQUESTS):
+            make_request()
+        for _ in range(self.REQUESTS):
+            response = recorder.measure(make_request)
+            self.assertEqual(response.status_code, 200, name)
+        return recorder
+
+    def run_scenarios(self, stage):
+        return [
+            self.run_scenario(f"list ({stage})", self.list_page),
+            self.run_scenario(f"open issues ({stage})", self.open_issues_page),
+        ]
+
+    def test_list_before_and_after_archiving(self):
+        working = Issue.objects.count()
+        recorders = self.run_scenarios("before")
+        call_command("archive_issues", "--days", "365", "--chunk-size", "5000", stdout=StringIO())
+        archived = ArchivedIssue.objects.count()
+        recorders += self.run_scenarios("after")
+
+        print(f"\n{working} issues, {archived} archived, {self.REQUESTS} requests per scenario:")
+        for recorder in recorders:
+            print(recorder.report())
+        self.assertEqual(Issue.objects.count() + archived, working)
+
+        if self.RESULTS:
+            write_results(self.RESULTS, recorders, issues=self.ISSUES, archived=archived, requests_per_scenario=self.REQUESTS)
+            print(f"Results written to {self.RESULTS}")
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.test import AsyncClient, Client, TransactionTestCase
+from django.urls import reverse
+from aisummary.models import SummaryJob
+from aisummary.queue import SummaryWorkerPool
+from aisummary.utils import summary_cache
+from council.duplicates import reset_duplicate_index
+from council.models import Issue
+from .bench_export_memory import current_rss
+
+
+class ResourceMonitor:
+    """
+    Samples the thread count and resident set size of the process on a background thread.
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak_threads = threading.active_count()
+        self.peak_rss = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+            self.peak_rss = max(self.peak_rss, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class CreateIssueLoadBenchmark(TransactionTestCase):
+    """
+    Creates issues through the WSGI and the ASGI request paths with a simulated OpenAI latency, and
+    compares throughput, the time until every summary is stored, threads and memory.
+
+    Under WSGI, requests are served by a pool of threads and the summaries by the summary worker
+    threads, each blocked for the whole API call. Under ASGI, requests and summaries all run on one
+    event loop, with every summary call in flight at once.
+
+    The WSGI test needs a file database, as in-memory SQLite fails concurrent writes instead of
+    waiting for the lock. Run it with DJANGO_TEST_DB set, for example:
+
+        DJANGO_TEST_DB=bench.sqlite3 python manage.py test benchmarks.bench_asgi_create --pattern "bench_*.py"
+    """
+
+    ISSUES = 200
+
+    # Requests sent at the same time, as from a busy front end.
+    CONCURRENCY = 8
+
+    # The simulated time the OpenAI API takes to reply.
+    API_LATENCY = 0.2
+
+    # Worker threads for the WSGI model, as in the default AI_SUMMARY_CONCURRENCY.
+    SUMMARY_WORKERS = 4
+
+    def setUp(self):
+        # Both tests create the same descriptions, so start each with an empty summary cache.
+        summary_cache.clear()
+        reset_duplicate_index()
+
+    def form_data(self, i):
+        return {
+            "title": f"Load test issue {i}",
+            "description": f"Load test description number {i}.",
+            "category": "POTHOLE",
+            "email": f"resident{i}@example.com",
+        }
+
+    def report(self, name, requests_elapsed, total_elapsed, summarised, monitor, peak_traced):
+        print(
+            f"\n{name}: {self.ISSUES / requests_elapsed:.0f} requests/s, {summarised} summaries stored after "
+            f"{total_elapsed:.1f} s, peak {monitor.peak_threads} threads, "
+            f"peak {peak_traced / 1024 / 1024:.1f} MiB allocated, RSS peak {monitor.peak_rss / 1024 / 1024:.0f} MiB"
+        )
+
+    def test_wsgi_threads(self):
+        if connection.is_in_memory_db():
+            self.skipTest("Set DJANGO_TEST_DB to run the WSGI load test against a file database.")
+
+        def fake_completion(prompt, timeout=10):
+            time.sleep(self.API_LATENCY)
+            return "Summary"
+
+        def post(i):
+            response = Client().post(reverse('create-issue'), self.form_data(i))
+            assert response.status_code == 302
+
+        # The summary workers run alongside the web threads, as they would in their own process.
+        pool = SummaryWorkerPool(
+            concurrency=self.SUMMARY_WORKERS, poll_interval=0.01, batch_size=1, flush_interval=0
+        )
+        workers = threading.Thread(target=pool.run)
+
+        tracemalloc.start()
+        try:
+            with patch('aisummary.utils.request_completion', side_effect=fake_completion), ResourceMonitor() as monitor:
+                start = time.perf_counter()
+                workers.start()
+                with ThreadPoolExecutor(max_workers=self.CONCURRENCY) as executor:
+                    list(executor.map(post, range(self.ISSUES)))
+                requests_elapsed = time.perf_counter() - start
+
+                while SummaryJob.objects.filter(status__in=['PENDING', 'RUNNING']).exists():
+                    time.sleep(0.01)
+                total_elapsed = time.perf_counter() - start
+                pool.stop()
+                workers.join()
+            _, peak_traced = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        summarised = Issue.objects.exclude(ai_summary="").count()
+        self.report("WSGI", requests_elapsed, total_elapsed, summarised, monitor, peak_traced)
+        self.assertEqual(Issue.objects.count(), self.ISSUES)
+        self.assertEqual(summarised, self.ISSUES)
+
+    async def test_asgi_event_loop(self):
+        async def fake_completion(prompt, timeout=10):
+            await asyncio.sleep(self.API_LATENCY)
+            return "Summary"
+
+        client = AsyncClient()
+        limit = asyncio.Semaphore(self.CONCURRENCY)
+
+        async def post(i):
+            async with limit:
+                response = await client.post(reverse('create-issue'), self.form_data(i))
+            assert response.status_code == 302
+
+        async def summaries_pending():
+            return await SummaryJob.objects.filter(status__in=['PENDING', 'RUNNING']).aexists()
+
+        tracemalloc.start()
+        try:
+            with patch('aisummary.utils.request_completion_async', side_effect=fake_completion), ResourceMonitor() as monitor:
+                start = time.perf_counter()
+                await asyncio.gather(*(post(i) for i in range(self.ISSUES)))
+                requests_elapsed = time.perf_counter() - start
+
+                while await summaries_pending():
+                    await asyncio.sleep(0.01)
+                total_elapsed = time.perf_counter() - start
+            _, peak_traced = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        summarised = await sync_to_async(Issue.objects.exclude(ai_summary="").count)()
+        self.report("ASGI", requests_elapsed, total_elapsed, summarised, monitor, peak_traced)
+        self.assertEqual(await Issue.objects.acount(), self.ISSUES)
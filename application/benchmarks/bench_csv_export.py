@@ -0,0 +1,50 @@
+import time
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from .seed import seed_issues
+
+User = get_user_model()
+
+
+class CSVExportBenchmark(TestCase):
+    """
+    Exports 500,000 issues through the staff CSV export, measuring the time to the first rows and the
+    overall throughput.
+    """
+
+    ISSUES = 500_000
+
+    # The longest the first rows may take to arrive. A view that loads every issue before writing
+    # anything would take as long as the whole export.
+    MAX_TIME_TO_FIRST_ROWS = 1.0
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="manager", password="password", is_staff=True)
+        seed_issues(cls.ISSUES, assignees=[cls.user, None])
+
+    def test_export_throughput(self):
+        self.client.force_login(self.user)
+
+        start = time.perf_counter()
+        response = self.client.get(reverse('export-issues'))
+        chunks = iter(response.streaming_content)
+        header = next(chunks)
+        time_to_first_byte = time.perf_counter() - start
+        first_rows = next(chunks)
+        time_to_first_rows = time.perf_counter() - start
+
+        lines = header.count(b"\n") + first_rows.count(b"\n")
+        for chunk in chunks:
+            lines += chunk.count(b"\n")
+        elapsed = time.perf_counter() - start
+
+        rows = lines - 1
+        print(
+            f"\nFirst byte after {time_to_first_byte * 1000:.0f} ms, first rows after "
+            f"{time_to_first_rows * 1000:.0f} ms, exported {rows} issues in {elapsed:.1f} s "
+            f"({rows / elapsed:.0f} rows/s)"
+        )
+        self.assertEqual(rows, self.ISSUES)
+        self.assertLess(time_to_first_rows, self.MAX_TIME_TO_FIRST_ROWS)
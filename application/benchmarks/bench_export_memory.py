@@ -0,0 +1,59 @@
+import resource
+import time
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from .seed import seed_issues
+
+User = get_user_model()
+
+
+def current_rss():
+    """
+    Return the resident set size of this process in bytes.
+    Reads /proc on Linux and falls back to the peak RSS elsewhere.
+    """
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class NDJSONExportMemoryBenchmark(TestCase):
+    """
+    Exports 500,000 issues through the NDJSON endpoint and checks that memory stays flat.
+    """
+
+    ISSUES = 500_000
+
+    # The most the process may grow while streaming the export.
+    MAX_GROWTH = 64 * 1024 * 1024
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="staff", password="password")
+        seed_issues(cls.ISSUES, assignees=[cls.user, None])
+
+    def test_export_memory_is_bounded(self):
+        self.client.force_login(self.user)
+        baseline = current_rss()
+        peak = baseline
+
+        start = time.perf_counter()
+        response = self.client.get(reverse('api-issue-export'))
+        lines = 0
+        for chunk in response.streaming_content:
+            lines += chunk.count(b"\n")
+            if lines % 20000 < 200:
+                peak = max(peak, current_rss())
+        elapsed = time.perf_counter() - start
+        peak = max(peak, current_rss())
+
+        print(
+            f"\nExported {lines} issues in {elapsed:.1f} s ({lines / elapsed:.0f} rows/s), "
+            f"RSS grew by {(peak - baseline) / 1024 / 1024:.1f} MiB"
+        )
+        self.assertEqual(lines, self.ISSUES)
+        self.assertLess(peak - baseline, self.MAX_GROWTH)
@@ -0,0 +1,73 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from aisummary.models import SummaryJob
+from council.models import Issue
+
+
+def write_import_file(path, count, seed=0):
+    """
+    Write a CSV import file of generated issues.
+    :param path: The path to write to.
+    :param count: The number of rows.
+    :param seed: The random seed, so runs are repeatable.
+    """
+
+    rng = random.Random(seed)
+    categories = [value for value, _ in Issue.ISSUE_CATEGORIES]
+    with open(path, "w", newline="") as handle:
+        handle.write("title,description,category,email\n")
+        for i in range(count):
+            handle.write(
+                f"Imported issue {i},\"Imported description for issue {i}, reported by a resident.\","
+                f"{rng.choice(categories)},resident{i}@example.com\n"
+            )
+
+
+class ImportIssuesBenchmark(TestCase):
+    """
+    Imports a 1,000,000 row CSV file to measure throughput, and a smaller file with allocation
+    tracing on to check that the rows are streamed rather than held in memory.
+    """
+
+    ROWS = 1_000_000
+    TRACED_ROWS = 100_000
+
+    # The most Python memory the traced import may allocate at once.
+    MAX_PEAK = 32 * 1024 * 1024
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def import_file(self, count):
+        path = os.path.join(self.directory, f"issues-{count}.csv")
+        write_import_file(path, count)
+        call_command("import_issues", path, "--batch-size", "5000", stdout=StringIO())
+
+    def test_import_throughput(self):
+        start = time.perf_counter()
+        self.import_file(self.ROWS)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nImported {self.ROWS} rows in {elapsed:.1f} s ({self.ROWS / elapsed:.0f} rows/s)")
+        self.assertEqual(Issue.objects.count(), self.ROWS)
+        self.assertEqual(SummaryJob.objects.count(), self.ROWS)
+
+    def test_import_memory_is_bounded(self):
+        tracemalloc.start()
+        try:
+            self.import_file(self.TRACED_ROWS)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        print(f"\nImported {self.TRACED_ROWS} rows with a peak of {peak / 1024 / 1024:.1f} MiB allocated")
+        self.assertEqual(Issue.objects.count(), self.TRACED_ROWS)
+        self.assertLess(peak, self.MAX_PEAK)
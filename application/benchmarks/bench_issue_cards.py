@@ -0,0 +1,54 @@
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from council.views import IssuesView
+from .seed import seed_issues
+
+User = get_user_model()
+
+
+class IssueCardRenderBenchmark(TestCase):
+    """
+    Compares the time to render a list of 1,000 issue cards with the fragment cache cold and warm.
+    """
+
+    ISSUES = 1000
+    ROUNDS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="staff", password="password")
+        staff = [User.objects.create_user(username=f"officer{i}", password="password") for i in range(10)]
+        seed_issues(cls.ISSUES, assignees=staff)
+
+    def render_list(self):
+        """
+        Render one page holding every issue and return the time it took.
+        """
+
+        request = RequestFactory().get("/")
+        request.user = self.user
+        start = time.perf_counter()
+        response = IssuesView.as_view(page_size=self.ISSUES)(request)
+        response.render()
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(response.context_data["object_list"]), self.ISSUES)
+        return elapsed
+
+    def test_cold_vs_warm(self):
+        cold = []
+        for _ in range(self.ROUNDS):
+            cache.clear()
+            cold.append(self.render_list())
+
+        warm = [self.render_list() for _ in range(self.ROUNDS)]
+
+        cold_median = statistics.median(cold)
+        warm_median = statistics.median(warm)
+        print(
+            f"\nRendering {self.ISSUES} issue cards: cold cache {cold_median * 1000:.1f} ms, "
+            f"warm cache {warm_median * 1000:.1f} ms ({cold_median / warm_median:.1f}x faster)"
+        )
+        self.assertLess(warm_median, cold_median)
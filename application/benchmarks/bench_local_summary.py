@@ -0,0 +1,61 @@
+import random
+import statistics
+import time
+from django.test import SimpleTestCase
+from aisummary.backends import LocalBackend
+
+SENTENCES = [
+    "There is a deep pothole on {street} outside number {number}.",
+    "The streetlight on {street} has been out for {number} days.",
+    "Someone has dumped a mattress and bin bags on {street}.",
+    "The drain at the corner of {street} is blocked and the road floods when it rains.",
+    "Graffiti has been sprayed across the bus shelter on {street}.",
+    "It has already damaged {number} cars and cyclists have to swerve into traffic.",
+    "I reported this before but nothing has happened.",
+    "Please could someone come and look at it as soon as possible.",
+    "Children walk past here on the way to school every morning.",
+]
+
+STREETS = ["Mill Road", "High Street", "Station Lane", "Church Walk", "Park Avenue"]
+
+
+def make_description(rng):
+    """
+    Build a description of three to eight sentences, like a resident's report.
+    """
+
+    return " ".join(
+        rng.choice(SENTENCES).format(street=rng.choice(STREETS), number=rng.randint(2, 90))
+        for _ in range(rng.randint(3, 8))
+    )
+
+
+class LocalSummaryBenchmark(SimpleTestCase):
+    """
+    Summarises 10,000 generated descriptions with the local extractive backend, measuring the latency
+    of each summary. Needs no network or database.
+    """
+
+    DESCRIPTIONS = 10_000
+
+    # The slowest the 99th percentile may be. An OpenAI round trip takes around a second.
+    MAX_P99 = 0.005
+
+    def test_latency(self):
+        rng = random.Random(0)
+        descriptions = [make_description(rng) for _ in range(self.DESCRIPTIONS)]
+        backend = LocalBackend()
+
+        timings = []
+        for description in descriptions:
+            start = time.perf_counter()
+            backend.summarise(description)
+            timings.append(time.perf_counter() - start)
+
+        percentiles = statistics.quantiles(timings, n=100)
+        p50, p99 = percentiles[49], percentiles[98]
+        print(
+            f"\nLocal summaries: {self.DESCRIPTIONS / sum(timings):.0f}/s, "
+            f"p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms"
+        )
+        self.assertLess(p99, self.MAX_P99)
@@ -0,0 +1,129 @@
+import os
+import random
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from council.duplicates import get_duplicate_index, reset_duplicate_index
+from council.models import Issue
+from council.stats import rebuild_issue_stats
+from .results import ScenarioRecorder, write_results
+from .seed import seed_issues, seed_users
+
+
+class ScenarioBenchmark(TestCase):
+    """
+    Seeds a large dataset and runs scripted list, detail, create, edit and delete scenarios through
+    the test client, recording the latency percentiles, queries per request and memory of each.
+
+    The size of the run is set with environment variables:
+
+        BENCH_ISSUES    the number of issues to seed (default 100,000)
+        BENCH_REQUESTS  the number of timed requests per scenario (default 200)
+        BENCH_RESULTS   a file to write the results to as JSON, for python -m benchmarks.compare
+
+    For example:
+
+        BENCH_ISSUES=1000000 BENCH_RESULTS=after.json python manage.py test benchmarks.bench_scenarios --pattern "bench_*.py"
+    """
+
+    ISSUES = int(os.environ.get("BENCH_ISSUES", 100_000))
+    REQUESTS = int(os.environ.get("BENCH_REQUESTS", 200))
+    RESULTS = os.environ.get("BENCH_RESULTS")
+
+    # Requests made with tracemalloc running to find the peak memory of each scenario.
+    MEMORY_REQUESTS = 10
+
+    # Requests made before timing starts, so one-off work such as filling caches is not counted.
+    WARMUP_REQUESTS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.officers = seed_users(20)
+        seed_issues(cls.ISSUES, assignees=cls.officers)
+        rebuild_issue_stats()
+
+    def setUp(self):
+        cache.clear()
+        # Servers load the duplicate index when they start (see application.wsgi).
+        reset_duplicate_index()
+        get_duplicate_index()
+        # Staff see the issue list and the possible duplicates, so time the pages as they see them.
+        self.client.force_login(self.officers[0])
+        self.rng = random.Random(0)
+        self.max_id = Issue.objects.order_by("-id").values_list("id", flat=True).first()
+        self.counter = 0
+
+    def random_issue_id(self):
+        return self.rng.randint(1, self.max_id)
+
+    def list_page(self):
+        # A page at a random depth, as reached by following the keyset cursor.
+        return self.client.get(reverse('home'), {"before": self.random_issue_id()})
+
+    def detail_page(self):
+        return self.client.get(reverse('issue-detail', args=[self.random_issue_id()]))
+
+    def create_issue(self):
+        self.counter += 1
+        return self.client.post(reverse('create-issue'), {
+            "title": f"Benchmark issue {self.counter}",
+            "description": f"A benchmark description of a pothole on Mill Road, number {self.counter}.",
+            "category": "POTHOLE",
+            "email": "resident@example.com",
+        })
+
+    def edit_issue(self):
+        issue = Issue.objects.get(pk=self.random_issue_id())
+        return self.client.post(reverse('update-issue', args=[issue.pk]), {
+            "title": issue.title,
+            "ai_summary": issue.ai_summary,
+            "description": issue.description,
+            "category": issue.category,
+            "email": issue.email,
+            "assigned_to": self.rng.choice(self.officers).pk,
+            "status": self.rng.choice(["OPEN", "IN_PROGRESS", "RESOLVED"]),
+        })
+
+    def delete_issue(self):
+        return self.client.post(reverse('delete-issue', args=[self.deletable.pop()]))
+
+    def run_scenario(self, name, make_request, expected_status):
+        """
+        Warm up, time REQUESTS requests and measure the memory of MEMORY_REQUESTS more.
+        :return: The ScenarioRecorder.
+        """
+
+        def checked_request():
+            response = make_request()
+            self.assertEqual(response.status_code, expected_status, name)
+            return response
+
+        recorder = ScenarioRecorder(name)
+        for _ in range(self.WARMUP_REQUESTS):
+            checked_request()
+        for _ in range(self.REQUESTS):
+            recorder.measure(checked_request)
+        for _ in range(self.MEMORY_REQUESTS):
+            recorder.measure_memory(checked_request)
+        return recorder
+
+    def test_scenarios(self):
+        # Enough distinct issues to delete one per request, none of them the ones created by this run.
+        total_deletes = self.WARMUP_REQUESTS + self.REQUESTS + self.MEMORY_REQUESTS
+        self.deletable = self.rng.sample(range(1, self.max_id + 1), total_deletes)
+
+        recorders = [
+            self.run_scenario("list", self.list_page, 200),
+            self.run_scenario("detail", self.detail_page, 200),
+            self.run_scenario("create", self.create_issue, 302),
+            self.run_scenario("edit", self.edit_issue, 302),
+            self.run_scenario("delete", self.delete_issue, 302),
+        ]
+
+        print(f"\n{self.ISSUES} issues, {self.REQUESTS} requests per scenario:")
+        for recorder in recorders:
+            print(recorder.report())
+
+        if self.RESULTS:
+            write_results(self.RESULTS, recorders, issues=self.ISSUES, requests_per_scenario=self.REQUESTS)
+            print(f"Results written to {self.RESULTS}")
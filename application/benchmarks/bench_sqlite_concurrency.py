@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.db import OperationalError, connection, transaction
+from django.test import TransactionTestCase
+from council.models import Issue
+from .results import percentile
+
+
+class SQLiteConcurrencyStressTest(TransactionTestCase):
+    """
+    Runs form-style writes, background summary writes and page reads from many threads at once
+    against a file database, and fails if any of them gets "database is locked".
+
+    Each writer creates an issue and then edits it in a transaction that reads before it writes. With SQLite's default deferred transactions and
+    rollback journal, such transactions fail straight away when two of them upgrade to a write lock
+    together, and readers wait behind writers. Run it with DJANGO_TEST_DB set to a file:
+
+        DJANGO_TEST_DB=/dev/shm/stress.sqlite3 python manage.py test benchmarks.bench_sqlite_concurrency --pattern "bench_*.py"
+    """
+
+    WRITERS = 8
+    SUMMARY_WRITERS = 4
+    READERS = 8
+    OPERATIONS = 100
+
+    def setUp(self):
+        if connection.is_in_memory_db():
+            self.skipTest("Set DJANGO_TEST_DB to run the stress test against a file database.")
+        Issue.objects.bulk_create(
+            Issue(title=f"Seed {i}", description="Seeded.", category="POTHOLE", email="a@example.com")
+            for i in range(500)
+        )
+        self.errors = []
+        self.errors_lock = threading.Lock()
+
+    def record_error(self, error):
+        with self.errors_lock:
+            self.errors.append(error)
+
+    def run_thread(self, operation):
+        """
+        Run an operation OPERATIONS times on this thread, recording any database errors.
+        :return: The latency of each operation in milliseconds.
+        """
+
+        rng = random.Random(threading.get_ident())
+        latencies = []
+        try:
+            for i in range(self.OPERATIONS):
+                start = time.perf_counter()
+                try:
+                    operation(rng, i)
+                except OperationalError as e:
+                    self.record_error(e)
+                latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            connection.close()
+        return latencies
+
+    def write_issue(self, rng, i):
+        # A form post creating an issue, then an edit that reads the issue and saves it in one
+        # transaction, as the admin's change form does.
+        issue = Issue.objects.create(
+            title=f"Stress {i}", description=f"Stress test {i}.", category="POTHOLE", email="b@example.com",
+        )
+        with transaction.atomic():
+            issue = Issue.objects.get(pk=issue.pk)
+            issue.status = rng.choice(["IN_PROGRESS", "RESOLVED"])
+            issue.save()
+
+    def write_summary(self, rng, i):
+        # A summary worker storing a summary with a compare-and-set update.
+        Issue.objects.filter(pk=rng.randint(1, 500)).update(ai_summary=f"Summary {i}")
+
+    def read_page(self, rng, i):
+        # The issue list: a page and a filtered count.
+        list(Issue.objects.order_by("-id")[:20])
+        Issue.objects.filter(status="OPEN").count()
+
+    def test_no_lock_errors(self):
+        operations = (
+            [self.write_issue] * self.WRITERS
+            + [self.write_summary] * self.SUMMARY_WRITERS
+            + [self.read_page] * self.READERS
+        )
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(operations)) as executor:
+            results = list(executor.map(self.run_thread, operations))
+        elapsed = time.perf_counter() - start
+
+        reads = [latency for latencies in results[-self.READERS:] for latency in latencies]
+        print(
+            f"\n{len(operations) * self.OPERATIONS} operations in {elapsed:.1f} s, {len(self.errors)} errors, "
+            f"read p50 {percentile(reads, 0.5):.1f} ms, p99 {percentile(reads, 0.99):.1f} ms"
+        )
+        self.assertFalse(self.errors, f"{len(self.errors)} operations failed, for example: {self.errors[:1]}")
+        self.assertEqual(Issue.objects.count(), 500 + self.WRITERS * self.OPERATIONS)
@@ -0,0 +1,95 @@
+"""
+Compare two benchmark results files written by bench_scenarios and report regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2
+
+Exits with status 1 if any scenario got slower than the threshold allows, made more queries, or
+used more memory than the threshold allows.
+"""
+import argparse
+import json
+import sys
+
+# The metrics that are compared. Timings and memory are noisy, so they may grow by the threshold
+# times the given factor; the tail latency is the noisiest of all. Query counts are compared exactly (None).
+METRICS = {
+    "p50_ms": 1,
+    "p95_ms": 1,
+    "p99_ms": 2,
+    "max_queries": None,
+    "peak_memory_kib": 1,
+}
+
+# Changes in latency smaller than this are ignored, as they are within the noise of a single run.
+MIN_LATENCY_CHANGE_MS = 1.0
+
+
+def compare(old, new, threshold=0.2):
+    """
+    Compare two results dictionaries.
+    :param old: The baseline results.
+    :param new: The results to check.
+    :param threshold: The fraction by which a timing or memory metric may grow before it counts as a
+        regression, doubled for p99 latency.
+    :return: A tuple of (rows, regressions), where rows is a list of (scenario, metric, old value,
+        new value, regressed) for every metric of every scenario in both files, and regressions is
+        the number of regressed metrics.
+    :raises ValueError: If the files were written in different formats.
+    """
+
+    if old.get("version") != new.get("version"):
+        raise ValueError("The results files were written by different versions of the benchmark suite.")
+
+    rows = []
+    regressions = 0
+    for scenario, new_metrics in new["scenarios"].items():
+        old_metrics = old["scenarios"].get(scenario)
+        if old_metrics is None:
+            continue
+        for metric, factor in METRICS.items():
+            before, after = old_metrics[metric], new_metrics[metric]
+            if factor is None:
+                regressed = after > before
+            else:
+                regressed = after > before * (1 + threshold * factor)
+                if metric.endswith("_ms"):
+                    regressed = regressed and after - before >= MIN_LATENCY_CHANGE_MS
+            regressions += regressed
+            rows.append((scenario, metric, before, after, regressed))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark results files.")
+    parser.add_argument("baseline", help="The results file to compare against.")
+    parser.add_argument("current", help="The results file to check.")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="The fraction by which latency or memory may grow before it counts as a regression.",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline_file, open(args.current) as current_file:
+        old, new = json.load(baseline_file), json.load(current_file)
+
+    try:
+        rows, regressions = compare(old, new, args.threshold)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    print(f"Comparing {old.get('commit') or args.baseline} with {new.get('commit') or args.current}")
+    for scenario, metric, before, after, regressed in rows:
+        change = f"{(after - before) / before:+.0%}" if before else "new"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{scenario:<8} {metric:<16} {before:>10} -> {after:<10} {change:>6}{flag}")
+
+    if regressions:
+        print(f"{regressions} regressions found.")
+        return 1
+    print("No regressions found.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
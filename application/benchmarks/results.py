@@ -0,0 +1,138 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# The format of the results file. Bump it if the layout changes, so that compare refuses to mix formats.
+RESULTS_VERSION = 1
+
+
+def percentile(values, fraction):
+    """
+    Return a percentile of a list of numbers, interpolating between the closest ranks.
+    :param values: The numbers.
+    :param fraction: The percentile as a fraction, for example 0.95.
+    :return: The percentile, or 0 if there are no numbers.
+    """
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ScenarioRecorder:
+    """
+    Times the requests of one benchmark scenario and counts their database queries, then reports
+    latency percentiles, queries per request and memory.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = []
+        self.queries = []
+        self.peak_memory = 0
+
+    def measure(self, make_request):
+        """
+        Time one request and count its queries.
+        :param make_request: A function that makes the request and returns the response.
+        :return: The response.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = make_request()
+            self.timings.append(time.perf_counter() - start)
+        self.queries.append(len(queries))
+        return response
+
+    def measure_memory(self, make_request):
+        """
+        Make one request with tracemalloc running and record the most memory it allocated at once.
+        This is kept apart from measure(), as tracing slows every allocation down.
+        :param make_request: A function that makes the request and returns the response.
+        :return: The response.
+        """
+
+        tracemalloc.start()
+        try:
+            response = make_request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.peak_memory = max(self.peak_memory, peak)
+        return response
+
+    def summary(self):
+        """
+        Return the results as a dictionary of plain numbers, with latencies in milliseconds and
+        memory in KiB.
+        """
+
+        return {
+            "requests": len(self.timings),
+            "p50_ms": round(percentile(self.timings, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(self.timings, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(self.timings, 0.99) * 1000, 3),
+            "mean_queries": round(sum(self.queries) / len(self.queries), 2) if self.queries else 0,
+            "max_queries": max(self.queries, default=0),
+            "peak_memory_kib": round(self.peak_memory / 1024, 1),
+        }
+
+    def report(self):
+        """
+        Return a one-line human-readable summary.
+        """
+
+        summary = self.summary()
+        return (
+            f"{self.name:<8} p50 {summary['p50_ms']:8.2f} ms  p95 {summary['p95_ms']:8.2f} ms  "
+            f"p99 {summary['p99_ms']:8.2f} ms  {summary['mean_queries']:5.1f} queries  "
+            f"{summary['peak_memory_kib']:8.1f} KiB"
+        )
+
+
+def git_commit():
+    """
+    Return the current git commit hash, or None if it cannot be found.
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, recorders, **metadata):
+    """
+    Write the results of a benchmark run as JSON, for comparing between commits with
+    `python -m benchmarks.compare`.
+    :param path: The file to write.
+    :param recorders: The ScenarioRecorder of each scenario.
+    :param metadata: Details of the run to include, such as the number of issues.
+    :return: The results dictionary.
+    """
+
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        **metadata,
+        "scenarios": {recorder.name: recorder.summary() for recorder in recorders},
+    }
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+        results_file.write("\n")
+    return results
@@ -0,0 +1,92 @@
+import random
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from council.models import Issue
+
+# How often each category is reported, roughly as in the council's own figures.
+CATEGORY_WEIGHTS = {
+    "POTHOLE": 30,
+    "STREET_LIGHTING": 15,
+    "FLY_TIPPING": 20,
+    "BLOCKED_DRAIN": 10,
+    "GRAFFITI": 8,
+    "ASB": 7,
+}
+
+# Most issues are resolved, and fewer are being worked on than are waiting.
+STATUS_WEIGHTS = {"OPEN": 25, "IN_PROGRESS": 15, "RESOLVED": 60}
+
+# The share of issues that are assigned to someone.
+ASSIGNED_SHARE = 0.7
+
+STREETS = ["Mill Road", "High Street", "Station Lane", "Church Walk", "Park Avenue", "Queens Road"]
+
+
+def weighted_choices(weights, values):
+    """
+    Return the values and a weight for each, giving any value missing from `weights` a weight of 5.
+    """
+
+    return values, [weights.get(value, 5) for value in values]
+
+
+def seed_users(count, prefix="officer"):
+    """
+    Create staff users to assign issues to.
+    :param count: The number of users.
+    :param prefix: The start of each username.
+    :return: The list of users.
+    """
+
+    User = get_user_model()
+    User.objects.bulk_create([User(username=f"{prefix}{i}", is_staff=True) for i in range(count)])
+    return list(User.objects.filter(username__startswith=prefix).order_by("pk"))
+
+
+def seed_issues(count, batch_size=5000, assignees=None, seed=0):
+    """
+    Insert `count` generated issues with bulk inserts.
+    Categories and statuses follow CATEGORY_WEIGHTS and STATUS_WEIGHTS. When there are assignees,
+    ASSIGNED_SHARE of the issues are assigned, with a few officers taking most of the work, as the
+    earlier assignees are weighted more heavily.
+    The inserts bypass save() and its signals, so rebuild the statistics rollups afterwards if they matter.
+    :param count: The number of issues to create.
+    :param batch_size: The number of issues per INSERT.
+    :param assignees: Users to assign issues to. Issues are left unassigned if empty.
+    :param seed: The random seed, so runs are repeatable.
+    :return: The number of issues created.
+    """
+
+    rng = random.Random(seed)
+    categories, category_weights = weighted_choices(CATEGORY_WEIGHTS, [value for value, _ in Issue.ISSUE_CATEGORIES])
+    statuses, status_weights = weighted_choices(STATUS_WEIGHTS, [value for value, _ in Issue.ISSUE_STATUS])
+    assignees = list(assignees or [])
+    assignee_weights = [1 / (rank + 1) for rank in range(len(assignees))]
+    now = timezone.now()
+
+    created = 0
+    while created < count:
+        batch = []
+        size = min(batch_size, count - created)
+        batch_categories = rng.choices(categories, category_weights, k=size)
+        batch_statuses = rng.choices(statuses, status_weights, k=size)
+        for offset in range(size):
+            i = created + offset
+            status = batch_statuses[offset]
+            assigned_to = None
+            if assignees and rng.random() < ASSIGNED_SHARE:
+                assigned_to = rng.choices(assignees, assignee_weights)[0]
+            street = rng.choice(STREETS)
+            batch.append(Issue(
+                title=f"Generated issue {i}",
+                ai_summary=f"Generated summary for issue {i} " * 3,
+                description=f"Generated description for issue {i} on {street}. " * 5,
+                category=batch_categories[offset],
+                status=status,
+                email=f"resident{i}@example.com",
+                assigned_to=assigned_to,
+                resolved_at=now if status == 'RESOLVED' else None,
+            ))
+        Issue.objects.bulk_create(batch)
+        created += len(batch)
+    return created
@@ -1,4 +1,169 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ALL_VAR, IS_FACETS_VAR, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR
+from django.core.paginator import Paginator
+from django.db.models.expressions import RawSQL
+from django.template.response import TemplateResponse
+from .assignees import staff_users
+from .bulk import reassign_issues, regenerate_summaries, set_issue_status
 from .models import Issue
+from .search import SEARCH_TABLE, build_match_query, search_supported
+from .stats import count_from_stats
+from .widgets import AssigneePicker
 
-admin.site.register(Issue)
+# Query string parameters of the change list that do not filter it.
+NON_FILTER_PARAMS = {ALL_VAR, IS_FACETS_VAR, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR}
+
+# The filters that the rollups can count, as they name them in the query string.
+STAT_FILTER_PARAMS = {"status__exact": "status", "category__exact": "category"}
+
+
+class CountedPaginator(Paginator):
+    """
+    A paginator that is given its count instead of counting the queryset.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self):
+        return self._count
+
+
+class ReassignForm(forms.Form):
+    """
+    The form on the intermediate page of the reassign action.
+    """
+
+    assigned_to = forms.ModelChoiceField(
+        queryset=staff_users(),
+        required=False,
+        label="Assign to",
+        help_text="Leave empty to unassign the issues.",
+        widget=AssigneePicker(attrs={"class": "vTextField"}),
+    )
+
+
+def status_action(status, label):
+    """
+    Build an admin action that gives the selected issues a status.
+    :param status: The status, a value from Issue.ISSUE_STATUS.
+    :param label: The status's display name.
+    :return: The action function.
+    """
+
+    @admin.action(permissions=["change"], description=f"Mark selected issues as {label.lower()}")
+    def action(modeladmin, request, queryset):
+        changed = set_issue_status(queryset, status)
+        modeladmin.message_user(request, f"Marked {changed} issues as {label.lower()}.", messages.SUCCESS)
+
+    action.__name__ = f"mark_{status.lower()}"
+    return action
+
+
+@admin.register(Issue)
+class IssueAdmin(admin.ModelAdmin):
+    """
+    The admin for issues, built to stay fast on a large issue table.
+    The change list joins the assignee into the page query, filters and orders on indexed columns,
+    searches with the full-text index, and never counts the whole table: counts come from the
+    rollups where they can (see get_paginator). Bulk actions change every selected issue with one
+    UPDATE (see council.bulk).
+    """
+
+    list_display = ["id", "title", "category", "status", "assigned_to", "created_at"]
+    list_display_links = ["id", "title"]
+    list_select_related = ["assigned_to"]
+    list_filter = ["status", "category", ("created_at", admin.DateFieldListFilter)]
+    search_fields = ["title"]
+    search_help_text = "Search titles, descriptions and summaries. Every word must match."
+    ordering = ["-id"]
+    list_per_page = 50
+    autocomplete_fields = ["assigned_to"]
+    readonly_fields = ["ai_summary_is_draft", "created_at", "updated_at", "resolved_at"]
+
+    # Counting the whole table for "N total" and the filter facets scans it on every page view.
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    # The most issues counted for a filter or search that the rollups cannot count. Larger results
+    # show this many, so the pages beyond it are not linked, but "select all" still acts on every match.
+    count_limit = 10000
+
+    actions = [
+        *(status_action(status, label) for status, label in Issue.ISSUE_STATUS),
+        "reassign_selected",
+        "regenerate_selected",
+    ]
+
+    def save_model(self, request, obj, form, change):
+        """
+        Save the issue. A summary written by staff is never a draft, so it is not replaced.
+        """
+
+        if "ai_summary" in form.changed_data:
+            obj.ai_summary_is_draft = False
+        super().save_model(request, obj, form, change)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search the full-text index instead of scanning titles with LIKE, where the database has one.
+        """
+
+        match = build_match_query(search_term)
+        if not match or not search_supported():
+            return super().get_search_results(request, queryset, search_term)
+        matches = RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match])
+        return queryset.filter(pk__in=matches), False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        """
+        Count the change list from the rollups when it is unfiltered or only filtered by status and
+        category. Other filters and searches are counted up to count_limit.
+        """
+
+        filters = {key: value for key, value in request.GET.items() if key not in NON_FILTER_PARAMS}
+        if filters.keys() <= STAT_FILTER_PARAMS.keys():
+            count = count_from_stats(**{STAT_FILTER_PARAMS[key]: value for key, value in filters.items()})
+        else:
+            count = queryset.order_by()[:self.count_limit].count()
+        return CountedPaginator(
+            queryset, per_page, count, orphans=orphans, allow_empty_first_page=allow_empty_first_page
+        )
+
+    @admin.action(permissions=["change"], description="Reassign selected issues")
+    def reassign_selected(self, request, queryset):
+        """
+        Ask who to assign the selected issues to, then assign them all with one update.
+        """
+
+        form = ReassignForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            assignee = form.cleaned_data["assigned_to"]
+            changed = reassign_issues(queryset, assignee)
+            self.message_user(request, f"Assigned {changed} issues to {assignee or 'nobody'}.", messages.SUCCESS)
+            return None
+
+        return TemplateResponse(request, "admin/council/issue/reassign.html", {
+            **self.admin_site.each_context(request),
+            "title": "Reassign issues",
+            "opts": self.model._meta,
+            "form": form,
+            "media": self.media + form.media,
+            "action": "reassign_selected",
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            "selected": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            "select_across": request.POST.get("select_across") == "1",
+        })
+
+    @admin.action(permissions=["change"], description="Regenerate summaries of selected issues")
+    def regenerate_selected(self, request, queryset):
+        """
+        Clear the summaries of the selected issues and queue them to be summarised again.
+        """
+
+        cleared = regenerate_summaries(queryset)
+        self.message_user(request, f"Queued {cleared} issues to be summarised again.", messages.SUCCESS)
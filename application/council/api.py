@@ -0,0 +1,244 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+from .assignees import get_staff_directory
+from .events import stream_events
+from .forms import IssueFilterForm
+from .models import Issue
+
+
+def serialize_issue(issue, include_email=False):
+    """
+    Convert an issue to the dictionary returned by the API.
+    :param issue: The Issue instance, with assigned_to selected.
+    :param include_email: Whether to include the resident's email address, which only staff may see.
+    :return: A JSON-serialisable dictionary.
+    """
+
+    assigned_to = None
+    if issue.assigned_to_id is not None:
+        assigned_to = {"id": issue.assigned_to_id, "username": issue.assigned_to.get_username()}
+
+    data = {
+        "id": issue.pk,
+        "title": issue.title,
+        "description": issue.description,
+        "ai_summary": issue.ai_summary,
+        "category": issue.category,
+        "status": issue.status,
+        "assigned_to": assigned_to,
+        "created_at": issue.created_at,
+        "updated_at": issue.updated_at,
+    }
+    if include_email:
+        data["email"] = issue.email
+    return data
+
+
+class APILoginRequiredMixin:
+    """
+    Returns a JSON 401 response to requests that are not logged in.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Reject anonymous requests before the view runs.
+        """
+
+        if not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class FilteredIssuesMixin:
+    """
+    Builds the issue queryset for an API request from the same filters as the issue list.
+    """
+
+    def get_filtered_queryset(self):
+        """
+        Return the issues matching the request's filters, with the assigned user joined in.
+        :return: A tuple of (queryset, None), or (None, error response) if a filter is invalid.
+        """
+
+        form = IssueFilterForm(self.request.GET)
+        if not form.is_valid():
+            return None, JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+        return form.filter(Issue.objects.select_related("assigned_to")), None
+
+
+class IssueListAPIView(APILoginRequiredMixin, FilteredIssuesMixin, View):
+    """
+    Lists issues as JSON, newest first, with keyset pagination.
+    The response holds a page of `results` and a `next` URL, which is null on the last page.
+    """
+
+    default_limit = 50
+    max_limit = 500
+
+    def get(self, request):
+        """
+        Return one page of issues.
+        """
+
+        queryset, error = self.get_filtered_queryset()
+        if error:
+            return error
+
+        try:
+            limit = min(int(request.GET.get("limit", self.default_limit)), self.max_limit)
+            before = int(request.GET["before"]) if request.GET.get("before") else None
+        except ValueError:
+            return JsonResponse({"error": "limit and before must be integers."}, status=400)
+        if limit < 1:
+            return JsonResponse({"error": "limit must be at least 1."}, status=400)
+
+        queryset = queryset.order_by("-id")
+        if before is not None:
+            queryset = queryset.filter(id__lt=before)
+
+        # Fetch one extra issue to find out whether there is another page.
+        page = list(queryset[:limit + 1])
+        next_url = None
+        if len(page) > limit:
+            page = page[:limit]
+            params = request.GET.copy()
+            params["before"] = page[-1].pk
+            next_url = f"{reverse('api-issue-list')}?{params.urlencode()}"
+
+        return JsonResponse({"results": [serialize_issue(issue, request.user.is_staff) for issue in page], "next": next_url})
+
+
+class IssueDetailAPIView(APILoginRequiredMixin, View):
+    """
+    Returns a single issue as JSON.
+    """
+
+    def get(self, request, pk):
+        """
+        Return the issue, or 404 if it does not exist.
+        """
+
+        issue = Issue.objects.select_related("assigned_to").filter(pk=pk).first()
+        if issue is None:
+            return JsonResponse({"error": "Issue not found."}, status=404)
+        return JsonResponse(serialize_issue(issue, request.user.is_staff))
+
+
+class IssueExportView(APILoginRequiredMixin, FilteredIssuesMixin, View):
+    """
+    Streams every issue matching the filters as newline-delimited JSON, oldest first.
+    Rows are read from a server-side cursor in chunks and written out as they are read, so memory use
+    stays flat however many issues there are.
+    """
+
+    chunk_size = 2000
+
+    # The number of lines joined into each piece of the response body.
+    lines_per_write = 200
+
+    def stream_lines(self, rows):
+        """
+        Encode issues as JSON lines, yielding a few hundred lines at a time.
+        :param rows: An iterator of Issue instances.
+        """
+
+        encoder = DjangoJSONEncoder()
+        include_email = self.request.user.is_staff
+        lines = []
+        for issue in rows:
+            lines.append(encoder.encode(serialize_issue(issue, include_email)))
+            if len(lines) == self.lines_per_write:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    def get(self, request):
+        """
+        Return a streaming NDJSON response.
+        """
+
+        queryset, error = self.get_filtered_queryset()
+        if error:
+            return error
+
+        rows = queryset.order_by("id").iterator(chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(self.stream_lines(rows), content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="issues.ndjson"'
+        return response
+
+
+class AssigneeSearchView(APILoginRequiredMixin, View):
+    """
+    Searches the staff users that issues can be assigned to, for the assignee picker.
+    `q` is matched against the start of each user's username, first name, last name and full name,
+    ignoring case. Searches are answered from the in-memory staff directory, not the database.
+    """
+
+    default_limit = 10
+    max_limit = 20
+
+    # The session, the user, and rebuilding the staff directory after a user has changed.
+    query_budget = 3
+
+    def get(self, request):
+        """
+        Return up to `limit` matching users as `results`, each with an `id` and a `label`.
+        """
+
+        try:
+            limit = min(int(request.GET.get("limit", self.default_limit)), self.max_limit)
+        except ValueError:
+            return JsonResponse({"error": "limit must be an integer."}, status=400)
+        if limit < 1:
+            return JsonResponse({"error": "limit must be at least 1."}, status=400)
+
+        return JsonResponse({"results": get_staff_directory().search(request.GET.get("q", ""), limit)})
+
+
+class IssueEventsView(View):
+    """
+    Streams "summary" and "status" events for issues as server-sent events, so that open pages can
+    update themselves instead of being reloaded (see council/static/council/live_updates.js).
+    `issues` limits the stream to a comma-separated list of issue IDs. A client that reconnects
+    with a Last-Event-ID header is first sent the events it missed.
+    The view is async and the stream waits on the event loop, so under ASGI an open page costs no
+    thread. Under WSGI each open page would hold a worker, so the view answers 204 No Content, which
+    tells the browser not to reconnect, and pages are left to be reloaded as before.
+    """
+
+    max_issues = 200
+
+    # The session and the user.
+    query_budget = 2
+
+    async def get(self, request):
+        """
+        Return a text/event-stream response.
+        """
+
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+
+        issue_ids = None
+        try:
+            if request.GET.get("issues"):
+                issue_ids = {int(issue_id) for issue_id in request.GET["issues"].split(",")}
+            last_event_id = request.headers.get("Last-Event-ID")
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return JsonResponse({"error": "issues and Last-Event-ID must be integers."}, status=400)
+        if issue_ids is not None and len(issue_ids) > self.max_issues:
+            return JsonResponse({"error": f"At most {self.max_issues} issues may be followed."}, status=400)
+
+        response = StreamingHttpResponse(stream_events(issue_ids, last_event_id), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx from buffering the stream.
+        response["X-Accel-Buffering"] = "no"
+        return response
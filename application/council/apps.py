@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CouncilConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'council'
+
+    def ready(self):
+        """
+        Connect the signal handlers once the app registry is ready.
+        """
+
+        from . import signals  # noqa: F401
@@ -0,0 +1,85 @@
+import time
+from django.db import connection, transaction
+from django.utils import timezone
+from aisummary.models import SummaryJob
+from .models import ArchivedIssue, Issue
+from .stats import record_issues_archived
+
+
+def archivable_issues(before):
+    """
+    Return the issues that may be archived: those resolved before a time.
+    :param before: The latest resolved_at to archive, exclusive.
+    :return: The queryset.
+    """
+
+    return Issue.objects.filter(status='RESOLVED', resolved_at__lt=before)
+
+
+def archive_chunk(before, after_id=0, chunk_size=1000):
+    """
+    Move the next chunk of archivable issues to the archive, in one transaction.
+    The chunk is the next `chunk_size` archivable issue IDs after `after_id`. The issues are copied
+    with a single INSERT ... SELECT over the chunk's ID range and then deleted, so their text never
+    passes through Python. The delete bypasses the delete signals, so the issues stay counted in the
+    dashboard rollups, which mark them as archived instead (see council.stats.record_issues_archived),
+    and their waiting summary jobs are deleted with them. The search triggers move them from the issue search index to the archive's.
+    :param before: The latest resolved_at to archive, exclusive.
+    :param after_id: The ID to start after.
+    :param chunk_size: The most issues to move.
+    :return: A tuple of (issues moved, last ID in the chunk), or (0, None) if there are none left.
+    """
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(field.column) for field in Issue._meta.concrete_fields)
+    condition = f"{quote('status')} = %s AND {quote('resolved_at')} < %s AND {quote('id')} BETWEEN %s AND %s"
+
+    with transaction.atomic():
+        ids = list(
+            archivable_issues(before).filter(id__gt=after_id).order_by("id").values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0, None
+        params = ['RESOLVED', connection.ops.adapt_datetimefield_value(before), ids[0], ids[-1]]
+
+        chunk = archivable_issues(before).filter(id__range=(ids[0], ids[-1]))
+        SummaryJob.objects.filter(issue__in=chunk).delete()
+        record_issues_archived(chunk)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(ArchivedIssue._meta.db_table)} ({columns}, {quote('archived_at')}) "
+                f"SELECT {columns}, %s FROM {quote(Issue._meta.db_table)} WHERE {condition}",
+                [connection.ops.adapt_datetimefield_value(timezone.now()), *params],
+            )
+            copied = cursor.rowcount
+            cursor.execute(f"DELETE FROM {quote(Issue._meta.db_table)} WHERE {condition}", params)
+            if cursor.rowcount != copied:
+                # Rolls the chunk back rather than lose or duplicate an issue.
+                raise RuntimeError(f"Copied {copied} issues to the archive but deleted {cursor.rowcount}.")
+    return copied, ids[-1]
+
+
+def archive_issues(before, chunk_size=1000, on_chunk=None):
+    """
+    Move every issue resolved before a time to the archive, one chunk per transaction.
+    Each chunk is committed on its own, so the working table stays available between chunks, and an
+    archive that is interrupted can be run again to carry on: the issues already moved are no longer
+    archivable, and the rest are found the same way.
+    Processes with the duplicate index loaded keep archived issues in it until they restart, which
+    is harmless, as candidates are re-read from the issue table (see council.duplicates.find_duplicates).
+    :param before: The latest resolved_at to archive, exclusive.
+    :param chunk_size: The most issues moved per transaction.
+    :param on_chunk: Called with the number of issues moved so far and the issues per second after each chunk.
+    :return: The number of issues moved.
+    """
+
+    moved = 0
+    after_id = 0
+    start = time.perf_counter()
+    while True:
+        count, after_id = archive_chunk(before, after_id, chunk_size)
+        if after_id is None:
+            return moved
+        moved += count
+        if on_chunk:
+            on_chunk(moved, moved / max(time.perf_counter() - start, 1e-9))
@@ -0,0 +1,160 @@
+import threading
+import time
+from bisect import bisect_left
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+# The cache key of the staff directory version, bumped whenever a user changes. Kept in the cache
+# rather than in memory, so that with a shared cache a change made in one process reaches them all.
+VERSION_KEY = "council:staff-directory-version"
+
+
+def staff_users():
+    """
+    Return the users that issues can be assigned to: active staff.
+    """
+
+    return get_user_model().objects.filter(is_staff=True, is_active=True)
+
+
+def user_label(username, first_name="", last_name=""):
+    """
+    Return how a user is shown in the assignee picker, for example "Jane Smith (jsmith)".
+    """
+
+    full_name = f"{first_name} {last_name}".strip()
+    return f"{full_name} ({username})" if full_name else username
+
+
+class StaffDirectory:
+    """
+    An in-memory index of staff users for prefix search. Each user is indexed under their username,
+    first name, last name and full name, ignoring case, in one sorted list, so a search is a binary
+    search followed by a short walk along the matches.
+    """
+
+    def __init__(self, users):
+        """
+        :param users: (id, username, first name, last name) for every user in the directory.
+        """
+
+        self.labels = {}
+        entries = []
+        for pk, username, first_name, last_name in users:
+            self.labels[pk] = user_label(username, first_name, last_name)
+            terms = {username, first_name, last_name, f"{first_name} {last_name}"}
+            entries.extend((term.strip().casefold(), pk) for term in terms if term.strip())
+        entries.sort()
+        self._terms = [term for term, _ in entries]
+        self._ids = [pk for _, pk in entries]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def label(self, pk):
+        """
+        Return the label of a user, or None if they are not in the directory.
+        """
+
+        return self.labels.get(pk)
+
+    def search(self, prefix, limit=10):
+        """
+        Find the users with a name or username starting with a prefix.
+        :param prefix: The text typed so far. Case is ignored.
+        :param limit: The most users to return.
+        :return: A list of {"id", "label"} dictionaries, ordered by the matching name.
+        """
+
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+
+        start = bisect_left(self._terms, prefix)
+        found = {}
+        for term, pk in zip(islice(self._terms, start, None), islice(self._ids, start, None)):
+            if not term.startswith(prefix) or len(found) == limit:
+                break
+            found.setdefault(pk, None)
+        return [{"id": pk, "label": self.labels[pk]} for pk in found]
+
+
+_directory = None
+_directory_version = None
+_directory_built_at = 0.0
+_directory_lock = threading.Lock()
+
+
+def get_directory_version():
+    """
+    Return the current staff directory version, starting a new one if the cache has none.
+    """
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock, so that a cleared cache never brings back a version a process has already built.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_staff_directory():
+    """
+    Return the StaffDirectory, rebuilding it with one query if a user has changed since it was built
+    or it is older than STAFF_DIRECTORY_TTL seconds. The age limit catches changes made without
+    save(), such as QuerySet.update(), which do not bump the version.
+    """
+
+    global _directory, _directory_version, _directory_built_at
+    version = get_directory_version()
+    ttl = getattr(settings, 'STAFF_DIRECTORY_TTL', 300)
+    with _directory_lock:
+        if _directory is None or _directory_version != version or time.monotonic() - _directory_built_at > ttl:
+            _directory = StaffDirectory(staff_users().values_list("id", "username", "first_name", "last_name"))
+            _directory_version = version
+            _directory_built_at = time.monotonic()
+        return _directory
+
+
+def invalidate_staff_directory():
+    """
+    Mark the staff directory as out of date, so that every process rebuilds it on next use.
+    """
+
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # There is no version yet, so the next get_directory_version() starts a new one.
+        pass
+
+
+def reset_staff_directory():
+    """
+    Throw away this process's staff directory, so that it is rebuilt on next use.
+    """
+
+    global _directory
+    with _directory_lock:
+        _directory = None
+
+
+def assignee_label(pk):
+    """
+    Return the label of the user with the given ID, from the staff directory if they are in it.
+    Users who are not staff, such as a former member of staff still assigned to old issues, are
+    looked up by primary key.
+    :param pk: The user's ID.
+    :return: The label, or None if there is no such user.
+    """
+
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    label = get_staff_directory().label(pk)
+    if label is None:
+        user = get_user_model().objects.filter(pk=pk).values_list("username", "first_name", "last_name").first()
+        label = user_label(*user) if user else None
+    return label
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.utils import timezone
+from aisummary.models import SummaryJob
+from aisummary.queue import enqueue_summaries
+from .events import publish_status
+from .stats import record_status_change
+
+# Changes to many issues at once, for the admin's bulk actions. Each is a single UPDATE of every
+# selected issue, however many there are, rather than a save() per issue. UPDATE does not send the
+# save() signals, so anything they would keep up to date is updated here instead. The cached issue
+# cards and the list's ETag follow updated_at, which every change sets.
+
+
+def set_issue_status(queryset, status):
+    """
+    Give many issues a new status, recording when resolved issues were resolved and moving them to
+    their new rollup rows, as saving each issue would. Open pages are told about each change once it
+    is committed.
+    :param queryset: The issues to change.
+    :param status: The new status.
+    :return: The number of issues changed. Issues that already have the status are left alone.
+    """
+
+    now = timezone.now()
+    resolved_at = now if status == 'RESOLVED' else None
+
+    def publish():
+        for issue_id in changed_ids:
+            publish_status(issue_id, status)
+
+    with transaction.atomic():
+        changing = queryset.exclude(status=status)
+        changed_ids = list(changing.values_list("pk", flat=True))
+        record_status_change(changing, status, resolved_at)
+        transaction.on_commit(publish)
+        return changing.update(status=status, resolved_at=resolved_at, updated_at=now)
+
+
+def reassign_issues(queryset, user):
+    """
+    Assign many issues to one user.
+    :param queryset: The issues to change.
+    :param user: The user to assign them to, or None to unassign them.
+    :return: The number of issues changed.
+    """
+
+    return queryset.update(assigned_to=user, updated_at=timezone.now())
+
+
+def regenerate_summaries(queryset):
+    """
+    Clear the AI summaries of many issues and queue them to be summarised again, with one insert
+    for all the jobs. Issues that already have a job waiting are not queued twice, but their job is
+    forced too. Forced jobs call the backend rather than reuse the cached summary or a near-duplicate
+    issue's, which would bring the old summary back, and replace the cached summary with the new one.
+    :param queryset: The issues to summarise again.
+    :return: The number of issues cleared.
+    """
+
+    with transaction.atomic():
+        # Read the selection before clearing the summaries, as it may have been chosen by searching them.
+        issue_ids = list(queryset.values_list("pk", flat=True))
+        waiting_jobs = SummaryJob.objects.filter(issue__in=queryset, status='PENDING')
+        waiting = set(waiting_jobs.values_list("issue_id", flat=True))
+        waiting_jobs.update(force=True)
+        cleared = queryset.update(ai_summary="", ai_summary_is_draft=False, updated_at=timezone.now())
+        enqueue_summaries([issue_id for issue_id in issue_ids if issue_id not in waiting], force=True)
+    return cleared
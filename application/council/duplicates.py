@@ -0,0 +1,327 @@
+import logging
+import random
+import re
+import threading
+import zlib
+from array import array
+from django.db import connections
+from django.utils import timezone
+from .models import Issue
+
+logger = logging.getLogger(__name__)
+
+
+def issue_text(issue):
+    """
+    Return the text of an issue that is compared when looking for duplicates.
+    :param issue: The Issue instance.
+    :return: The title and description.
+    """
+
+    return f"{issue.title} {issue.description}"
+
+
+def shingles(text):
+    """
+    Split text into hashed word shingles (pairs of neighbouring words).
+    Case and punctuation are ignored. Single-word texts produce a single shingle.
+    :param text: The text to split.
+    :return: A set of 32-bit shingle hashes.
+    """
+
+    words = re.sub(r"[^\w\s]", " ", text.lower()).split()
+    if len(words) < 2:
+        return {zlib.crc32(word.encode("utf-8")) for word in words}
+    return {
+        zlib.crc32(f"{first} {second}".encode("utf-8"))
+        for first, second in zip(words, words[1:])
+    }
+
+
+class DuplicateIndex:
+    """
+    An incremental MinHash + locality-sensitive hashing index of issue text.
+    Signatures are held in one flat array of 32-bit integers, `num_perm` values per issue, and each
+    signature is split into `bands` bands that are hashed into buckets. Two issues that share a bucket
+    in any band are candidate duplicates, and candidates are ranked by the fraction of signature
+    values they have in common, which estimates the Jaccard similarity of their shingles.
+
+    Each process has its own index. Issues saved or deleted by this process are updated by signals
+    (see council.signals), and issues created by other processes are added by catch_up(). Issues
+    edited or deleted by other processes keep their old entries until the process restarts. This
+    is harmless, as find_duplicates re-checks candidates against the database, so a stale entry can
+    miss a duplicate but never return a wrong one.
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        """
+        :param num_perm: The number of MinHash values per signature.
+        :param bands: The number of LSH bands. Must divide num_perm.
+        :param seed: The seed for the hash functions, so signatures are stable between processes.
+        """
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # Each hash function is the shingle hash XORed with a random 32-bit mask.
+        rng = random.Random(seed)
+        self._masks = [rng.getrandbits(32) for _ in range(num_perm)]
+
+        self._signatures = array("I")
+        self._row_ids = array("q")
+        self._rows_by_id = {}
+        self._free_rows = []
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.RLock()
+        self.max_id = 0
+
+    def __len__(self):
+        """
+        Return the number of issues in the index.
+        """
+
+        return len(self._rows_by_id)
+
+    def __contains__(self, issue_id):
+        """
+        Return True if the issue is in the index.
+        """
+
+        return issue_id in self._rows_by_id
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of some text.
+        :param text: The text.
+        :return: An array of num_perm 32-bit values.
+        """
+
+        hashes = shingles(text)
+        if not hashes:
+            return array("I", [0xFFFFFFFF] * self.num_perm)
+        return array("I", [min(value ^ mask for value in hashes) for mask in self._masks])
+
+    def _band_keys(self, signature):
+        """
+        Hash each band of a signature to its bucket key.
+        """
+
+        rows = self.rows
+        return [hash(tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _row_signature(self, row):
+        """
+        Return the stored signature at a row.
+        """
+
+        start = row * self.num_perm
+        return self._signatures[start:start + self.num_perm]
+
+    def add(self, issue_id, text):
+        """
+        Add an issue to the index, replacing any previous entry for it.
+        :param issue_id: The ID of the issue.
+        :param text: The text of the issue.
+        """
+
+        signature = self.signature(text)
+        with self._lock:
+            self.remove(issue_id)
+            if self._free_rows:
+                row = self._free_rows.pop()
+                start = row * self.num_perm
+                self._signatures[start:start + self.num_perm] = signature
+                self._row_ids[row] = issue_id
+            else:
+                row = len(self._row_ids)
+                self._signatures.extend(signature)
+                self._row_ids.append(issue_id)
+            self._rows_by_id[issue_id] = row
+
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, []).append(row)
+            self.max_id = max(self.max_id, issue_id)
+
+    def remove(self, issue_id):
+        """
+        Remove an issue from the index, if it is there.
+        :param issue_id: The ID of the issue.
+        """
+
+        with self._lock:
+            row = self._rows_by_id.pop(issue_id, None)
+            if row is None:
+                return
+
+            for band, key in enumerate(self._band_keys(self._row_signature(row))):
+                bucket = self._buckets[band][key]
+                bucket.remove(row)
+                if not bucket:
+                    del self._buckets[band][key]
+            self._row_ids[row] = -1
+            self._free_rows.append(row)
+
+    def similarity(self, first, second):
+        """
+        Estimate the Jaccard similarity of two signatures.
+        :return: The fraction of signature values the two have in common.
+        """
+
+        return sum(1 for a, b in zip(first, second) if a == b) / self.num_perm
+
+    def query(self, text, k=5, min_similarity=0.5, exclude=None):
+        """
+        Find the issues most similar to some text.
+        :param text: The text to look up.
+        :param k: The maximum number of results.
+        :param min_similarity: The lowest estimated similarity to return.
+        :param exclude: An issue ID to leave out of the results, usually the issue being looked up.
+        :return: A list of (issue ID, estimated similarity) tuples, most similar first.
+        """
+
+        signature = self.signature(text)
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            results = []
+            for row in candidates:
+                issue_id = self._row_ids[row]
+                if issue_id == exclude:
+                    continue
+                score = self.similarity(signature, self._row_signature(row))
+                if score >= min_similarity:
+                    results.append((issue_id, score))
+
+        results.sort(key=lambda result: (-result[1], -result[0]))
+        return results[:k]
+
+    def catch_up(self):
+        """
+        Add issues created since the index was last loaded, including those saved by other processes.
+        :return: The number of issues added.
+        """
+
+        added = 0
+        new_issues = Issue.objects.filter(pk__gt=self.max_id).order_by("pk").only("id", "title", "description")
+        for issue in new_issues.iterator(chunk_size=2000):
+            self.add(issue.pk, issue_text(issue))
+            added += 1
+        return added
+
+    def reindex_updated(self, since):
+        """
+        Index again the issues saved since a time, such as those edited while the index was loading.
+        :param since: The earliest updated_at to index again.
+        :return: The number of issues indexed.
+        """
+
+        updated = 0
+        issues = Issue.objects.filter(updated_at__gte=since).only("id", "title", "description")
+        for issue in issues.iterator(chunk_size=2000):
+            self.add(issue.pk, issue_text(issue))
+            updated += 1
+        return updated
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_duplicate_index():
+    """
+    Return the process-wide duplicate index, loading it from the database the first time.
+    Loading reads every issue, which takes seconds on a large table, so servers load it in the
+    background when they start (see load_duplicate_index_in_background).
+    :return: The DuplicateIndex.
+    """
+
+    global _index
+    with _index_lock:
+        if _index is None:
+            started = timezone.now()
+            index = DuplicateIndex()
+            index.catch_up()
+            _index = index
+            # Edits saved while the index was loading were not seen by the signals, which only
+            # update a loaded index, and may have been read before they were made.
+            index.reindex_updated(started)
+    return _index
+
+
+def load_duplicate_index_in_background():
+    """
+    Start loading the process-wide duplicate index on a daemon thread, so that no request waits for it.
+    :return: The thread.
+    """
+
+    def load():
+        try:
+            get_duplicate_index()
+        except Exception:
+            logger.exception("Could not load the duplicate index.")
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=load, name="duplicate-index", daemon=True)
+    thread.start()
+    return thread
+
+
+def loaded_duplicate_index():
+    """
+    Return the process-wide duplicate index if it has been loaded, otherwise None.
+    """
+
+    return _index
+
+
+def reset_duplicate_index():
+    """
+    Throw away the process-wide duplicate index so that it is reloaded on next use.
+    """
+
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def find_duplicates(issue, k=5, min_similarity=0.5, wait=True):
+    """
+    Find likely duplicates of an issue.
+    Candidates from the index are re-checked against their current text in the database, so an index
+    that is out of date can miss a duplicate but never return a wrong one.
+    :param issue: The Issue instance to find duplicates of.
+    :param k: The maximum number of duplicates to return.
+    :param min_similarity: The lowest similarity to return, between 0 and 1.
+    :param wait: Load the index if it has not been loaded. If False, no duplicates are found until
+        it has been, which keeps requests fast while the index loads in the background.
+    :return: A list of Issue instances, most similar first, each with a `similarity` attribute.
+    """
+
+    index = get_duplicate_index() if wait else loaded_duplicate_index()
+    if index is None:
+        return []
+    index.catch_up()
+
+    text = issue_text(issue)
+    candidate_ids = [
+        issue_id for issue_id, _ in index.query(text, k=k * 2, min_similarity=min_similarity, exclude=issue.pk)
+    ]
+    if not candidate_ids:
+        return []
+
+    signature = index.signature(text)
+    duplicates = []
+    for candidate in Issue.objects.filter(pk__in=candidate_ids):
+        candidate.similarity = index.similarity(signature, index.signature(issue_text(candidate)))
+        if candidate.similarity >= min_similarity:
+            duplicates.append(candidate)
+
+    duplicates.sort(key=lambda candidate: (-candidate.similarity, -candidate.pk))
+    return duplicates[:k]
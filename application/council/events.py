@@ -0,0 +1,246 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from .models import Issue
+
+
+class IssueEvent:
+    """
+    Something that happened to an issue, sent to browsers as a server-sent event.
+    """
+
+    def __init__(self, event_id, name, issue_id, data):
+        """
+        :param event_id: The event's ID, increasing with every event published by this process.
+        :param name: The kind of event, "summary" or "status".
+        :param issue_id: The ID of the issue.
+        :param data: A JSON-serialisable dictionary describing the change.
+        """
+
+        self.id = event_id
+        self.name = name
+        self.issue_id = issue_id
+        self.data = {"issue": issue_id, **data}
+
+    def encode(self):
+        """
+        Return the event in the text/event-stream format.
+        """
+
+        return f"id: {self.id}\nevent: {self.name}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class Subscription:
+    """
+    One client's queue of events. The queue belongs to the event loop the client subscribed from,
+    and events published from other threads are handed to that loop.
+    """
+
+    def __init__(self, loop, issue_ids, queue_size):
+        """
+        :param loop: The subscriber's event loop.
+        :param issue_ids: The IDs of the issues to receive events for, or None for every issue.
+        :param queue_size: The most events that may wait to be read.
+        """
+
+        self.loop = loop
+        self.issue_ids = issue_ids
+        self.queue = asyncio.Queue(queue_size)
+        self.closed = False
+
+    def wants(self, event):
+        """
+        Return True if the event is about one of the subscribed issues.
+        """
+
+        return self.issue_ids is None or event.issue_id in self.issue_ids
+
+    def deliver(self, event):
+        """
+        Add an event to the queue. Runs on the subscriber's loop.
+        If the client has fallen too far behind, its waiting events are dropped and its stream is
+        ended, so it reconnects and catches up from the broker's history instead of holding memory.
+        """
+
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        """
+        Wait for the next event.
+        :return: The IssueEvent, or None if the stream should end.
+        """
+
+        return await self.queue.get()
+
+
+class EventBroker:
+    """
+    An in-process publish/subscribe hub for issue events.
+    Events may be published from any thread, such as a request thread or a summary worker, and are
+    delivered to subscribers waiting on an event loop. The latest events are kept, so a client that
+    reconnects with the last event ID it saw is sent the events it missed. Each process has its own
+    broker, so clients only hear about changes made by the process serving them.
+    """
+
+    def __init__(self, history_size=1000, queue_size=100):
+        """
+        :param history_size: The number of recent events kept for clients that reconnect.
+        :param queue_size: The most events that may wait for one subscriber.
+        """
+
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        # Event IDs start from the time the process started, so IDs from an earlier process are
+        # always lower, and a client that saw them is told it has missed events.
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._next_id = next(self._ids)
+
+    def publish(self, name, issue_id, data):
+        """
+        Send an event to every subscriber interested in the issue.
+        :param name: The kind of event.
+        :param issue_id: The ID of the issue.
+        :param data: A JSON-serialisable dictionary describing the change.
+        :return: The IssueEvent.
+        """
+
+        with self._lock:
+            event = IssueEvent(self._next_id, name, issue_id, data)
+            self._next_id = next(self._ids)
+            self._history.append(event)
+            # Delivering while holding the lock keeps every subscriber's events in ID order.
+            for subscription in list(self._subscribers):
+                if not subscription.wants(event):
+                    continue
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+                except RuntimeError:
+                    # The subscriber's loop has closed.
+                    self._subscribers.discard(subscription)
+        return event
+
+    def replay(self, after_id, issue_ids=None):
+        """
+        Return the kept events published after an event.
+        :param after_id: The ID of the last event the client saw.
+        :param issue_ids: The IDs of the issues to include, or None for every issue.
+        :return: A list of IssueEvent, or None if some of the events after `after_id` are no longer kept.
+        """
+
+        with self._lock:
+            return self._replay(after_id, issue_ids)
+
+    def _replay(self, after_id, issue_ids):
+        oldest_id = self._history[0].id if self._history else self._next_id
+        if after_id + 1 < oldest_id:
+            return None
+        return [
+            event for event in self._history
+            if event.id > after_id and (issue_ids is None or event.issue_id in issue_ids)
+        ]
+
+    def subscribe(self, issue_ids=None, last_event_id=None):
+        """
+        Start receiving events on the running event loop.
+        :param issue_ids: The IDs of the issues to receive events for, or None for every issue.
+        :param last_event_id: The ID of the last event the client saw, if it is reconnecting.
+        :return: A tuple of (Subscription, missed events). The missed events are a list, empty for a
+            new client, or None if they are no longer kept and the client should reload instead.
+        """
+
+        subscription = Subscription(asyncio.get_running_loop(), issue_ids, self.queue_size)
+        with self._lock:
+            missed = [] if last_event_id is None else self._replay(last_event_id, issue_ids)
+            self._subscribers.add(subscription)
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        """
+        Stop sending events to a subscriber.
+        """
+
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        """
+        Return the number of subscribers.
+        """
+
+        with self._lock:
+            return len(self._subscribers)
+
+
+# The issue events of this process, streamed to browsers at /api/v1/issues/events.
+event_broker = EventBroker(
+    history_size=getattr(settings, 'ISSUE_EVENT_HISTORY', 1000),
+    queue_size=getattr(settings, 'ISSUE_EVENT_QUEUE_SIZE', 100),
+)
+
+
+def publish_summary(issue_id, summary):
+    """
+    Announce that an issue's AI summary has been saved.
+    :param issue_id: The ID of the issue.
+    :param summary: The new summary.
+    """
+
+    event_broker.publish("summary", issue_id, {"summary": summary})
+
+
+def publish_status(issue_id, status):
+    """
+    Announce that an issue's status has changed.
+    :param issue_id: The ID of the issue.
+    :param status: The new status.
+    """
+
+    event_broker.publish("status", issue_id, {"status": status, "status_display": dict(Issue.ISSUE_STATUS)[status]})
+
+
+async def stream_events(issue_ids=None, last_event_id=None, broker=None):
+    """
+    Yield issue events in the text/event-stream format until the client goes away.
+    A comment is sent when the stream has been idle for ISSUE_EVENT_KEEPALIVE seconds, so that proxies
+    keep the connection open. If the client has missed events that are no longer kept, a "reload"
+    event is sent first.
+    :param issue_ids: The IDs of the issues to send events for, or None for every issue.
+    :param last_event_id: The ID of the last event the client saw, if it is reconnecting.
+    :param broker: The EventBroker, defaults to this process's.
+    """
+
+    broker = broker or event_broker
+    keepalive = getattr(settings, 'ISSUE_EVENT_KEEPALIVE', 15)
+    subscription, missed = broker.subscribe(issue_ids, last_event_id)
+    try:
+        # How long the browser waits before reconnecting, in milliseconds.
+        yield "retry: 3000\n\n"
+        if missed is None:
+            yield "event: reload\ndata: {}\n\n"
+        for event in missed or []:
+            yield event.encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,79 @@
+import csv
+from django.utils import timezone
+
+# The header row of the CSV export.
+CSV_COLUMNS = [
+    "ID", "Title", "Category", "Status", "Assigned to", "Email", "Created", "Updated",
+    "Description", "AI summary",
+]
+
+# Spreadsheet programs treat cells starting with these characters as formulas.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class Echo:
+    """
+    A file-like object that returns what is written to it instead of storing it, so that csv.writer
+    can produce one line at a time for a streaming response.
+    """
+
+    def write(self, value):
+        """
+        Return the value written.
+        """
+
+        return value
+
+
+def safe_cell(value):
+    """
+    Stop text typed by residents from being run as a formula when the export is opened in a spreadsheet.
+    :param value: The cell text.
+    :return: The text, with a leading quote if it starts like a formula.
+    """
+
+    if value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def issue_csv_row(issue):
+    """
+    Convert an issue to a row of the CSV export.
+    :param issue: The Issue instance, with assigned_to selected.
+    :return: A list of cell values in the order of CSV_COLUMNS.
+    """
+
+    assigned_to = issue.assigned_to.get_username() if issue.assigned_to_id is not None else ""
+    return [
+        issue.pk,
+        safe_cell(issue.title),
+        issue.get_category_display(),
+        issue.get_status_display(),
+        assigned_to,
+        safe_cell(issue.email),
+        timezone.localtime(issue.created_at).strftime("%Y-%m-%d %H:%M"),
+        timezone.localtime(issue.updated_at).strftime("%Y-%m-%d %H:%M"),
+        safe_cell(issue.description),
+        safe_cell(issue.ai_summary),
+    ]
+
+
+def stream_csv(rows, rows_per_write=200):
+    """
+    Encode issues as CSV, yielding a few hundred lines at a time, starting with the header.
+    :param rows: An iterator of Issue instances.
+    :param rows_per_write: The number of rows joined into each piece of the response body.
+    """
+
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+
+    lines = []
+    for issue in rows:
+        lines.append(writer.writerow(issue_csv_row(issue)))
+        if len(lines) == rows_per_write:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
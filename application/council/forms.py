@@ -1,5 +1,10 @@
+from datetime import datetime, time, timedelta
 from django import forms
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
 from .models import Issue
+from .widgets import AssigneePicker
 
 
 class IssueForm(forms.ModelForm):
@@ -43,6 +48,93 @@ class EditForm(forms.ModelForm):
             "category": forms.Select(attrs={"class": "form-control"}),
             "description": forms.Textarea(attrs={"class": "form-control", "placeholder": "Detailed description of the issue"}),
             "email": forms.TextInput(attrs={"class": "form-control", "placeholder": "Enter your email address here"}),
-            "assigned_to": forms.Select(attrs={"class": "form-control", "placeholder": "Assigned resource"}),
+            "assigned_to": AssigneePicker(attrs={"class": "form-control"}, placeholder="Assigned resource"),
             "status": forms.Select(attrs={"class": "form-control", "placeholder": "Change issue status"}),
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Issues can be assigned to active staff. The current assignee stays valid, so an issue
+        # assigned to someone who has since left can still be edited without reassigning it.
+        self.fields["assigned_to"].queryset = get_user_model().objects.filter(
+            Q(is_staff=True, is_active=True) | Q(pk=self.instance.assigned_to_id)
+        )
+
+    def save(self, commit=True):
+        """
+        Save the issue. A summary written by staff is never a draft, so it is not replaced.
+        """
+
+        if "ai_summary" in self.changed_data:
+            self.instance.ai_summary_is_draft = False
+        return super().save(commit)
+
+
+class IssueFilterForm(forms.Form):
+    """
+    The form for filtering the list of issues. Every field is optional.
+    """
+
+    status = forms.ChoiceField(
+        choices=[("", "Any status")] + Issue.ISSUE_STATUS,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    category = forms.ChoiceField(
+        choices=[("", "Any category")] + Issue.ISSUE_CATEGORIES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    assigned_to = forms.ModelChoiceField(
+        queryset=get_user_model().objects.all(),
+        required=False,
+        widget=AssigneePicker(attrs={"class": "form-control"}, placeholder="Anyone"),
+    )
+    created_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+    )
+    created_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"class": "form-control", "type": "date"}),
+    )
+
+    def clean_assigned_to(self):
+        """
+        Give the chosen user to the picker, so that it shows their name without fetching them again.
+        """
+
+        user = self.cleaned_data["assigned_to"]
+        self.fields["assigned_to"].widget.selected_user = user
+        return user
+
+    def filter(self, queryset):
+        """
+        Apply the valid filters to a queryset of issues. Invalid filters are ignored.
+        :param queryset: The queryset to filter.
+        :return: The filtered queryset.
+        """
+
+        self.is_valid()
+        data = getattr(self, "cleaned_data", {})
+
+        if data.get("status"):
+            queryset = queryset.filter(status=data["status"])
+        if data.get("category"):
+            queryset = queryset.filter(category=data["category"])
+        if data.get("assigned_to"):
+            queryset = queryset.filter(assigned_to=data["assigned_to"])
+
+        # Compare created_at against datetimes rather than using __date, so the index can be used.
+        if data.get("created_from"):
+            start = timezone.make_aware(datetime.combine(data["created_from"], time.min))
+            queryset = queryset.filter(created_at__gte=start)
+        if data.get("created_to"):
+            end = timezone.make_aware(datetime.combine(data["created_to"] + timedelta(days=1), time.min))
+            queryset = queryset.filter(created_at__lt=end)
+        elif data.get("created_from"):
+            # Close an open-ended range at the present. Without an upper bound SQLite estimates that
+            # most rows match and scans the whole table instead of using the created_at index.
+            queryset = queryset.filter(created_at__lte=timezone.now())
+        return queryset
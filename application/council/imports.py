@@ -0,0 +1,139 @@
+import csv
+import json
+import time
+from itertools import islice
+from django.db import transaction
+from django.db.models import F
+from aisummary.queue import enqueue_summaries
+from .forms import IssueForm
+from .models import ImportCheckpoint, Issue
+from .stats import record_issues_created
+
+# The file extensions recognised for each import format.
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+
+def detect_format(path):
+    """
+    Work out the format of an import file from its extension.
+    :param path: The path of the file.
+    :return: "csv" or "jsonl", or None if the extension is not recognised.
+    """
+
+    for extension, file_format in FORMATS.items():
+        if path.lower().endswith(extension):
+            return file_format
+    return None
+
+
+def read_csv_rows(stream):
+    """
+    Read issues from a CSV file with a header row, one row at a time.
+    :param stream: A text file opened with newline="".
+    :return: An iterator of dictionaries keyed on the header.
+    """
+
+    return csv.DictReader(stream)
+
+
+def read_jsonl_rows(stream):
+    """
+    Read issues from a file with one JSON object per line, one line at a time.
+    Blank lines are skipped. Lines that are not valid JSON are yielded as None so that they are
+    counted and reported as rejected rows.
+    :param stream: A text file.
+    :return: An iterator of dictionaries.
+    """
+
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def build_issue(row):
+    """
+    Validate a row with the same rules as the form used to report an issue.
+    :param row: A dictionary of field values.
+    :return: A tuple of (unsaved Issue, None), or (None, errors) if the row is invalid, where errors
+        maps each field name to a list of messages.
+    """
+
+    if not isinstance(row, dict):
+        return None, {"__all__": ["The row is not a JSON object."]}
+
+    form = IssueForm(data=row)
+    if not form.is_valid():
+        return None, form.errors
+    return form.save(commit=False), None
+
+
+def import_issues(rows, source, batch_size=1000, queue_summaries=True, on_batch=None, on_error=None):
+    """
+    Import issues in batches, resuming from the checkpoint for `source` if there is one.
+    Each batch of valid rows is inserted with a single bulk insert, and its summary jobs are queued
+    with a second, in the same transaction as the rollup and checkpoint updates. An import that is
+    interrupted can therefore be run again and will carry on from the end of the last batch that was
+    saved, without importing or queueing anything twice.
+    :param rows: An iterator of dictionaries, as returned by read_csv_rows or read_jsonl_rows.
+    :param source: The name the checkpoint is stored under.
+    :param batch_size: The number of rows read per transaction.
+    :param queue_summaries: Whether to queue AI summaries for the imported issues.
+    :param on_batch: Called with the checkpoint and the rows per second so far after each batch.
+    :param on_error: Called with the row number and errors of each rejected row.
+    :return: The ImportCheckpoint.
+    """
+
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+    if checkpoint.finished:
+        return checkpoint
+
+    # Skip the rows that were saved by an earlier run.
+    rows = islice(rows, checkpoint.rows_read, None)
+    row_number = checkpoint.rows_read
+    start = time.perf_counter()
+    read_this_run = 0
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        issues = []
+        rejected = 0
+        for row in batch:
+            row_number += 1
+            issue, errors = build_issue(row)
+            if issue is None:
+                rejected += 1
+                if on_error:
+                    on_error(row_number, errors)
+            else:
+                issues.append(issue)
+
+        with transaction.atomic():
+            created = Issue.objects.bulk_create(issues)
+            record_issues_created(created)
+            if queue_summaries:
+                enqueue_summaries([issue.pk for issue in created])
+            ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                rows_read=F("rows_read") + len(batch),
+                imported=F("imported") + len(created),
+                rejected=F("rejected") + rejected,
+            )
+
+        checkpoint.refresh_from_db()
+        read_this_run += len(batch)
+        if on_batch:
+            on_batch(checkpoint, read_this_run / (time.perf_counter() - start))
+
+    ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(finished=True)
+    checkpoint.refresh_from_db()
+    return checkpoint
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from council.archive import archivable_issues, archive_issues
+
+
+class Command(BaseCommand):
+    """
+    Moves issues resolved long ago from the issue table to the archive.
+    """
+
+    help = "Archive issues resolved more than --days days ago, in resumable chunks."
+
+    def add_arguments(self, parser):
+        """
+        Add the command line options.
+        """
+
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, 'ARCHIVE_AFTER_DAYS', 365),
+            help="Archive issues resolved more than this many days ago.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="The number of issues moved per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Count the issues that would be archived without moving them.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Archive the issues chunk by chunk, reporting progress after each one.
+        """
+
+        if options["days"] < 0:
+            raise CommandError("--days cannot be negative.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        before = timezone.now() - timedelta(days=options["days"])
+        if options["dry_run"]:
+            count = archivable_issues(before).count()
+            self.stdout.write(f"{count} issues resolved before {before:%Y-%m-%d %H:%M} would be archived.")
+            return
+
+        moved = archive_issues(before, chunk_size=options["chunk_size"], on_chunk=self.report_progress)
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} issues resolved before {before:%Y-%m-%d %H:%M}."))
+
+    def report_progress(self, moved, issues_per_second):
+        """
+        Print the running total after a chunk has been moved.
+        """
+
+        self.stdout.write(f"{moved} issues archived ({issues_per_second:.0f} issues/s)")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from council.stats import find_stat_differences
+
+
+class Command(BaseCommand):
+    """
+    Compares the dashboard's issue rollups with a full count of the issue table.
+    """
+
+    help = "Check that the issue statistics rollups match a full recount."
+
+    def handle(self, *args, **options):
+        """
+        List every rollup row that differs from the recount, and fail if there are any.
+        """
+
+        differences = find_stat_differences()
+        for (day, category, status), stored, counted in differences:
+            self.stderr.write(
+                f"{day} {category} {status}: stored {stored[0]} issues ({stored[1]} to resolve, {stored[2]} archived), "
+                f"counted {counted[0]} issues ({counted[1]} to resolve, {counted[2]} archived)"
+            )
+        if differences:
+            raise CommandError(
+                f"{len(differences)} rollup rows are out of date. Run rebuild_issue_stats to fix them."
+            )
+        self.stdout.write(self.style.SUCCESS("The rollups match the issue table."))
@@ -0,0 +1,110 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from council.imports import detect_format, import_issues, read_csv_rows, read_jsonl_rows
+from council.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    """
+    Imports issues from a CSV or JSON Lines file.
+    """
+
+    help = "Import issues from a CSV or JSON Lines file, resuming from the last checkpoint."
+
+    # The most rejected rows printed in full. The rest are only counted.
+    max_errors_shown = 20
+
+    def add_arguments(self, parser):
+        """
+        Add the command line options.
+        """
+
+        parser.add_argument("path", help="The file to import.")
+        parser.add_argument(
+            "--format", choices=["csv", "jsonl"],
+            help="The file format. Worked out from the file extension if not given.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="The number of rows saved per transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="The name to store progress under. Defaults to the absolute path of the file.",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Discard any saved progress and import the whole file again.",
+        )
+        parser.add_argument(
+            "--no-summaries", action="store_true",
+            help="Do not queue AI summaries for the imported issues.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Stream the file into the database in batches, reporting progress after each one.
+        """
+
+        path = options["path"]
+        file_format = options["format"] or detect_format(path)
+        if file_format is None:
+            raise CommandError("Cannot tell the file format from its extension. Pass --format.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        source = options["checkpoint"] or os.path.abspath(path)
+        if options["restart"]:
+            ImportCheckpoint.objects.filter(source=source).delete()
+
+        previous = ImportCheckpoint.objects.filter(source=source).first()
+        if previous and previous.finished:
+            self.stdout.write(f"{path} has already been imported. Pass --restart to import it again.")
+            return
+        if previous:
+            self.stdout.write(f"Resuming after row {previous.rows_read}.")
+
+        self.errors_shown = 0
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as stream:
+                reader = read_csv_rows if file_format == "csv" else read_jsonl_rows
+                checkpoint = import_issues(
+                    reader(stream),
+                    source,
+                    batch_size=options["batch_size"],
+                    queue_summaries=not options["no_summaries"],
+                    on_batch=self.report_progress,
+                    on_error=self.report_error,
+                )
+        except OSError as error:
+            raise CommandError(f"Cannot read {path}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {checkpoint.imported} issues from {checkpoint.rows_read} rows "
+            f"({checkpoint.rejected} rejected)."
+        ))
+
+    def report_progress(self, checkpoint, rows_per_second):
+        """
+        Print the running totals after a batch has been saved.
+        """
+
+        self.stdout.write(
+            f"{checkpoint.rows_read} rows read, {checkpoint.imported} imported, "
+            f"{checkpoint.rejected} rejected ({rows_per_second:.0f} rows/s)"
+        )
+
+    def report_error(self, row_number, errors):
+        """
+        Print why a row was rejected, up to max_errors_shown rows.
+        """
+
+        self.errors_shown += 1
+        if self.errors_shown <= self.max_errors_shown:
+            messages = "; ".join(
+                f"{field}: {' '.join(field_errors)}"
+                for field, field_errors in errors.items()
+            )
+            self.stderr.write(f"Row {row_number} rejected: {messages}")
+        elif self.errors_shown == self.max_errors_shown + 1:
+            self.stderr.write("Further rejected rows are counted but not shown.")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from council.stats import rebuild_issue_stats
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the dashboard's issue rollups from a full count of the issue table.
+    """
+
+    help = "Rebuild the issue statistics rollups."
+
+    def handle(self, *args, **options):
+        """
+        Replace every rollup row with a fresh count.
+        """
+
+        rows = rebuild_issue_stats()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} rollup rows."))
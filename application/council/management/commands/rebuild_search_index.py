@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from council.search import rebuild_search_index, search_supported
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text search index over issues from scratch.
+    """
+
+    help = "Rebuild the issue search index."
+
+    def handle(self, *args, **options):
+        """
+        Drop and recreate the search table and triggers, then index every issue in bulk.
+        """
+
+        if not search_supported():
+            raise CommandError("Full-text search requires SQLite with FTS5.")
+
+        count = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} issues."))
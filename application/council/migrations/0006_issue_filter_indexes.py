@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0005_alter_issue_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['status', 'id'], name='council_issue_status_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['category', 'id'], name='council_issue_category_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['assigned_to', 'status', 'id'], name='council_issue_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['created_at'], name='council_issue_created_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# The SQL as it was when this migration was written, so later changes to council.search
+# do not change what the migration does.
+CREATE_SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS council_issue_fts USING fts5(
+        title, description, ai_summary,
+        content='council_issue', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS council_issue_fts_insert AFTER INSERT ON council_issue BEGIN
+        INSERT INTO council_issue_fts(rowid, title, description, ai_summary)
+        VALUES (new.id, new.title, new.description, new.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS council_issue_fts_delete AFTER DELETE ON council_issue BEGIN
+        INSERT INTO council_issue_fts(council_issue_fts, rowid, title, description, ai_summary)
+        VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS council_issue_fts_update
+    AFTER UPDATE OF title, description, ai_summary ON council_issue BEGIN
+        INSERT INTO council_issue_fts(council_issue_fts, rowid, title, description, ai_summary)
+        VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+        INSERT INTO council_issue_fts(rowid, title, description, ai_summary)
+        VALUES (new.id, new.title, new.description, new.ai_summary);
+    END
+    """,
+    # Index the rows already in the table.
+    "INSERT INTO council_issue_fts(council_issue_fts) VALUES ('rebuild')",
+]
+
+DROP_SEARCH_INDEX_SQL = [
+    "DROP TRIGGER IF EXISTS council_issue_fts_insert",
+    "DROP TRIGGER IF EXISTS council_issue_fts_delete",
+    "DROP TRIGGER IF EXISTS council_issue_fts_update",
+    "DROP TABLE IF EXISTS council_issue_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create the FTS5 search table and its triggers. Only SQLite is supported.
+    """
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in CREATE_SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    """
+    Drop the FTS5 search table and its triggers.
+    """
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("council", "0006_issue_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:11
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_issue_stats(apps, schema_editor):
+    """
+    Backfill resolved_at for resolved issues from their last update, then count every issue into the rollups.
+    """
+
+    Issue = apps.get_model("council", "Issue")
+    IssueStat = apps.get_model("council", "IssueStat")
+
+    Issue.objects.filter(status="RESOLVED", resolved_at__isnull=True).update(resolved_at=F("updated_at"))
+
+    resolution_time = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
+    rows = (
+        Issue.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "category", "status")
+        .annotate(count=Count("id"), total_resolution_time=Sum(resolution_time))
+        .order_by()
+    )
+    IssueStat.objects.bulk_create([
+        IssueStat(
+            day=row["day"],
+            category=row["category"],
+            status=row["status"],
+            count=row["count"],
+            total_resolution_time=row["total_resolution_time"] or datetime.timedelta(0),
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0008_importcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='IssueStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category', models.CharField(choices=[('POTHOLE', 'Pothole'), ('STREET_LIGHTING', 'Street Lighting'), ('GRAFFITI', 'Graffiti'), ('ASB', 'Anti-Social Behaviour'), ('FLY_TIPPING', 'Fly-Tipping'), ('BLOCKED_DRAIN', 'Blocked Drains'), ('OTHER', 'Other')], max_length=50)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('IN_PROGRESS', 'In Progress'), ('RESOLVED', 'Resolved')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('total_resolution_time', models.DurationField(default=datetime.timedelta(0))),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'category', 'status'), name='council_issuestat_unique')],
+            },
+        ),
+        migrations.RunPython(build_issue_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0009_issue_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('ai_summary', '')), fields=['id'], name='council_issue_unsummarised_idx'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The SQL as it was when this migration was written, so later changes to council.search
+# do not change what the migration does.
+CREATE_ARCHIVE_SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS council_archivedissue_fts USING fts5(
+        title, description, ai_summary,
+        content='council_archivedissue', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS council_archivedissue_fts_insert AFTER INSERT ON council_archivedissue BEGIN
+        INSERT INTO council_archivedissue_fts(rowid, title, description, ai_summary)
+        VALUES (new.id, new.title, new.description, new.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS council_archivedissue_fts_delete AFTER DELETE ON council_archivedissue BEGIN
+        INSERT INTO council_archivedissue_fts(council_archivedissue_fts, rowid, title, description, ai_summary)
+        VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS council_archivedissue_fts_update
+    AFTER UPDATE OF title, description, ai_summary ON council_archivedissue BEGIN
+        INSERT INTO council_archivedissue_fts(council_archivedissue_fts, rowid, title, description, ai_summary)
+        VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+        INSERT INTO council_archivedissue_fts(rowid, title, description, ai_summary)
+        VALUES (new.id, new.title, new.description, new.ai_summary);
+    END
+    """,
+    # Index the rows already in the table.
+    "INSERT INTO council_archivedissue_fts(council_archivedissue_fts) VALUES ('rebuild')",
+]
+
+DROP_ARCHIVE_SEARCH_INDEX_SQL = [
+    "DROP TRIGGER IF EXISTS council_archivedissue_fts_insert",
+    "DROP TRIGGER IF EXISTS council_archivedissue_fts_delete",
+    "DROP TRIGGER IF EXISTS council_archivedissue_fts_update",
+    "DROP TABLE IF EXISTS council_archivedissue_fts",
+]
+
+
+def create_archive_search_index(apps, schema_editor):
+    """
+    Create the FTS5 search table over archived issues and its triggers. Only SQLite is supported.
+    """
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in CREATE_ARCHIVE_SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+
+
+def drop_archive_search_index(apps, schema_editor):
+    """
+    Drop the FTS5 search table over archived issues and its triggers.
+    """
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_ARCHIVE_SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0010_issue_unsummarised_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedIssue',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('ai_summary', models.TextField()),
+                ('description', models.TextField()),
+                ('category', models.CharField(choices=[('POTHOLE', 'Pothole'), ('STREET_LIGHTING', 'Street Lighting'), ('GRAFFITI', 'Graffiti'), ('ASB', 'Anti-Social Behaviour'), ('FLY_TIPPING', 'Fly-Tipping'), ('BLOCKED_DRAIN', 'Blocked Drains'), ('OTHER', 'Other')], max_length=50)),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('IN_PROGRESS', 'In Progress'), ('RESOLVED', 'Resolved')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField()),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_issues', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(create_archive_search_index, drop_archive_search_index),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def count_archived_issues(apps, schema_editor):
+    """
+    Count the issues archived so far into the rollups.
+    """
+
+    ArchivedIssue = apps.get_model("council", "ArchivedIssue")
+    IssueStat = apps.get_model("council", "IssueStat")
+
+    rows = (
+        ArchivedIssue.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "category", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        IssueStat.objects.update_or_create(
+            day=row["day"], category=row["category"], status=row["status"],
+            defaults={"archived_count": row["count"]},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0011_archivedissue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issuestat',
+            name='archived_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_archived_issues, migrations.RunPython.noop),
+    ]
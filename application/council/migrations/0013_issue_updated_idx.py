@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0012_issuestat_archived_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['updated_at'], name='council_issue_updated_idx'),
+        ),
+    ]
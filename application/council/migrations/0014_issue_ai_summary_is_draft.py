@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+# SQLite adds the columns by rebuilding the tables, which drops their search index triggers (see
+# 0007_issue_search_index and 0011_archivedissue). They are created again as they were.
+SEARCH_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS {search_table}_insert AFTER INSERT ON {content_table} BEGIN
+        INSERT INTO {search_table}(rowid, title, description, ai_summary)
+        VALUES (new.id, new.title, new.description, new.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {search_table}_delete AFTER DELETE ON {content_table} BEGIN
+        INSERT INTO {search_table}({search_table}, rowid, title, description, ai_summary)
+        VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {search_table}_update
+    AFTER UPDATE OF title, description, ai_summary ON {content_table} BEGIN
+        INSERT INTO {search_table}({search_table}, rowid, title, description, ai_summary)
+        VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+        INSERT INTO {search_table}(rowid, title, description, ai_summary)
+        VALUES (new.id, new.title, new.description, new.ai_summary);
+    END
+    """,
+]
+
+SEARCH_INDEXES = {
+    "council_issue_fts": "council_issue",
+    "council_archivedissue_fts": "council_archivedissue",
+}
+
+
+def restore_search_triggers(apps, schema_editor):
+    """
+    Create the search index triggers again after the tables are rebuilt. Only SQLite has them.
+    """
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for search_table, content_table in SEARCH_INDEXES.items():
+            for statement in SEARCH_TRIGGERS_SQL:
+                cursor.execute(statement.format(search_table=search_table, content_table=content_table))
+
+
+def mark_drafts(apps, schema_editor):
+    """
+    Mark the issues showing a draft summary. Drafts are only saved as an issue is queued, so an
+    issue with a summary and a job still waiting is showing a draft.
+    """
+
+    Issue = apps.get_model("council", "Issue")
+    SummaryJob = apps.get_model("aisummary", "SummaryJob")
+
+    waiting = SummaryJob.objects.filter(status__in=["PENDING", "RUNNING"]).values("issue_id")
+    Issue.objects.filter(pk__in=waiting).exclude(ai_summary="").update(ai_summary_is_draft=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('council', '0013_issue_updated_idx'),
+        ('aisummary', '0004_summaryjob_force'),
+    ]
+
+    operations = [
+        # Undoing the AddFields rebuilds the tables too.
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='archivedissue',
+            name='ai_summary_is_draft',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='ai_summary_is_draft',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+        migrations.RunPython(mark_drafts, migrations.RunPython.noop),
+    ]
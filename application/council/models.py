@@ -1,7 +1,9 @@
 from django.db import models
 from django.db import models
 from django.conf import settings
+from datetime import timedelta
 from django.urls import reverse
+from django.utils import timezone
 
 
 class Issue(models.Model):
@@ -31,6 +33,10 @@ class Issue(models.Model):
     ai_summary = models.TextField()
     description = models.TextField()
 
+    # Whether ai_summary is a quick draft, shown until the real summary replaces it (see
+    # aisummary.backends.SummaryBackend.draft). Cleared when a summary is generated or written by staff.
+    ai_summary_is_draft = models.BooleanField(default=False)
+
     # Use a CharField with choices to keep track of the issue category.
     category = models.CharField(
         max_length=50,
@@ -59,14 +65,147 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # When the issue was last marked as resolved. Cleared if it is reopened.
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """
+        The meta class for the Issue.
+        """
+
+        # The issue list is ordered by -id, so the filter indexes end in id. That lets the database
+        # read a filtered page straight from the index in order, without sorting every match.
+        indexes = [
+            models.Index(fields=['status', 'id'], name='council_issue_status_id_idx'),
+            models.Index(fields=['category', 'id'], name='council_issue_category_id_idx'),
+            models.Index(fields=['assigned_to', 'status', 'id'], name='council_issue_assignee_idx'),
+            models.Index(fields=['created_at'], name='council_issue_created_idx'),
+            # Only the few issues still waiting for a summary, so they can be counted without a table scan.
+            models.Index(fields=['id'], condition=models.Q(ai_summary=''), name='council_issue_unsummarised_idx'),
+            # The latest change, read by the issue list's ETag without scanning the table.
+            models.Index(fields=['updated_at'], name='council_issue_updated_idx'),
+        ]
+
     def __str__(self):
         """
         Return a string representation of the issue.
         """
         return f"{self.title} (Status: {self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        """
+        Record when the issue is resolved, and forget it again if the issue is reopened.
+        """
+
+        if self.status == 'RESOLVED' and self.resolved_at is None:
+            self.resolved_at = timezone.now()
+        elif self.status != 'RESOLVED':
+            self.resolved_at = None
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "resolved_at"}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         """
         Return the URL to the issue detail view.
         """
         return reverse('home')
+
+
+class ArchivedIssue(models.Model):
+    """
+    A resolved issue moved out of the Issue table by the archive_issues command, so that the working
+    table only holds recent work. It keeps its ID, so links to it still work, and every Issue field.
+    Archived issues are read-only.
+    """
+
+    # The ID the issue had in the Issue table. Issue IDs are never reused, so it cannot clash.
+    id = models.BigIntegerField(primary_key=True)
+
+    title = models.CharField(max_length=200)
+    ai_summary = models.TextField()
+    ai_summary_is_draft = models.BooleanField(default=False)
+    description = models.TextField()
+    category = models.CharField(max_length=50, choices=Issue.ISSUE_CATEGORIES)
+    email = models.EmailField()
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='archived_issues',
+        null=True,
+        blank=True
+    )
+    status = models.CharField(max_length=20, choices=Issue.ISSUE_STATUS)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        """
+        Return a string representation of the archived issue.
+        """
+        return f"{self.title} (Archived)"
+
+
+class IssueStat(models.Model):
+    """
+    A rollup of the number of issues created on a day, per category and current status.
+    Rows are adjusted as issues are created, change category or status, and are deleted (see
+    council.stats), so the dashboard never has to count the issue table.
+    """
+
+    day = models.DateField()
+    category = models.CharField(max_length=50, choices=Issue.ISSUE_CATEGORIES)
+    status = models.CharField(max_length=20, choices=Issue.ISSUE_STATUS)
+    count = models.IntegerField(default=0)
+
+    # The total time from creation to resolution of the resolved issues counted in this row.
+    total_resolution_time = models.DurationField(default=timedelta(0))
+
+    # How many of the issues counted in this row have been archived (see council.archive). They stay
+    # in `count`, so the dashboard covers every issue, and are subtracted to count the issue table.
+    archived_count = models.IntegerField(default=0)
+
+    class Meta:
+        """
+        The meta class for the IssueStat.
+        """
+
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category', 'status'], name='council_issuestat_unique'),
+        ]
+
+    def __str__(self):
+        """
+        Return a string representation of the rollup.
+        """
+        return f"{self.day} {self.get_category_display()} {self.get_status_display()}: {self.count}"
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Records how far a bulk import of issues has got, so that an interrupted import can resume.
+    The checkpoint is updated in the same transaction as each batch of issues, so it always
+    matches what has been saved.
+    """
+
+    # Identifies the import, by default the absolute path of the imported file.
+    source = models.CharField(max_length=500, unique=True)
+
+    # The number of rows read from the file, including rejected rows.
+    rows_read = models.PositiveBigIntegerField(default=0)
+
+    imported = models.PositiveBigIntegerField(default=0)
+    rejected = models.PositiveBigIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        """
+        Return a string representation of the checkpoint.
+        """
+        return f"Import of {self.source} ({self.rows_read} rows read)"
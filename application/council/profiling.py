@@ -0,0 +1,248 @@
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileBuffer:
+    """
+    A ring buffer holding the profiles of the most recent requests served by this process.
+    Each process keeps its own buffer, so with several workers a page shows only one worker's requests.
+    """
+
+    def __init__(self, size=200):
+        """
+        :param size: The number of profiles kept. The oldest profile is dropped to make room for a new one.
+        """
+
+        self._profiles = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        """
+        Add a request profile.
+        """
+
+        with self._lock:
+            self._profiles.append(profile)
+
+    def snapshot(self):
+        """
+        Return a list of the profiles, newest first.
+        """
+
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self):
+        """
+        Remove every profile.
+        """
+
+        with self._lock:
+            self._profiles.clear()
+
+
+# The profiles of the latest requests, shown to staff at /debug/requests/.
+request_profiles = ProfileBuffer(getattr(settings, 'REQUEST_PROFILE_BUFFER_SIZE', 200))
+
+
+class QueryRecorder:
+    """
+    Counts a request's queries, adds up their time and keeps the slowest few. Only the slowest queries'
+    SQL is kept, so the cost per query is a clock read and a heap comparison, and it works whether or
+    not DEBUG is on.
+    """
+
+    def __init__(self, keep_slowest=5):
+        """
+        :param keep_slowest: The number of slowest queries to keep.
+        """
+
+        self.keep_slowest = keep_slowest
+        self.count = 0
+        self.total_time = 0.0
+        self._slowest = []
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.count += 1
+                self.total_time += elapsed
+                # The count breaks ties, so the SQL strings are never compared.
+                entry = (elapsed, self.count, sql)
+                if len(self._slowest) < self.keep_slowest:
+                    heapq.heappush(self._slowest, entry)
+                elif elapsed > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        """
+        Return the slowest queries, slowest first, as a list of {"sql", "ms"} dictionaries.
+        """
+
+        return [
+            {"sql": sql, "ms": round(elapsed * 1000, 3)}
+            for elapsed, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+
+# The recorder for the request being profiled. Context variables are copied into the threads that
+# async views run their queries in, which have database connections of their own.
+current_recorder = ContextVar("current_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    A database execute wrapper that passes queries to the current request's recorder, if there is one.
+    """
+
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    """
+    Add record_query to a database connection's execute wrappers, once.
+    """
+
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+def get_query_budget(view_func):
+    """
+    Return the query budget a view declares with a `query_budget` attribute, if it has one.
+    Class-based views declare it on the class.
+    :param view_func: The view function, as resolved from the URL.
+    :return: The most queries the view should make, or None.
+    """
+
+    view_class = getattr(view_func, "view_class", None)
+    return getattr(view_class, "query_budget", getattr(view_func, "query_budget", None))
+
+
+class ProfilingMiddleware:
+    """
+    Records each request's query count, database time, template render time, total time and slowest
+    queries. Profiles are added to request_profiles and logged as one JSON line each to the
+    council.profiling logger, at DEBUG, or at WARNING if the view made more queries than its query budget.
+    Render time is measured for TemplateResponses only, which covers the generic views.
+    Queries made while a streaming response is being sent are not counted, as they happen after
+    the middleware has returned.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_PROFILING', True)
+        self.keep_slowest = getattr(settings, 'REQUEST_PROFILE_SLOW_QUERIES', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported missed the connection_created signal.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = self.start(request)
+        token = current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        recorder = self.start(request)
+        token = current_recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.finish(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def start(self, request):
+        """
+        Prepare to profile a request.
+        :return: The QueryRecorder for the request.
+        """
+
+        request._profile_render_time = 0.0
+        request._profile_query_budget = None
+        return QueryRecorder(self.keep_slowest)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.enabled:
+            request._profile_query_budget = get_query_budget(view_func)
+
+    def process_template_response(self, request, response):
+        # The response is rendered straight after this, so time from here to the post-render callback.
+        if self.enabled:
+            started = time.perf_counter()
+
+            def rendered(response):
+                request._profile_render_time = time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, recorder, elapsed):
+        """
+        Store and log a finished request's profile.
+        :return: The profile.
+        """
+
+        budget = getattr(request, "_profile_query_budget", None)
+        profile = {
+            "time": timezone.now().isoformat(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "total_ms": round(elapsed * 1000, 3),
+            "db_ms": round(recorder.total_time * 1000, 3),
+            "render_ms": round(getattr(request, "_profile_render_time", 0.0) * 1000, 3),
+            "queries": recorder.count,
+            "query_budget": budget,
+            "slowest_queries": recorder.slowest(),
+        }
+        request_profiles.add(profile)
+
+        over_budget = budget is not None and recorder.count > budget
+        level = logging.WARNING if over_budget else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(profile))
+        return profile
@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import DEFAULT_DB_ALIAS
+
+# The database alias of the read-only connection.
+REPLICA = "replica"
+
+# Whether reads in this context should go to the replica.
+_use_replica = ContextVar("use_replica", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Send reads made inside the block to the replica, when ReadReplicaRouter is installed.
+    """
+
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    A view mixin that sends the view's reads to the replica. Only use it on views that never write,
+    as writes made while it is active would still go to the default database but read back from the replica.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads made inside replica_reads() to the replica, and everything else to the default database.
+    With SQLite the replica is a second, read-only connection to the same file, so it sees every
+    committed write at once. In WAL mode its readers neither block nor wait for writers.
+    """
+
+    def db_for_read(self, model, **hints):
+        return REPLICA if _use_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        # Without this, saving an object read from the replica would write to the replica.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data, so objects read from either may be related.
+        return {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is the default database under another name, so it is never migrated itself.
+        return db != REPLICA
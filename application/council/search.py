@@ -0,0 +1,189 @@
+import re
+from django.db import connection, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from .models import ArchivedIssue, Issue
+
+# The FTS5 table that indexes issue text. It is an external-content table over council_issue, so it
+# stores only the index, and it is kept in sync by triggers so that every write path (save(),
+# QuerySet.update(), bulk_create() and raw SQL) updates it.
+SEARCH_TABLE = "council_issue_fts"
+
+# The FTS5 table that indexes archived issues, in the same way, over council_archivedissue.
+ARCHIVE_SEARCH_TABLE = "council_archivedissue_fts"
+
+# Each search table and the table it indexes.
+SEARCH_INDEXES = {
+    SEARCH_TABLE: "council_issue",
+    ARCHIVE_SEARCH_TABLE: "council_archivedissue",
+}
+
+# Markers placed around matched terms by snippet(), replaced with <mark> tags after escaping.
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+
+
+def create_search_index_sql(search_table):
+    """
+    Return the statements that create a search table and the triggers that keep it in sync.
+    :param search_table: The search table, a key of SEARCH_INDEXES.
+    :return: A list of SQL statements.
+    """
+
+    content_table = SEARCH_INDEXES[search_table]
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(
+            title, description, ai_summary,
+            content='{content_table}', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {search_table}_insert AFTER INSERT ON {content_table} BEGIN
+            INSERT INTO {search_table}(rowid, title, description, ai_summary)
+            VALUES (new.id, new.title, new.description, new.ai_summary);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {search_table}_delete AFTER DELETE ON {content_table} BEGIN
+            INSERT INTO {search_table}({search_table}, rowid, title, description, ai_summary)
+            VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {search_table}_update
+        AFTER UPDATE OF title, description, ai_summary ON {content_table} BEGIN
+            INSERT INTO {search_table}({search_table}, rowid, title, description, ai_summary)
+            VALUES ('delete', old.id, old.title, old.description, old.ai_summary);
+            INSERT INTO {search_table}(rowid, title, description, ai_summary)
+            VALUES (new.id, new.title, new.description, new.ai_summary);
+        END
+        """,
+    ]
+
+
+def drop_search_index_sql(search_table):
+    """
+    Return the statements that drop a search table and its triggers.
+    :param search_table: The search table, a key of SEARCH_INDEXES.
+    :return: A list of SQL statements.
+    """
+
+    return [
+        f"DROP TRIGGER IF EXISTS {search_table}_insert",
+        f"DROP TRIGGER IF EXISTS {search_table}_delete",
+        f"DROP TRIGGER IF EXISTS {search_table}_update",
+        f"DROP TABLE IF EXISTS {search_table}",
+    ]
+
+
+def search_supported(using=None):
+    """
+    Return True if the database supports the full-text search index (SQLite with FTS5).
+    :param using: The database connection, defaults to the default connection.
+    """
+
+    return (using or connection).vendor == "sqlite"
+
+
+def create_search_index(cursor, search_table=SEARCH_TABLE):
+    """
+    Create a search table and the triggers that keep it in sync, and index the existing rows.
+    :param cursor: A database cursor.
+    :param search_table: The search table, a key of SEARCH_INDEXES.
+    """
+
+    for statement in create_search_index_sql(search_table):
+        cursor.execute(statement)
+    cursor.execute(f"INSERT INTO {search_table}({search_table}) VALUES ('rebuild')")
+
+
+def drop_search_index(cursor, search_table=SEARCH_TABLE):
+    """
+    Drop a search table and its triggers.
+    :param cursor: A database cursor.
+    :param search_table: The search table, a key of SEARCH_INDEXES.
+    """
+
+    for statement in drop_search_index_sql(search_table):
+        cursor.execute(statement)
+
+
+def rebuild_search_index():
+    """
+    Rebuild the search indexes of issues and archived issues from scratch in a single transaction.
+    This also restores the triggers, which SQLite drops if an indexed table is ever rebuilt.
+    :return: The number of issues indexed, archived or not.
+    """
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for search_table in SEARCH_INDEXES:
+            drop_search_index(cursor, search_table)
+            create_search_index(cursor, search_table)
+            cursor.execute(f"INSERT INTO {search_table}({search_table}) VALUES ('optimize')")
+    return Issue.objects.count() + ArchivedIssue.objects.count()
+
+
+def build_match_query(text):
+    """
+    Turn free text typed by a user into an FTS5 query matching issues that contain every word.
+    Each word is quoted, so FTS5 operators and punctuation in the input cannot cause syntax errors.
+    :param text: The search text.
+    :return: The FTS5 query, or an empty string if the text has no words.
+    """
+
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def highlight(snippet):
+    """
+    Escape a snippet and turn the match markers into <mark> tags.
+    :param snippet: The snippet returned by FTS5.
+    :return: Safe HTML.
+    """
+
+    html = escape(snippet)
+    html = html.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+    return mark_safe(html)
+
+
+def search_issues(text, limit=50):
+    """
+    Search issue titles, descriptions and summaries, best matches first, including archived issues.
+    Matches are ranked with bm25, weighting the title above the summary and the summary above the
+    description. Each index ranks against its own word counts, so the two rankings are close to,
+    but not exactly, comparable.
+    :param text: The search text.
+    :param limit: The maximum number of results.
+    :return: A list of Issue instances, each with `rank`, a highlighted `snippet` and an `archived`
+        attribute. Archived issues are not in the Issue table, so open them by ID through the detail view.
+    """
+
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    selects = [
+        f"""
+        SELECT * FROM (
+            SELECT {content_table}.id, {content_table}.title, {content_table}.status, {content_table}.created_at,
+                bm25({search_table}, 10.0, 1.0, 5.0) AS rank,
+                snippet({search_table}, -1, %s, %s, '…', 16) AS raw_snippet,
+                {int(search_table == ARCHIVE_SEARCH_TABLE)} AS archived
+            FROM {search_table}
+            JOIN {content_table} ON {content_table}.id = {search_table}.rowid
+            WHERE {search_table} MATCH %s
+            ORDER BY rank
+            LIMIT %s
+        )
+        """
+        for search_table, content_table in SEARCH_INDEXES.items()
+    ]
+    results = list(Issue.objects.raw(
+        " UNION ALL ".join(selects) + " ORDER BY rank LIMIT %s",
+        [HIGHLIGHT_START, HIGHLIGHT_END, match, limit] * len(selects) + [limit],
+    ))
+    for issue in results:
+        issue.snippet = highlight(issue.raw_snippet)
+    return results
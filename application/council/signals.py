@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .assignees import invalidate_staff_directory
+from .duplicates import issue_text, loaded_duplicate_index
+from .models import Issue
+from .stats import STAT_FIELDS, record_issue_change, stat_values
+
+
+@receiver(post_save, sender=Issue)
+def update_duplicate_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the duplicate index up to date when an issue is created, or its title or description is edited.
+    The index is only updated if it has been loaded, otherwise it picks the issue up when it loads.
+    """
+
+    if update_fields is not None and not {"title", "description"} & set(update_fields):
+        return
+    index = loaded_duplicate_index()
+    if index is not None:
+        index.add(instance.pk, issue_text(instance))
+
+
+@receiver(post_delete, sender=Issue)
+def remove_from_duplicate_index(sender, instance, **kwargs):
+    """
+    Remove a deleted issue from the duplicate index.
+    """
+
+    index = loaded_duplicate_index()
+    if index is not None:
+        index.remove(instance.pk)
+
+
+def issue_card_cache_key(issue):
+    """
+    Return the cache key of the rendered card for an issue on the home page.
+    It must match the `{% cache ... issue_card issue.pk issue.updated_at %}` tag in home.html.
+    :param issue: The Issue instance.
+    :return: The cache key.
+    """
+
+    return make_template_fragment_key("issue_card", [issue.pk, issue.updated_at])
+
+
+@receiver(pre_save, sender=Issue)
+def invalidate_issue_card_on_save(sender, instance, **kwargs):
+    """
+    Drop the cached card of an issue that is about to be saved.
+    updated_at still holds the value the card was cached under, as auto_now only sets it afterwards.
+    Saving gives the issue a new updated_at, so the next render caches the card under a new key.
+    """
+
+    if instance.pk is not None and instance.updated_at is not None:
+        cache.delete(issue_card_cache_key(instance))
+
+
+@receiver(post_delete, sender=Issue)
+def invalidate_issue_card_on_delete(sender, instance, **kwargs):
+    """
+    Drop the cached card of a deleted issue.
+    """
+
+    cache.delete(issue_card_cache_key(instance))
+
+
+@receiver(pre_save, sender=Issue)
+def remember_stat_values(sender, instance, **kwargs):
+    """
+    Read the stored category, status and dates of an issue that is about to be saved, so that
+    post_save can move it to its new rollup row.
+    """
+
+    instance._stat_values_before = None
+    if instance.pk is not None:
+        instance._stat_values_before = Issue.objects.filter(pk=instance.pk).values(*STAT_FIELDS).first()
+
+
+@receiver(post_save, sender=Issue)
+def update_stats_on_save(sender, instance, **kwargs):
+    """
+    Update the rollups for a created or edited issue.
+    """
+
+    record_issue_change(getattr(instance, "_stat_values_before", None), stat_values(instance))
+
+
+@receiver(post_delete, sender=Issue)
+def update_stats_on_delete(sender, instance, **kwargs):
+    """
+    Remove a deleted issue from the rollups.
+    """
+
+    record_issue_change(stat_values(instance), None)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_staff_directory_on_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Rebuild the staff directory of the assignee picker when a user is created or edited.
+    Logging in only saves last_login, which the directory does not hold, so it is skipped.
+    """
+
+    if update_fields is None or not set(update_fields) <= {"last_login"}:
+        invalidate_staff_directory()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_staff_directory_on_delete(sender, instance, **kwargs):
+    """
+    Rebuild the staff directory of the assignee picker when a user is deleted.
+    """
+
+    invalidate_staff_directory()
@@ -0,0 +1,70 @@
+// Type-ahead for AssigneePicker widgets. Each visible text input searches the assignee endpoint as
+// the user types, offers the matches in its datalist, and copies the chosen user's ID into the
+// hidden input before it. Clearing the text clears the assignee.
+(function () {
+  "use strict";
+
+  var DELAY = 200;
+
+  function setUpPicker(input) {
+    var hidden = input.previousElementSibling;
+    var list = document.getElementById(input.getAttribute("list"));
+    var ids = {};
+    // The user selected when the page was rendered, so typing their name back restores them.
+    ids[input.defaultValue] = hidden.value;
+    var timer = null;
+    var lastQuery = null;
+
+    function choose() {
+      var text = input.value.trim();
+      if (!text) {
+        hidden.value = "";
+        input.setCustomValidity("");
+      } else if (Object.prototype.hasOwnProperty.call(ids, text)) {
+        hidden.value = ids[text];
+        input.setCustomValidity("");
+      } else {
+        hidden.value = "";
+        input.setCustomValidity("Choose a user from the list.");
+      }
+    }
+
+    function search() {
+      var query = input.value.trim();
+      if (!query || query === lastQuery || !list) {
+        return;
+      }
+      lastQuery = query;
+      fetch(input.dataset.searchUrl + "?q=" + encodeURIComponent(query), {
+        credentials: "same-origin",
+        headers: { Accept: "application/json" },
+      })
+        .then(function (response) { return response.ok ? response.json() : { results: [] }; })
+        .then(function (data) {
+          // Ignore replies to searches the user has already typed past.
+          if (query !== input.value.trim()) {
+            return;
+          }
+          list.textContent = "";
+          data.results.forEach(function (user) {
+            ids[user.label] = user.id;
+            var option = document.createElement("option");
+            option.value = user.label;
+            list.appendChild(option);
+          });
+          choose();
+        });
+    }
+
+    input.addEventListener("input", function () {
+      choose();
+      clearTimeout(timer);
+      timer = setTimeout(search, DELAY);
+    });
+    input.addEventListener("change", choose);
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll("[data-assignee-picker]").forEach(setUpPicker);
+  });
+})();
@@ -0,0 +1,43 @@
+// Keeps issue pages up to date from the issue event stream (see council.events). The element with a
+// data-issue-events URL opens the stream. When an issue's summary arrives or its status changes, the
+// elements marked with data-issue-summary or data-issue-status and that issue's ID are patched in
+// place, so staff no longer reload the page to see them.
+(function () {
+  "use strict";
+
+  function patch(attribute, issueId, text) {
+    document.querySelectorAll("[" + attribute + '="' + issueId + '"]').forEach(function (element) {
+      var words = parseInt(element.dataset.truncateWords, 10);
+      var parts = text.trim().split(/\s+/);
+      // As the truncatewords filter does.
+      if (words && parts.length > words) {
+        text = parts.slice(0, words).join(" ") + " …";
+      }
+      element.textContent = text;
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    var source = document.querySelector("[data-issue-events]");
+    if (!source || !window.EventSource) {
+      return;
+    }
+    // The browser reconnects by itself, sending the last event ID so that nothing is missed. The
+    // server answers 204 when it cannot stream, which stops the browser from trying again.
+    var events = new EventSource(source.dataset.issueEvents);
+
+    events.addEventListener("summary", function (event) {
+      var data = JSON.parse(event.data);
+      patch("data-issue-summary", data.issue, data.summary);
+    });
+    events.addEventListener("status", function (event) {
+      var data = JSON.parse(event.data);
+      patch("data-issue-status", data.issue, data.status_display);
+    });
+    // Sent when this page has missed events that the server no longer has.
+    events.addEventListener("reload", function () {
+      events.close();
+      window.location.reload();
+    });
+  });
+})();
@@ -0,0 +1,307 @@
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateTimeField, DurationField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ArchivedIssue, Issue, IssueStat
+
+# The issue fields that decide which rollup row an issue is counted in.
+STAT_FIELDS = ["created_at", "category", "status", "resolved_at"]
+
+
+def issue_contribution(values):
+    """
+    Work out what an issue adds to the rollups.
+    :param values: A dictionary of the issue's STAT_FIELDS.
+    :return: A tuple of ((day, category, status), resolution time).
+    """
+
+    key = (timezone.localdate(values["created_at"]), values["category"], values["status"])
+    resolution_time = timedelta(0)
+    if values["status"] == 'RESOLVED' and values["resolved_at"] is not None:
+        resolution_time = values["resolved_at"] - values["created_at"]
+    return key, resolution_time
+
+
+def stat_values(issue):
+    """
+    Return the STAT_FIELDS of an issue instance as a dictionary.
+    """
+
+    return {field: getattr(issue, field) for field in STAT_FIELDS}
+
+
+def adjust_stats(changes):
+    """
+    Apply changes to the rollup rows, creating rows that do not exist yet.
+    Each row is changed with a single UPDATE of its current value, so concurrent changes add up.
+    :param changes: A dictionary of (day, category, status) to (count change, resolution time change).
+    """
+
+    for (day, category, status), (count, resolution_time) in changes.items():
+        if not count and not resolution_time:
+            continue
+        row = IssueStat.objects.filter(day=day, category=category, status=status)
+        delta = {"count": F("count") + count, "total_resolution_time": F("total_resolution_time") + resolution_time}
+        if row.update(**delta):
+            continue
+        try:
+            with transaction.atomic():
+                IssueStat.objects.create(
+                    day=day, category=category, status=status, count=count, total_resolution_time=resolution_time
+                )
+        except IntegrityError:
+            # Another process created the row first.
+            row.update(**delta)
+
+
+def record_issue_change(before, after):
+    """
+    Update the rollups for an issue that was created, changed or deleted.
+    :param before: The issue's STAT_FIELDS before the change, or None if it was created.
+    :param after: The issue's STAT_FIELDS after the change, or None if it was deleted.
+    """
+
+    changes = {}
+    for values, sign in [(before, -1), (after, 1)]:
+        if values is None:
+            continue
+        key, resolution_time = issue_contribution(values)
+        count, total = changes.get(key, (0, timedelta(0)))
+        changes[key] = (count + sign, total + sign * resolution_time)
+    adjust_stats(changes)
+
+
+def record_issues_created(issues):
+    """
+    Update the rollups for issues created without save(), such as by bulk_create.
+    :param issues: The created Issue instances.
+    """
+
+    counts = Counter()
+    totals = Counter()
+    for issue in issues:
+        key, resolution_time = issue_contribution(stat_values(issue))
+        counts[key] += 1
+        totals[key] += resolution_time // timedelta(microseconds=1)
+    adjust_stats({key: (counts[key], timedelta(microseconds=totals[key])) for key in counts})
+
+
+def record_status_change(queryset, status, resolved_at):
+    """
+    Update the rollups for issues that are about to be given a new status by a single UPDATE, which
+    does not send the save() signals. The rollup changes are worked out with one grouped query
+    rather than by loading the issues. Call it in the same transaction as the UPDATE.
+    :param queryset: The issues that will change. None of them may already have the new status.
+    :param status: The new status.
+    :param resolved_at: The new resolved_at, which should be None unless the status is RESOLVED.
+    """
+
+    old_time = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
+    new_time = ExpressionWrapper(
+        Value(resolved_at, output_field=DateTimeField()) - F("created_at"), output_field=DurationField()
+    )
+    rows = (
+        queryset.annotate(day=TruncDate("created_at"))
+        .values("day", "category", "status")
+        .annotate(count=Count("id"), old_time=Sum(old_time), new_time=Sum(new_time))
+        .order_by()
+    )
+
+    changes = {}
+    for row in rows:
+        # Only resolved issues count towards the time to resolve, as in issue_contribution().
+        old_total = row["old_time"] if row["status"] == 'RESOLVED' else None
+        new_total = row["new_time"] if status == 'RESOLVED' else None
+        for key, count, total in [
+            ((row["day"], row["category"], row["status"]), -row["count"], -(old_total or timedelta(0))),
+            ((row["day"], row["category"], status), row["count"], new_total or timedelta(0)),
+        ]:
+            key_count, key_total = changes.get(key, (0, timedelta(0)))
+            changes[key] = (key_count + count, key_total + total)
+    adjust_stats(changes)
+
+
+def record_issues_archived(queryset):
+    """
+    Mark issues that are about to be moved to the archive as archived in the rollups, with one grouped
+    query rather than by loading the issues. Call it in the same transaction as the move.
+    :param queryset: The issues that will be archived.
+    """
+
+    rows = (
+        queryset.annotate(day=TruncDate("created_at"))
+        .values("day", "category", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        stat = IssueStat.objects.filter(day=row["day"], category=row["category"], status=row["status"])
+        if stat.update(archived_count=F("archived_count") + row["count"]):
+            continue
+        try:
+            with transaction.atomic():
+                # The rollups had lost the issues. check_issue_stats reports the missing count.
+                IssueStat.objects.create(
+                    day=row["day"], category=row["category"], status=row["status"], archived_count=row["count"]
+                )
+        except IntegrityError:
+            # Another process created the row first.
+            stat.update(archived_count=F("archived_count") + row["count"])
+
+
+def count_from_stats(status=None, category=None):
+    """
+    Count the issues in the issue table with a status and category from the rollups, without
+    reading the issue table. Archived issues are left out.
+    :param status: The status to count, or None for any.
+    :param category: The category to count, or None for any.
+    :return: The number of issues.
+    """
+
+    stats = IssueStat.objects.all()
+    if status:
+        stats = stats.filter(status=status)
+    if category:
+        stats = stats.filter(category=category)
+    return stats.aggregate(total=Sum(F("count") - F("archived_count")))["total"] or 0
+
+
+def count_issues():
+    """
+    Count every issue by day, category and status, straight from the issue and archive tables.
+    Archived issues stay in the rollups, so the dashboard covers every issue ever reported.
+    :return: A dictionary of (day, category, status) to (count, total resolution time, archived count).
+    """
+
+    resolution_time = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
+    counts = {}
+    for model, archived in [(Issue, False), (ArchivedIssue, True)]:
+        rows = (
+            model.objects.annotate(day=TruncDate("created_at"))
+            .values("day", "category", "status")
+            .annotate(count=Count("id"), total_resolution_time=Sum(resolution_time))
+            .order_by()
+        )
+        for row in rows:
+            # Only resolved issues count towards the time to resolve, as in issue_contribution().
+            key = (row["day"], row["category"], row["status"])
+            row_time = row["total_resolution_time"] if row["status"] == 'RESOLVED' else None
+            count, total, archived_count = counts.get(key, (0, timedelta(0), 0))
+            counts[key] = (
+                count + row["count"],
+                total + (row_time or timedelta(0)),
+                archived_count + (row["count"] if archived else 0),
+            )
+    return counts
+
+
+def stored_stats():
+    """
+    Read every rollup row.
+    :return: A dictionary of (day, category, status) to (count, total resolution time, archived count),
+        leaving out empty rows.
+    """
+
+    return {
+        (stat.day, stat.category, stat.status): (stat.count, stat.total_resolution_time, stat.archived_count)
+        for stat in IssueStat.objects.all()
+        if stat.count or stat.total_resolution_time or stat.archived_count
+    }
+
+
+def rebuild_issue_stats():
+    """
+    Replace the rollups with a full recount of the issue table, in a single transaction.
+    :return: The number of rollup rows written.
+    """
+
+    with transaction.atomic():
+        counts = count_issues()
+        IssueStat.objects.all().delete()
+        IssueStat.objects.bulk_create([
+            IssueStat(
+                day=day, category=category, status=status, count=count, total_resolution_time=total,
+                archived_count=archived_count,
+            )
+            for (day, category, status), (count, total, archived_count) in counts.items()
+        ])
+    return len(counts)
+
+
+def find_stat_differences():
+    """
+    Compare the rollups with a full recount of the issue table.
+    :return: A sorted list of ((day, category, status), stored, counted) tuples for every row that
+        differs, where stored and counted are (count, total resolution time, archived count) tuples.
+    """
+
+    stored = stored_stats()
+    counted = count_issues()
+    empty = (0, timedelta(0), 0)
+    return [
+        (key, stored.get(key, empty), counted.get(key, empty))
+        for key in sorted(stored.keys() | counted.keys())
+        if stored.get(key, empty) != counted.get(key, empty)
+    ]
+
+
+def category_summary(start):
+    """
+    Total the rollups from a day onwards by category, reading only the rollup table.
+    :param start: The first day to include.
+    :return: A list with a dictionary for each category, holding its label, its count for each status
+        in the order of Issue.ISSUE_STATUS, its total, and the average time to resolve, or None if
+        none were resolved.
+    """
+
+    statuses = [value for value, _ in Issue.ISSUE_STATUS]
+    totals = {
+        (row["category"], row["status"]): (row["count"], row["total_resolution_time"])
+        for row in IssueStat.objects.filter(day__gte=start)
+        .values("category", "status")
+        .annotate(count=Sum("count"), total_resolution_time=Sum("total_resolution_time"))
+        .order_by()
+    }
+
+    summary = []
+    for category, label in Issue.ISSUE_CATEGORIES:
+        counts = [totals.get((category, status), (0, None))[0] for status in statuses]
+        resolved, resolution_time = totals.get((category, 'RESOLVED'), (0, None))
+        average = None
+        if resolved and resolution_time is not None:
+            average = timedelta(seconds=round(resolution_time.total_seconds() / resolved))
+        summary.append({
+            "category": category,
+            "label": label,
+            "counts": counts,
+            "total": sum(counts),
+            "average_resolution": average,
+        })
+    return summary
+
+
+def daily_summary(start):
+    """
+    Total the rollups for each day from a day onwards, reading only the rollup table.
+    :param start: The first day to include.
+    :return: A list of dictionaries, newest day first, holding the day and its count for each status in
+        the order of Issue.ISSUE_STATUS. Days without issues are left out.
+    """
+
+    statuses = [value for value, _ in Issue.ISSUE_STATUS]
+    days = {}
+    rows = (
+        IssueStat.objects.filter(day__gte=start)
+        .values("day", "status")
+        .annotate(count=Sum("count"))
+        .order_by()
+    )
+    for row in rows:
+        days.setdefault(row["day"], dict.fromkeys(statuses, 0))[row["status"]] = row["count"]
+    return [
+        {"day": day, "counts": [counts[status] for status in statuses]}
+        for day, counts in sorted(days.items(), reverse=True)
+        if any(counts.values())
+    ]
@@ -0,0 +1,36 @@
+from urllib.parse import urlsplit
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from .profiling import get_query_budget
+
+
+class QueryBudgetMixin:
+    """
+    A TestCase mixin for checking that views stay within the query budget they declare with a
+    `query_budget` attribute. The budget covers every query made for the request, including the
+    session and user lookups.
+    """
+
+    def assertWithinQueryBudget(self, method, path, data=None, **extra):
+        """
+        Make a request with the test client and fail if it makes more queries than its view's budget,
+        or the view declares no budget.
+        :param method: The HTTP method, such as "get" or "post".
+        :param path: The path to request.
+        :param data: The query string or form data.
+        :param extra: Extra arguments for the test client, such as headers.
+        :return: The response.
+        """
+
+        budget = get_query_budget(resolve(urlsplit(path).path).func)
+        if budget is None:
+            self.fail(f"The view for {path} declares no query_budget.")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method.lower())(path, data, **extra)
+
+        if len(queries) > budget:
+            listing = "\n".join(f"{number}. {query['sql']}" for number, query in enumerate(queries, start=1))
+            self.fail(f"{method.upper()} {path} made {len(queries)} queries, over its budget of {budget}:\n{listing}")
+        return response
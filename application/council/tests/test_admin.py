@@ -0,0 +1,170 @@
+from unittest.mock import patch
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from aisummary.models import SummaryJob
+from council.admin import IssueAdmin
+from council.duplicates import reset_duplicate_index
+from council.models import Issue
+from council.stats import find_stat_differences
+
+User = get_user_model()
+
+
+class IssueAdminTest(TestCase):
+    def setUp(self):
+        # Create issues in two categories and statuses, and log in as a superuser.
+
+        reset_duplicate_index()
+        self.admin = User.objects.create_superuser(username="admin", password="password")
+        self.officer = User.objects.create_user(username="officer", password="password", is_staff=True)
+        self.issues = [
+            Issue.objects.create(
+                title=f"{'Pothole' if i % 2 else 'Graffiti'} report {i}",
+                ai_summary=f"Summary {i}.",
+                description=f"Description {i}.",
+                category="POTHOLE" if i % 2 else "GRAFFITI",
+                status="OPEN" if i < 6 else "RESOLVED",
+                email="a@example.com",
+                assigned_to=self.officer if i % 3 else None,
+            )
+            for i in range(10)
+        ]
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:council_issue_changelist')
+
+    def act(self, action, issues=None, **data):
+        selected = [issue.pk for issue in issues or self.issues]
+        return self.client.post(self.url, {"action": action, ACTION_CHECKBOX_NAME: selected, **data})
+
+    def test_changelist_never_counts_issue_table(self):
+        """
+        Test that the change list takes the same queries however many issues there are, and only
+        counts from the rollups.
+        """
+
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, "officer")
+        self.assertEqual(response.context["cl"].result_count, 10)
+        self.assertFalse([q["sql"] for q in queries if "COUNT(" in q["sql"] and "council_issue\"" in q["sql"]])
+
+        Issue.objects.bulk_create(
+            Issue(title=f"Extra {i}", description="Extra.", category="OTHER", email="b@example.com")
+            for i in range(20)
+        )
+        with self.assertNumQueries(len(queries)):
+            self.client.get(self.url)
+
+    def test_filtered_counts_from_rollups(self):
+        """
+        Test that status and category filters are counted from the rollups.
+        """
+
+        response = self.client.get(self.url, {"status__exact": "OPEN", "category__exact": "POTHOLE"})
+        self.assertEqual(response.context["cl"].result_count, 3)
+        self.assertEqual(len(response.context["cl"].result_list), 3)
+
+    def test_other_filters_counted_up_to_limit(self):
+        """
+        Test that filters the rollups cannot count are counted, but only up to the limit.
+        """
+
+        response = self.client.get(self.url, {"assigned_to__id__exact": self.officer.pk})
+        self.assertEqual(response.context["cl"].result_count, 6)
+
+        with patch.object(IssueAdmin, "count_limit", 4):
+            response = self.client.get(self.url, {"assigned_to__id__exact": self.officer.pk})
+        self.assertEqual(response.context["cl"].result_count, 4)
+
+    def test_search_uses_full_text_index(self):
+        """
+        Test that searching matches descriptions and summaries through the full-text index.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"q": "summary 7"})
+        self.assertEqual([issue.pk for issue in response.context["cl"].result_list], [self.issues[7].pk])
+        self.assertTrue(any("council_issue_fts" in q["sql"] for q in queries))
+
+    def test_set_status_action(self):
+        """
+        Test that the status actions update every selected issue in one statement, recording when
+        they were resolved and keeping the rollups correct.
+        """
+
+        response = self.act("mark_resolved", self.issues[:4])
+        self.assertEqual(response.status_code, 302)
+        resolved = Issue.objects.filter(pk__in=[issue.pk for issue in self.issues[:4]])
+        self.assertTrue(all(issue.status == "RESOLVED" and issue.resolved_at for issue in resolved))
+        self.assertEqual(find_stat_differences(), [])
+
+        self.act("mark_open", self.issues[2:8])
+        self.assertEqual(Issue.objects.filter(status="OPEN", resolved_at__isnull=True).count(), 6)
+        self.assertEqual(find_stat_differences(), [])
+
+    def test_set_status_is_published(self):
+        """
+        Test that the status actions tell open pages about each issue they change, once committed.
+        """
+
+        with patch("council.bulk.publish_status") as publish_status:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.act("mark_resolved", self.issues[4:8])
+        self.assertEqual(
+            sorted(call.args for call in publish_status.call_args_list),
+            [(issue.pk, "RESOLVED") for issue in self.issues[4:6]],
+        )
+
+    def test_set_status_is_set_based(self):
+        """
+        Test that changing the status of many issues reads and writes the issue table as often as
+        changing one, with a single UPDATE. Only the rollup rows are written one by one.
+        """
+
+        def issue_queries(queries):
+            return [q["sql"] for q in queries if 'FROM "council_issue"' in q["sql"] or 'UPDATE "council_issue"' in q["sql"]]
+
+        with CaptureQueriesContext(connection) as one:
+            self.act("mark_in_progress", self.issues[:1])
+        with CaptureQueriesContext(connection) as many:
+            self.act("mark_in_progress", self.issues[1:])
+        self.assertEqual(len(issue_queries(one)), len(issue_queries(many)))
+        self.assertEqual(len([sql for sql in issue_queries(many) if sql.startswith('UPDATE "council_issue"')]), 1)
+        self.assertEqual(Issue.objects.filter(status="IN_PROGRESS").count(), 10)
+
+    def test_reassign_action(self):
+        """
+        Test that reassigning asks for the assignee, then assigns every selected issue.
+        """
+
+        response = self.act("reassign_selected", self.issues[:3])
+        self.assertTemplateUsed(response, "admin/council/issue/reassign.html")
+        self.assertContains(response, "3 selected issues")
+
+        response = self.act("reassign_selected", self.issues[:3], apply="1", assigned_to=self.officer.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Issue.objects.filter(assigned_to=self.officer).count(), 7)
+
+        self.act("reassign_selected", self.issues[:3], apply="1", assigned_to="")
+        self.assertEqual(Issue.objects.filter(assigned_to=self.officer).count(), 4)
+
+    def test_regenerate_summaries_action(self):
+        """
+        Test that regenerating clears the summaries and queues one forced job per issue, without
+        queueing issues that already have a job waiting.
+        """
+
+        SummaryJob.objects.all().delete()
+        SummaryJob.objects.create(issue=self.issues[0])
+        self.act("regenerate_selected", self.issues[:5])
+        self.assertEqual(Issue.objects.filter(ai_summary="").count(), 5)
+        self.assertEqual(
+            sorted(SummaryJob.objects.filter(status="PENDING").values_list("issue_id", flat=True)),
+            [issue.pk for issue in self.issues[:5]],
+        )
+        self.assertFalse(SummaryJob.objects.filter(force=False).exists())
@@ -0,0 +1,129 @@
+import json
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from council.models import Issue
+
+User = get_user_model()
+
+
+class IssueAPITest(TestCase):
+    def setUp(self):
+        # Create issues and log in.
+
+        self.user = User.objects.create_user(username="staff", password="password", is_staff=True)
+        self.issues = [
+            Issue.objects.create(
+                title=f"Issue {i}",
+                ai_summary=f"Summary {i}",
+                description=f"Description {i}.",
+                category="POTHOLE" if i % 2 else "GRAFFITI",
+                email=f"user{i}@example.com",
+                assigned_to=self.user if i == 0 else None,
+            )
+            for i in range(5)
+        ]
+        self.client.force_login(self.user)
+
+    def test_requires_login(self):
+        """
+        Test that anonymous requests get a JSON 401.
+        """
+
+        self.client.logout()
+        for url in [
+            reverse('api-issue-list'),
+            reverse('api-issue-detail', kwargs={'pk': self.issues[0].pk}),
+            reverse('api-issue-export'),
+        ]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json(), {"error": "Authentication required."})
+
+    def test_list_pagination(self):
+        """
+        Test that following `next` pages through every issue, newest first.
+        """
+
+        ids = []
+        url = f"{reverse('api-issue-list')}?limit=2"
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(issue["id"] for issue in data["results"])
+            url = data["next"]
+
+        self.assertEqual(ids, [issue.pk for issue in reversed(self.issues)])
+
+    def test_list_filters(self):
+        """
+        Test that the list accepts the same filters as the issue list page.
+        """
+
+        data = self.client.get(reverse('api-issue-list'), {"category": "POTHOLE", "limit": 1}).json()
+        self.assertEqual([issue["id"] for issue in data["results"]], [self.issues[3].pk])
+        self.assertIn("category=POTHOLE", data["next"])
+
+    def test_invalid_parameters(self):
+        """
+        Test that invalid filters and pagination parameters return 400.
+        """
+
+        self.assertEqual(self.client.get(reverse('api-issue-list'), {"status": "NOPE"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api-issue-list'), {"limit": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api-issue-list'), {"limit": "0"}).status_code, 400)
+
+    def test_detail(self):
+        """
+        Test that a single issue is returned with its assigned user.
+        """
+
+        data = self.client.get(reverse('api-issue-detail', kwargs={'pk': self.issues[0].pk})).json()
+        self.assertEqual(data["title"], "Issue 0")
+        self.assertEqual(data["assigned_to"], {"id": self.user.pk, "username": "staff"})
+
+    def test_email_only_for_staff(self):
+        """
+        Test that residents' email addresses are only returned to staff.
+        """
+
+        detail_url = reverse('api-issue-detail', kwargs={'pk': self.issues[0].pk})
+        self.assertEqual(self.client.get(detail_url).json()["email"], "user0@example.com")
+
+        self.client.force_login(User.objects.create_user(username="resident", password="password"))
+        self.assertNotIn("email", self.client.get(detail_url).json())
+        for issue in self.client.get(reverse('api-issue-list')).json()["results"]:
+            self.assertNotIn("email", issue)
+        body = b"".join(self.client.get(reverse('api-issue-export')).streaming_content).decode()
+        for line in body.splitlines():
+            self.assertNotIn("email", json.loads(line))
+
+    def test_detail_not_found(self):
+        """
+        Test that a missing issue returns a JSON 404.
+        """
+
+        response = self.client.get(reverse('api-issue-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export(self):
+        """
+        Test that the export streams one JSON object per line, oldest first, in a fixed number of queries.
+        """
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api-issue-export'))
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [issue.pk for issue in self.issues])
+        self.assertEqual(rows[0]["assigned_to"]["username"], "staff")
+
+    def test_export_filters(self):
+        """
+        Test that the export applies the filters.
+        """
+
+        response = self.client.get(reverse('api-issue-export'), {"category": "GRAFFITI"})
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 3)
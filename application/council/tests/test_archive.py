@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from aisummary.models import SummaryJob
+from council.archive import archive_chunk
+from council.duplicates import reset_duplicate_index
+from council.models import ArchivedIssue, Issue
+from council.search import search_issues
+from council.stats import category_summary, count_from_stats, find_stat_differences
+
+User = get_user_model()
+
+
+class ArchiveIssuesTest(TestCase):
+    def setUp(self):
+        # Create old and recently resolved issues and an open one, and log in.
+
+        reset_duplicate_index()
+        self.officer = User.objects.create_user(username="officer", password="password", is_staff=True)
+        long_ago = timezone.now() - timedelta(days=400)
+        self.old = [
+            Issue.objects.create(
+                title=f"Old pothole {i}", ai_summary=f"Filled pothole {i}.", description="Filled in.",
+                category="POTHOLE", email="a@example.com", status="RESOLVED", resolved_at=long_ago,
+                assigned_to=self.officer,
+            )
+            for i in range(5)
+        ]
+        self.recent = Issue.objects.create(
+            title="Recent pothole", ai_summary="Filled.", description="Filled in.", category="POTHOLE",
+            email="a@example.com", status="RESOLVED",
+        )
+        self.open = Issue.objects.create(
+            title="Open pothole", ai_summary="Deep.", description="Deep.", category="POTHOLE", email="a@example.com",
+        )
+        self.client.force_login(self.officer)
+
+    def archive(self, *args):
+        return call_command("archive_issues", *args, stdout=StringIO())
+
+    def test_moves_old_resolved_issues(self):
+        """
+        Test that only issues resolved before the cutoff are moved, keeping their IDs and fields.
+        """
+
+        SummaryJob.objects.create(issue=self.old[0])
+        self.archive("--days", "30")
+
+        self.assertEqual(set(Issue.objects.values_list("pk", flat=True)), {self.recent.pk, self.open.pk})
+        archived = ArchivedIssue.objects.get(pk=self.old[0].pk)
+        self.assertEqual(archived.title, "Old pothole 0")
+        self.assertEqual(archived.assigned_to, self.officer)
+        self.assertEqual(archived.resolved_at, self.old[0].resolved_at)
+        self.assertIsNotNone(archived.archived_at)
+        self.assertEqual(ArchivedIssue.objects.count(), 5)
+        self.assertFalse(SummaryJob.objects.exists())
+
+    def test_rollups_keep_archived_issues(self):
+        """
+        Test that archiving leaves the dashboard counts unchanged and the rollups consistent.
+        """
+
+        before = category_summary(timezone.localdate() - timedelta(days=1))
+        self.archive("--days", "30")
+        self.assertEqual(category_summary(timezone.localdate() - timedelta(days=1)), before)
+        self.assertEqual(find_stat_differences(), [])
+
+    def test_admin_counts_leave_out_archived_issues(self):
+        """
+        Test that the admin change list, which counts from the rollups, only counts the issue table.
+        """
+
+        self.archive("--days", "30")
+        self.assertEqual(count_from_stats(), 2)
+        self.assertEqual(count_from_stats(status="RESOLVED"), 1)
+
+        self.officer.is_superuser = True
+        self.officer.save()
+        response = self.client.get(reverse('admin:council_issue_changelist'), {"status__exact": "RESOLVED"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertEqual(len(response.context["cl"].result_list), 1)
+
+    def test_resumes_after_interruption(self):
+        """
+        Test that an archive stopped after some chunks carries on without moving anything twice.
+        """
+
+        before = timezone.now() - timedelta(days=30)
+        moved, last_id = archive_chunk(before, chunk_size=2)
+        self.assertEqual((moved, last_id), (2, self.old[1].pk))
+
+        self.archive("--days", "30", "--chunk-size", "2")
+        self.assertEqual(ArchivedIssue.objects.count(), 5)
+        self.assertEqual(Issue.objects.count(), 2)
+
+    def test_dry_run(self):
+        """
+        Test that a dry run counts the issues without moving them.
+        """
+
+        out = StringIO()
+        call_command("archive_issues", "--days", "30", "--dry-run", stdout=out)
+        self.assertIn("5 issues", out.getvalue())
+        self.assertEqual(Issue.objects.count(), 7)
+
+    def test_detail_view_shows_archived_issue(self):
+        """
+        Test that an archived issue still opens through the detail view, without edit links.
+        """
+
+        self.archive("--days", "30")
+        response = self.client.get(reverse('issue-detail', args=[self.old[2].pk]))
+        self.assertContains(response, "Old pothole 2")
+        self.assertContains(response, "Archived")
+        self.assertNotContains(response, reverse('update-issue', args=[self.old[2].pk]))
+
+        response = self.client.get(reverse('issue-detail', args=[self.open.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_includes_archived_issues(self):
+        """
+        Test that archived issues are still found by search, marked as archived.
+        """
+
+        self.archive("--days", "30")
+        results = search_issues("pothole")
+        self.assertEqual(len(results), 7)
+        archived = {issue.pk for issue in results if issue.archived}
+        self.assertEqual(archived, {issue.pk for issue in self.old})
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(len(search_issues("filled")), 6)
@@ -0,0 +1,172 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from council.assignees import StaffDirectory, get_staff_directory, reset_staff_directory
+from council.forms import EditForm, IssueFilterForm
+from council.models import Issue
+
+User = get_user_model()
+
+
+class StaffDirectoryTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = StaffDirectory([
+            (1, "jsmith", "Jane", "Smith"),
+            (2, "asmith", "Alan", "Smith"),
+            (3, "jones", "", ""),
+        ])
+
+    def test_prefix_search(self):
+        """
+        Test that users are found by the start of their username, first, last or full name, ignoring case.
+        """
+
+        self.assertEqual([user["id"] for user in self.directory.search("SMI")], [1, 2])
+        self.assertEqual([user["id"] for user in self.directory.search("jane s")], [1])
+        self.assertEqual([user["id"] for user in self.directory.search("jo")], [3])
+        self.assertEqual(self.directory.search("mith"), [])
+        self.assertEqual(self.directory.search(" "), [])
+
+    def test_limit_and_labels(self):
+        """
+        Test that a search returns each user once, labelled with their name, up to the limit.
+        """
+
+        self.assertEqual(self.directory.search("j", limit=5), [
+            {"id": 1, "label": "Jane Smith (jsmith)"},
+            {"id": 3, "label": "jones"},
+        ])
+        self.assertEqual(len(self.directory.search("s", limit=1)), 1)
+
+
+class AssigneeSearchViewTest(TestCase):
+    def setUp(self):
+        # Start with a new directory version, create staff and non-staff users and log in.
+
+        cache.clear()
+        reset_staff_directory()
+        self.staff = User.objects.create_user(username="manager", password="password", is_staff=True, first_name="Mary")
+        User.objects.create_user(username="mallory", password="password")
+        User.objects.create_user(username="marvin", password="password", is_staff=True, is_active=False)
+        self.client.force_login(self.staff)
+
+    def search(self, q, **params):
+        return self.client.get(reverse('api-assignee-search'), {"q": q, **params})
+
+    def test_only_active_staff_returned(self):
+        """
+        Test that only active staff users are offered as assignees.
+        """
+
+        response = self.search("ma")
+        self.assertEqual(response.json(), {"results": [{"id": self.staff.pk, "label": "Mary (manager)"}]})
+
+    def test_requires_login(self):
+        """
+        Test that anonymous searches get a JSON 401.
+        """
+
+        self.client.logout()
+        self.assertEqual(self.search("ma").status_code, 401)
+
+    def test_invalid_limit(self):
+        """
+        Test that a malformed limit returns 400.
+        """
+
+        self.assertEqual(self.search("ma", limit="many").status_code, 400)
+        self.assertEqual(self.search("ma", limit=0).status_code, 400)
+
+    def test_directory_cached_until_user_changes(self):
+        """
+        Test that searches are answered without loading users, until a user is saved.
+        """
+
+        self.search("ma")
+        with self.assertNumQueries(2):
+            self.search("ma")
+
+        User.objects.create_user(username="mark", password="password", is_staff=True)
+        with self.assertNumQueries(3):
+            response = self.search("mar")
+        self.assertEqual([user["label"] for user in response.json()["results"]], ["mark", "Mary (manager)"])
+
+    def test_login_does_not_invalidate(self):
+        """
+        Test that logging in, which only saves last_login, keeps the directory.
+        """
+
+        directory = get_staff_directory()
+        self.client.login(username="manager", password="password")
+        self.assertIs(get_staff_directory(), directory)
+
+
+class AssigneePickerTest(TestCase):
+    def setUp(self):
+        # Create many staff users and an issue assigned to one of them.
+
+        cache.clear()
+        reset_staff_directory()
+        self.users = [User.objects.create_user(username=f"officer{i}", is_staff=True) for i in range(50)]
+        self.issue = Issue.objects.create(
+            title="Pothole", ai_summary="Summary.", description="Deep.", category="POTHOLE",
+            email="a@example.com", assigned_to=self.users[7],
+        )
+
+    def form_data(self, assigned_to):
+        return {
+            "title": "Pothole", "ai_summary": "Summary.", "description": "Deep.", "category": "POTHOLE",
+            "email": "a@example.com", "assigned_to": assigned_to, "status": "OPEN",
+        }
+
+    def test_renders_only_selected_user(self):
+        """
+        Test that the edit form renders the selected user and no list of other users.
+        """
+
+        html = str(EditForm(instance=self.issue)["assigned_to"])
+        self.assertIn('value="officer7"', html)
+        self.assertIn(f'value="{self.users[7].pk}"', html)
+        self.assertNotIn("officer8", html)
+        self.assertNotIn("<option", html)
+
+    def test_validation_is_single_lookup(self):
+        """
+        Test that validating the assignee looks up the chosen user alone, by primary key. The form
+        field fetches the user and the model checks the foreign key, without loading other users.
+        """
+
+        form = EditForm(data=self.form_data(self.users[3].pk), instance=self.issue)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertIn(f'"auth_user"."id" = {self.users[3].pk}', query["sql"])
+            self.assertIn("LIMIT", query["sql"])
+        self.assertEqual(form.cleaned_data["assigned_to"], self.users[3])
+
+    def test_non_staff_rejected(self):
+        """
+        Test that issues cannot be assigned to users who are not staff, but can keep an assignee
+        who has stopped being staff.
+        """
+
+        resident = User.objects.create_user(username="resident")
+        form = EditForm(data=self.form_data(resident.pk), instance=self.issue)
+        self.assertIn("assigned_to", form.errors)
+
+        User.objects.filter(pk=self.users[7].pk).update(is_staff=False)
+        form = EditForm(data=self.form_data(self.users[7].pk), instance=self.issue)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_filter_form_shows_chosen_assignee(self):
+        """
+        Test that the issue list filter renders the chosen assignee's name.
+        """
+
+        html = str(IssueFilterForm({"assigned_to": self.users[2].pk})["assigned_to"])
+        self.assertIn('value="officer2"', html)
+        self.assertNotIn("officer3", html)
@@ -0,0 +1,196 @@
+import random
+import time
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from council.duplicates import (
+    DuplicateIndex, find_duplicates, get_duplicate_index, issue_text, load_duplicate_index_in_background,
+    loaded_duplicate_index, reset_duplicate_index
+)
+from council.models import Issue
+
+User = get_user_model()
+
+
+class DuplicateIndexTest(TestCase):
+    def setUp(self):
+        # Create an index with a few unrelated reports and one near-duplicate pair.
+
+        self.index = DuplicateIndex()
+        self.index.add(1, "Pothole on Mill Road outside number 12, about a foot wide")
+        self.index.add(2, "Graffiti sprayed on the wall of the library car park")
+        self.index.add(3, "Fly-tipping behind the shops on Station Street, mattresses and bags")
+        self.index.add(4, "pothole on mill road outside number 12 about a foot wide!")
+
+    def test_query_finds_near_duplicate(self):
+        """
+        Test that a near-identical report is returned and unrelated reports are not.
+        """
+
+        results = self.index.query("Pothole on Mill Road outside number 12, about a foot wide", exclude=1)
+        self.assertEqual([issue_id for issue_id, _ in results], [4])
+        self.assertGreaterEqual(results[0][1], 0.9)
+
+    def test_remove(self):
+        """
+        Test that a removed issue is no longer returned and its row is reused.
+        """
+
+        self.index.remove(4)
+        self.assertEqual(self.index.query("pothole on mill road outside number 12 about a foot wide", exclude=1), [])
+        self.assertNotIn(4, self.index)
+
+        self.index.add(5, "Streetlight out on Church Lane")
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.query("Streetlight out on Church Lane")[0][0], 5)
+
+    def test_add_replaces_existing_entry(self):
+        """
+        Test that re-adding an issue with new text replaces its old signature.
+        """
+
+        self.index.add(4, "Blocked drain flooding the pavement on Elm Grove")
+        self.assertEqual(self.index.query("Pothole on Mill Road outside number 12, about a foot wide", exclude=1), [])
+        self.assertEqual(self.index.query("Blocked drain flooding the pavement on Elm Grove")[0][0], 4)
+
+    def test_query_is_fast(self):
+        """
+        Test that a lookup takes well under a millisecond on a few thousand issues.
+        """
+
+        words = (
+            "pothole road street light graffiti wall bin drain blocked flooding pavement school library "
+            "car park shops bus shelter tree fallen broken bench fence litter abandoned vehicle sign"
+        ).split()
+        rng = random.Random(0)
+        texts = [" ".join(rng.choice(words) for _ in range(rng.randint(8, 30))) for _ in range(5000)]
+
+        index = DuplicateIndex()
+        for i, text in enumerate(texts):
+            index.add(i, text)
+
+        start = time.perf_counter()
+        for text in texts[:200]:
+            index.query(text)
+        average = (time.perf_counter() - start) / 200
+        self.assertLess(average, 0.001)
+
+
+class FindDuplicatesTest(TestCase):
+    def setUp(self):
+        # Create issues in the database and start with a fresh process-wide index.
+
+        reset_duplicate_index()
+        self.original = Issue.objects.create(
+            title="Pothole", description="Large pothole on Mill Road outside the school gates", email="a@example.com"
+        )
+        self.other = Issue.objects.create(
+            title="Graffiti", description="Graffiti on the bus shelter on Station Street", email="b@example.com"
+        )
+
+    def tearDown(self):
+        reset_duplicate_index()
+
+    def test_find_duplicates_after_save(self):
+        """
+        Test that an issue saved after the index was loaded is found as a duplicate.
+        """
+
+        get_duplicate_index()
+        duplicate = Issue.objects.create(
+            title="Pothole", description="Large pothole on Mill Road outside the school gates!", email="c@example.com"
+        )
+
+        self.assertEqual(find_duplicates(duplicate), [self.original])
+        self.assertEqual(find_duplicates(self.original), [duplicate])
+
+    def test_deleted_issue_not_returned(self):
+        """
+        Test that a deleted issue is removed from the index.
+        """
+
+        duplicate = Issue.objects.create(
+            title="Pothole", description="Large pothole on Mill Road outside the school gates", email="c@example.com"
+        )
+        get_duplicate_index()
+        duplicate.delete()
+
+        self.assertEqual(find_duplicates(self.original), [])
+        self.assertNotIn(duplicate.pk, get_duplicate_index())
+
+    def test_detail_view_shows_duplicates(self):
+        """
+        Test that IssueDetailView lists likely duplicates.
+        """
+
+        duplicate = Issue.objects.create(
+            title="Pothole", description="Large pothole on Mill Road outside the school gates", email="c@example.com"
+        )
+        self.client.force_login(User.objects.create_user(username="staff", password="password"))
+        get_duplicate_index()
+
+        response = self.client.get(reverse('issue-detail', kwargs={'pk': self.original.pk}))
+
+        self.assertEqual(response.context['duplicates'], [duplicate])
+        self.assertContains(response, reverse('issue-detail', kwargs={'pk': duplicate.pk}))
+
+    def test_detail_view_does_not_load_index(self):
+        """
+        Test that IssueDetailView lists no duplicates, rather than waiting, while the index is not loaded.
+        """
+
+        Issue.objects.create(
+            title="Pothole", description="Large pothole on Mill Road outside the school gates", email="c@example.com"
+        )
+        self.client.force_login(User.objects.create_user(username="staff", password="password"))
+
+        response = self.client.get(reverse('issue-detail', kwargs={'pk': self.original.pk}))
+
+        self.assertEqual(response.context['duplicates'], [])
+        self.assertIsNone(loaded_duplicate_index())
+
+    def test_edited_description_is_reindexed(self):
+        """
+        Test that editing an issue's description replaces its entry in a loaded index, and that
+        saving other fields leaves the entry alone.
+        """
+
+        index = get_duplicate_index()
+        self.original.description = "Graffiti on the bus shelter on Station Street"
+        self.original.save()
+        self.assertEqual([issue_id for issue_id, _ in index.query(issue_text(self.other))], [self.other.pk, self.original.pk])
+
+        with patch.object(index, "add") as add:
+            self.original.status = "RESOLVED"
+            self.original.save(update_fields=["status"])
+        add.assert_not_called()
+
+    def test_edits_made_while_loading_are_indexed(self):
+        """
+        Test that an issue edited while the index was loading is indexed with its new text.
+        """
+
+        index = DuplicateIndex()
+        index.catch_up()
+        started = timezone.now()
+        Issue.objects.filter(pk=self.original.pk).update(
+            description="Graffiti on the bus shelter on Station Street", updated_at=timezone.now()
+        )
+
+        self.assertEqual(index.reindex_updated(started), 1)
+        self.assertEqual(len(index.query(issue_text(self.other), exclude=self.other.pk)), 1)
+
+    def test_load_in_background(self):
+        """
+        Test that the index is loaded on a background thread, and that a failure is logged.
+        """
+
+        with patch("council.duplicates.get_duplicate_index") as load:
+            load_duplicate_index_in_background().join()
+        load.assert_called_once_with()
+
+        with patch("council.duplicates.get_duplicate_index", side_effect=RuntimeError("boom")):
+            with self.assertLogs("council.duplicates", level="ERROR"):
+                load_duplicate_index_in_background().join()
@@ -0,0 +1,203 @@
+import asyncio
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from aisummary.utils import store_summary
+from council.events import EventBroker, publish_summary, stream_events
+from council.models import Issue
+
+User = get_user_model()
+
+
+class EventBrokerTest(SimpleTestCase):
+    async def test_delivers_events_to_interested_subscribers(self):
+        """
+        Test that events published from another thread reach every subscriber following the issue, in order.
+        """
+
+        broker = EventBroker()
+        everything, _ = broker.subscribe()
+        one_issue, _ = broker.subscribe({1})
+
+        await asyncio.to_thread(broker.publish, "summary", 2, {"summary": "Pothole filled."})
+        await asyncio.to_thread(broker.publish, "status", 1, {"status": "RESOLVED"})
+
+        first, second = await everything.get(), await everything.get()
+        self.assertEqual([first.issue_id, second.issue_id], [2, 1])
+        self.assertLess(first.id, second.id)
+        event = await one_issue.get()
+        self.assertEqual(event.data, {"issue": 1, "status": "RESOLVED"})
+        self.assertTrue(one_issue.queue.empty())
+
+    async def test_replays_missed_events(self):
+        """
+        Test that a reconnecting client is sent the events it missed, or told to reload if they are gone.
+        """
+
+        broker = EventBroker(history_size=2)
+        first = broker.publish("summary", 1, {"summary": "One."})
+        second = broker.publish("summary", 2, {"summary": "Two."})
+
+        _, missed = broker.subscribe(last_event_id=first.id)
+        self.assertEqual(missed, [second])
+        _, missed = broker.subscribe({1}, last_event_id=first.id - 1)
+        self.assertEqual(missed, [first])
+        _, missed = broker.subscribe()
+        self.assertEqual(missed, [])
+
+        broker.publish("summary", 3, {"summary": "Three."})
+        self.assertIsNone(broker.replay(first.id - 1))
+        # An ID from before this process started.
+        self.assertIsNone(broker.replay(1))
+
+    async def test_disconnects_slow_subscribers(self):
+        """
+        Test that a subscriber that falls too far behind has its events dropped and its stream ended.
+        """
+
+        broker = EventBroker(queue_size=2)
+        subscription, _ = broker.subscribe()
+        for issue_id in range(3):
+            broker.publish("summary", issue_id, {"summary": "Filled."})
+        await asyncio.sleep(0)
+        self.assertIsNone(await subscription.get())
+
+    async def test_stream(self):
+        """
+        Test that the stream sends events in the event-stream format and unsubscribes when closed.
+        """
+
+        broker = EventBroker()
+        missed = broker.publish("status", 1, {"status": "OPEN"})
+        stream = stream_events({1}, missed.id - 1, broker=broker)
+        self.assertEqual(await anext(stream), "retry: 3000\n\n")
+        self.assertEqual(await anext(stream), f'id: {missed.id}\nevent: status\ndata: {{"issue": 1, "status": "OPEN"}}\n\n')
+
+        event = broker.publish("summary", 1, {"summary": "Filled."})
+        self.assertIn(f"id: {event.id}\nevent: summary\n", await anext(stream))
+        self.assertEqual(broker.subscriber_count(), 1)
+        await stream.aclose()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_stream_asks_for_reload(self):
+        """
+        Test that a client that missed events that are no longer kept is told to reload.
+        """
+
+        stream = stream_events(last_event_id=1, broker=EventBroker())
+        await anext(stream)
+        self.assertEqual(await anext(stream), "event: reload\ndata: {}\n\n")
+        await stream.aclose()
+
+
+class IssueEventsViewTest(TestCase):
+    def setUp(self):
+        # Create a user and an issue.
+
+        self.user = User.objects.create_user(username="officer", password="password", is_staff=True)
+        self.issue = Issue.objects.create(
+            title="Pothole", ai_summary="Deep pothole.", description="Deep pothole on Mill Road.",
+            category="POTHOLE", email="a@example.com",
+        )
+
+    def test_requires_login(self):
+        """
+        Test that anonymous requests are refused.
+        """
+
+        response = self.client.get(reverse('api-issue-events'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_not_streamed_under_wsgi(self):
+        """
+        Test that WSGI requests get 204 No Content, which stops the browser reconnecting.
+        """
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('api-issue-events'))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_streams_under_asgi(self):
+        """
+        Test that ASGI requests are streamed the events of the issues they follow.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('api-issue-events'), {"issues": f"{self.issue.pk},999"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+
+        publish_summary(self.issue.pk + 1, "Someone else's issue.")
+        publish_summary(self.issue.pk, "Pothole filled in.")
+        chunk = await anext(chunks)
+        self.assertIn(b"event: summary\n", chunk)
+        self.assertIn(b'"summary": "Pothole filled in."', chunk)
+        await chunks.aclose()
+
+    async def test_rejects_bad_parameters(self):
+        """
+        Test that issue and event IDs must be integers.
+        """
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('api-issue-events'), {"issues": "1,two"})
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get(reverse('api-issue-events'), headers={"Last-Event-ID": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class PublishIssueEventsTest(TestCase):
+    def setUp(self):
+        # Create a user and an issue, and log in.
+
+        self.user = User.objects.create_user(username="officer", password="password", is_staff=True)
+        self.issue = Issue.objects.create(
+            title="Pothole", ai_summary="", description="Deep pothole on Mill Road.",
+            category="POTHOLE", email="a@example.com",
+        )
+        self.client.force_login(self.user)
+
+    def edit(self, status):
+        return self.client.post(reverse('update-issue', args=[self.issue.pk]), {
+            "title": self.issue.title,
+            "ai_summary": "Deep pothole.",
+            "description": self.issue.description,
+            "category": self.issue.category,
+            "email": self.issue.email,
+            "status": status,
+        })
+
+    def test_status_change_is_published(self):
+        """
+        Test that changing an issue's status publishes a status event once it is committed.
+        """
+
+        with patch("council.views.publish_status") as publish_status:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.edit("RESOLVED")
+            publish_status.assert_called_once_with(self.issue.pk, "RESOLVED")
+
+    def test_other_edits_are_not_published(self):
+        """
+        Test that edits leaving the status alone publish nothing.
+        """
+
+        with patch("council.views.publish_status") as publish_status:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.edit("OPEN")
+            publish_status.assert_not_called()
+
+    def test_saved_summary_is_published(self):
+        """
+        Test that storing a summary publishes a summary event, and that a stale summary does not.
+        """
+
+        stale = Issue.objects.get(pk=self.issue.pk)
+        with patch("aisummary.utils.publish_summary") as publish_summary:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(store_summary(self.issue, "Deep pothole."))
+                self.assertFalse(store_summary(stale, "Older summary."))
+            publish_summary.assert_called_once_with(self.issue.pk, "Deep pothole.")
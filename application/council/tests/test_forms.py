@@ -41,7 +41,7 @@ class EditFormTest(TestCase):
     def setUp(self):
         # Create a user and an Issue instance for testing EditForm.
 
-        self.user = User.objects.create_user(username='tester', password='password')
+        self.user = User.objects.create_user(username='tester', password='password', is_staff=True)
         self.issue = Issue.objects.create(
             title="Graffiti on Wall",
             ai_summary="",
@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from aisummary.models import SummaryJob
+from council.imports import import_issues, read_csv_rows
+from council.models import ImportCheckpoint, Issue
+
+
+class ImportIssuesCommandTest(TestCase):
+    """
+    Tests for the import_issues management command.
+    """
+
+    def setUp(self):
+        # Create a directory for the import files.
+
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w", newline="") as handle:
+            handle.write(content)
+        return path
+
+    def write_csv(self, count, invalid_rows=()):
+        lines = ["title,description,category,email"]
+        for i in range(count):
+            email = "not-an-email" if i in invalid_rows else f"resident{i}@example.com"
+            lines.append(f"Imported issue {i},\"Description, with a comma {i}\",POTHOLE,{email}")
+        return self.write_file("issues.csv", "\n".join(lines) + "\n")
+
+    def run_import(self, *args):
+        out = StringIO()
+        err = StringIO()
+        call_command("import_issues", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_imports_csv(self):
+        """
+        Test that valid CSV rows are imported and each new issue gets one queued summary job.
+        """
+
+        path = self.write_csv(5)
+        out, _ = self.run_import(path, "--batch-size", "2")
+
+        issues = Issue.objects.order_by("id")
+        self.assertEqual(issues.count(), 5)
+        self.assertEqual(issues[0].description, "Description, with a comma 0")
+        self.assertEqual(issues[0].category, "POTHOLE")
+        self.assertEqual(issues[0].ai_summary, "")
+        self.assertEqual(
+            sorted(SummaryJob.objects.values_list("issue_id", flat=True)),
+            sorted(issues.values_list("id", flat=True)),
+        )
+        self.assertIn("rows/s", out)
+        self.assertIn("Imported 5 issues from 5 rows (0 rejected).", out)
+
+    def test_invalid_rows_are_rejected(self):
+        """
+        Test that rows failing the issue form's validation are skipped and reported by row number.
+        """
+
+        path = self.write_csv(4, invalid_rows={2})
+        out, err = self.run_import(path)
+
+        self.assertEqual(Issue.objects.count(), 3)
+        self.assertFalse(Issue.objects.filter(title="Imported issue 2").exists())
+        self.assertIn("Row 3 rejected: email:", err)
+        self.assertIn("(1 rejected)", out)
+
+    def test_imports_jsonl(self):
+        """
+        Test that JSON Lines files are imported, skipping blank lines and rejecting malformed ones.
+        """
+
+        rows = [
+            json.dumps({"title": "Graffiti", "description": "On the bridge", "category": "GRAFFITI",
+                        "email": "a@example.com"}),
+            "",
+            "{not json",
+            json.dumps({"title": "No email", "description": "Missing", "category": "OTHER"}),
+        ]
+        path = self.write_file("issues.jsonl", "\n".join(rows) + "\n")
+        out, err = self.run_import(path)
+
+        self.assertEqual(list(Issue.objects.values_list("title", flat=True)), ["Graffiti"])
+        self.assertIn("Row 2 rejected: __all__: The row is not a JSON object.", err)
+        self.assertIn("Row 3 rejected: email:", err)
+
+    def test_no_summaries(self):
+        """
+        Test that --no-summaries imports issues without queueing summary jobs.
+        """
+
+        self.run_import(self.write_csv(3), "--no-summaries")
+        self.assertEqual(Issue.objects.count(), 3)
+        self.assertFalse(SummaryJob.objects.exists())
+
+    def test_finished_import_is_not_repeated(self):
+        """
+        Test that running a finished import again does nothing unless --restart is passed.
+        """
+
+        path = self.write_csv(3)
+        self.run_import(path)
+        out, _ = self.run_import(path)
+        self.assertIn("already been imported", out)
+        self.assertEqual(Issue.objects.count(), 3)
+
+        self.run_import(path, "--restart")
+        self.assertEqual(Issue.objects.count(), 6)
+
+    def test_unknown_format(self):
+        """
+        Test that a file with an unrecognised extension needs --format.
+        """
+
+        path = self.write_file("issues.txt", "title,description,category,email\n")
+        with self.assertRaisesMessage(Exception, "Pass --format"):
+            self.run_import(path)
+        self.run_import(path, "--format", "csv")
+
+
+class ImportResumeTest(TestCase):
+    """
+    Tests that an interrupted import resumes from its checkpoint.
+    """
+
+    def rows(self, count):
+        lines = ["title,description,category,email"]
+        lines += [f"Issue {i},Description {i},OTHER,r{i}@example.com" for i in range(count)]
+        return read_csv_rows(StringIO("\n".join(lines)))
+
+    def test_resume_after_interruption(self):
+        """
+        Test that rerunning an import after a crash imports each row exactly once.
+        """
+
+        def crash(checkpoint, rows_per_second):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            import_issues(self.rows(10), "test-import", batch_size=4, on_batch=crash)
+
+        checkpoint = ImportCheckpoint.objects.get(source="test-import")
+        self.assertEqual(checkpoint.rows_read, 4)
+        self.assertFalse(checkpoint.finished)
+        self.assertEqual(Issue.objects.count(), 4)
+
+        checkpoint = import_issues(self.rows(10), "test-import", batch_size=4)
+        self.assertTrue(checkpoint.finished)
+        self.assertEqual(checkpoint.imported, 10)
+        self.assertEqual(
+            list(Issue.objects.order_by("id").values_list("title", flat=True)),
+            [f"Issue {i}" for i in range(10)],
+        )
+        self.assertEqual(SummaryJob.objects.count(), 10)
@@ -0,0 +1,183 @@
+import logging
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from council.duplicates import get_duplicate_index, reset_duplicate_index
+from council.models import Issue
+from council.profiling import ProfileBuffer, QueryRecorder, request_profiles
+from council.testing import QueryBudgetMixin
+from council.views import IssueDetailView
+
+User = get_user_model()
+
+
+class ProfileBufferTest(TestCase):
+    def test_oldest_dropped(self):
+        """
+        Test that the buffer keeps only its most recent profiles, newest first.
+        """
+
+        buffer = ProfileBuffer(size=3)
+        for number in range(5):
+            buffer.add({"number": number})
+        self.assertEqual([profile["number"] for profile in buffer.snapshot()], [4, 3, 2])
+
+    def test_slowest_queries(self):
+        """
+        Test that the recorder counts every query but keeps only the slowest, slowest first.
+        """
+
+        recorder = QueryRecorder(keep_slowest=2)
+        with patch("council.profiling.time.perf_counter", side_effect=[0, 1, 0, 3, 0, 2]):
+            for sql in ["SELECT 1", "SELECT 3", "SELECT 2"]:
+                recorder(lambda *args: None, sql, None, False, {})
+        self.assertEqual(recorder.count, 3)
+        self.assertEqual(recorder.total_time, 6)
+        self.assertEqual([query["sql"] for query in recorder.slowest()], ["SELECT 3", "SELECT 2"])
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        # Create a staff user, a non-staff user and an issue, and start with an empty buffer.
+
+        self.staff = User.objects.create_user(username="manager", password="password", is_staff=True)
+        self.user = User.objects.create_user(username="resident", password="password")
+        self.issue = Issue.objects.create(
+            title="Pothole", description="Deep.", category="POTHOLE", email="a@example.com",
+        )
+        request_profiles.clear()
+
+    def test_request_recorded(self):
+        """
+        Test that a request's queries, database time and render time are recorded.
+        """
+
+        self.client.get(reverse('issue-detail', args=[self.issue.pk]))
+        profile = request_profiles.snapshot()[0]
+        self.assertEqual((profile["method"], profile["status"]), ("GET", 200))
+        self.assertEqual(profile["path"], reverse('issue-detail', args=[self.issue.pk]))
+        self.assertGreater(profile["queries"], 0)
+        self.assertEqual(profile["query_budget"], IssueDetailView.query_budget)
+        self.assertGreater(profile["render_ms"], 0)
+        self.assertGreaterEqual(profile["total_ms"], profile["db_ms"])
+        self.assertTrue(profile["slowest_queries"])
+
+    async def test_asgi_request_recorded(self):
+        """
+        Test that queries made by an async view under ASGI are counted.
+        """
+
+        await self.async_client.get(reverse('create-issue'))
+        self.assertEqual(request_profiles.snapshot()[0]["status"], 200)
+
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(reverse('create-issue'))
+        self.assertGreater(request_profiles.snapshot()[0]["queries"], 0)
+
+    def test_over_budget_logged(self):
+        """
+        Test that a request over its view's query budget is logged as a warning, and others at DEBUG,
+        which the logger leaves out by default.
+        """
+
+        self.assertFalse(logging.getLogger("council.profiling").isEnabledFor(logging.INFO))
+        url = reverse('issue-detail', args=[self.issue.pk])
+        with self.assertLogs("council.profiling", level="DEBUG") as logs:
+            self.client.get(url)
+        self.assertEqual(logs.records[0].levelname, "DEBUG")
+
+        with patch.object(IssueDetailView, "query_budget", 0):
+            with self.assertLogs("council.profiling", level="WARNING") as logs:
+                self.client.get(url)
+        self.assertIn('"query_budget": 0', logs.output[0])
+
+    def test_profiles_page_staff_only(self):
+        """
+        Test that only staff can see the recent request profiles.
+        """
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('request-profiles')).status_code, 403)
+
+        self.client.force_login(self.staff)
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('request-profiles'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["profiles"][0]["path"], reverse('home'))
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        # Log in as staff with a few near-identical issues, and load the duplicate index, as servers
+        # do when they start, so the detail page looks up duplicates.
+
+        self.staff = User.objects.create_user(username="manager", password="password", is_staff=True)
+        self.client.force_login(self.staff)
+        self.issues = [
+            Issue.objects.create(
+                title="Pothole", description=f"Deep pothole outside the school gates on Mill Road ({number}).",
+                category="POTHOLE", email="a@example.com",
+                assigned_to=self.staff,
+            )
+            for number in range(3)
+        ]
+        reset_duplicate_index()
+        get_duplicate_index()
+
+    def tearDown(self):
+        reset_duplicate_index()
+
+    def test_pages_within_budget(self):
+        """
+        Test that the main pages stay within their query budgets.
+        """
+
+        issue = self.issues[0]
+        self.assertWithinQueryBudget("get", reverse('home'))
+        response = self.assertWithinQueryBudget("get", reverse('issue-detail', args=[issue.pk]))
+        self.assertEqual(len(response.context["duplicates"]), 2)
+        self.assertWithinQueryBudget("get", reverse('search'), {"q": "pothole"})
+        self.assertWithinQueryBudget("get", reverse('dashboard'))
+        self.assertWithinQueryBudget("get", reverse('update-issue', args=[issue.pk]))
+        self.assertWithinQueryBudget("get", reverse('delete-issue', args=[issue.pk]))
+        self.assertWithinQueryBudget("get", reverse('request-profiles'))
+
+    def test_writes_within_budget(self):
+        """
+        Test that creating, editing and deleting an issue stay within their query budgets.
+        """
+
+        issue = self.issues[0]
+        response = self.assertWithinQueryBudget("post", reverse('create-issue'), {
+            "title": "New", "description": "New.", "category": "POTHOLE", "email": "b@example.com",
+        })
+        self.assertEqual(response.status_code, 302)
+
+        response = self.assertWithinQueryBudget("post", reverse('update-issue', args=[issue.pk]), {
+            "title": issue.title, "ai_summary": "Summary.", "description": issue.description, "category": "GRAFFITI",
+            "email": issue.email, "assigned_to": self.staff.pk, "status": "RESOLVED",
+        })
+        self.assertEqual(response.status_code, 302)
+
+        response = self.assertWithinQueryBudget("post", reverse('delete-issue', args=[issue.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_over_budget_fails(self):
+        """
+        Test that a view over its budget fails the check and lists the queries it made.
+        """
+
+        with patch.object(IssueDetailView, "query_budget", 1):
+            with self.assertRaises(AssertionError) as failure:
+                self.assertWithinQueryBudget("get", reverse('issue-detail', args=[self.issues[1].pk]))
+        self.assertIn("over its budget of 1", str(failure.exception))
+        self.assertIn("SELECT", str(failure.exception))
+
+    def test_view_without_budget_fails(self):
+        """
+        Test that checking a view that declares no budget fails.
+        """
+
+        with self.assertRaises(AssertionError):
+            self.assertWithinQueryBudget("get", reverse('export-issues'))
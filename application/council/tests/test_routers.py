@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from council.duplicates import reset_duplicate_index
+from council.models import Issue
+from council.routers import REPLICA, ReadReplicaRouter, replica_reads
+
+User = get_user_model()
+
+
+class ReadReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReadReplicaRouter()
+
+    def test_reads_routed_inside_block(self):
+        """
+        Test that only reads made inside replica_reads() go to the replica.
+        """
+
+        self.assertIsNone(self.router.db_for_read(Issue))
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Issue), REPLICA)
+            self.assertEqual(self.router.db_for_write(Issue), "default")
+        self.assertIsNone(self.router.db_for_read(Issue))
+
+    def test_replica_not_migrated(self):
+        """
+        Test that migrations only run against the default database.
+        """
+
+        self.assertTrue(self.router.allow_migrate("default", "council"))
+        self.assertFalse(self.router.allow_migrate(REPLICA, "council"))
+
+
+@override_settings(DATABASE_ROUTERS=["council.routers.ReadReplicaRouter"])
+class ReplicaViewsTest(TransactionTestCase):
+    databases = {"default", REPLICA}
+
+    def setUp(self):
+        # Log in and create an issue. Data is committed, so the replica connection can see it.
+
+        reset_duplicate_index()
+        self.user = User.objects.create_user(username="resident", password="password", is_staff=True)
+        self.client.force_login(self.user)
+        self.issue = Issue.objects.create(
+            title="Pothole", description="Deep.", category="POTHOLE", email="a@example.com", ai_summary="Deep pothole.",
+        )
+
+    def test_list_and_detail_read_from_replica(self):
+        """
+        Test that the issue list and detail pages read from the replica.
+        """
+
+        for url in [reverse('home'), reverse('issue-detail', args=[self.issue.pk])]:
+            with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+                response = self.client.get(url)
+            self.assertContains(response, "Pothole")
+            self.assertTrue(replica_queries, url)
+
+    def test_writes_use_default(self):
+        """
+        Test that editing an issue reads and writes the default database only.
+        """
+
+        with CaptureQueriesContext(connections[REPLICA]) as replica_queries:
+            response = self.client.post(reverse('update-issue', args=[self.issue.pk]), {
+                "title": "Pothole", "ai_summary": "Deep pothole.", "description": "Deep.", "category": "POTHOLE",
+                "email": "a@example.com", "status": "RESOLVED",
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(replica_queries), 0)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.status, "RESOLVED")
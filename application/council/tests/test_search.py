@@ -0,0 +1,119 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from council.models import Issue
+from council.search import build_match_query, search_issues
+
+User = get_user_model()
+
+
+class SearchIssuesTest(TestCase):
+    def setUp(self):
+        # Create issues to search.
+
+        self.pothole = Issue.objects.create(
+            title="Pothole on Mill Road",
+            description="A deep hole near the bus stop.",
+            ai_summary="",
+            email="a@example.com",
+        )
+        self.drain = Issue.objects.create(
+            title="Blocked drain",
+            description="Water pooling on Mill Road after rain, next to a pothole.",
+            ai_summary="",
+            email="b@example.com",
+        )
+
+    def search_ids(self, text):
+        return [issue.pk for issue in search_issues(text)]
+
+    def test_bm25_ranking(self):
+        """
+        Test that an issue matching in its title ranks above one matching only in its description.
+        """
+
+        self.assertEqual(self.search_ids("pothole"), [self.pothole.pk, self.drain.pk])
+
+    def test_all_words_must_match(self):
+        """
+        Test that every word in the search text must be present.
+        """
+
+        self.assertEqual(self.search_ids("drain rain"), [self.drain.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        """
+        Test that the index is kept in sync by QuerySet.update() and delete(), not just save().
+        """
+
+        Issue.objects.filter(pk=self.drain.pk).update(ai_summary="Flooded road by the streetlight")
+        self.assertEqual(self.search_ids("streetlight"), [self.drain.pk])
+
+        self.pothole.delete()
+        self.assertEqual(self.search_ids("pothole"), [self.drain.pk])
+
+    def test_snippet_highlighting_is_escaped(self):
+        """
+        Test that matches are wrapped in <mark> tags and the rest of the text is escaped.
+        """
+
+        Issue.objects.create(title="Sign", description="<b>Fallen</b> sign", ai_summary="", email="c@example.com")
+
+        snippet = search_issues("fallen")[0].snippet
+        self.assertIn("<mark>Fallen</mark>", snippet)
+        self.assertIn("&lt;b&gt;", snippet)
+
+    def test_operators_in_input_are_quoted(self):
+        """
+        Test that FTS5 syntax in the search text is treated as plain words.
+        """
+
+        self.assertEqual(build_match_query('mill AND "road* OR'), '"mill" "AND" "road" "OR"')
+        self.assertEqual(search_issues('AND( "*'), [])
+        self.assertEqual(search_issues("   "), [])
+
+    def test_rebuild_command(self):
+        """
+        Test that the rebuild command restores a missing index.
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM council_issue_fts")
+        self.assertEqual(self.search_ids("pothole"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search_ids("pothole"), [self.pothole.pk, self.drain.pk])
+
+
+class SearchViewTest(TestCase):
+    def setUp(self):
+        # Create an issue and a user.
+
+        self.issue = Issue.objects.create(
+            title="Graffiti on the library", description="Spray paint.", ai_summary="", email="a@example.com"
+        )
+        self.user = User.objects.create_user(username="staff", password="password")
+
+    def test_search_results(self):
+        """
+        Test that the search view lists matching issues for a logged-in user.
+        """
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('search'), {"q": "library"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "search.html")
+        self.assertEqual([issue.pk for issue in response.context['results']], [self.issue.pk])
+        self.assertContains(response, "<mark>library</mark>")
+
+    def test_search_requires_login(self):
+        """
+        Test that anonymous users get no results.
+        """
+
+        response = self.client.get(reverse('search'), {"q": "library"})
+        self.assertEqual(response.context['results'], [])
@@ -0,0 +1,180 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from council.imports import import_issues
+from council.models import Issue, IssueStat
+from council.stats import find_stat_differences, rebuild_issue_stats
+
+User = get_user_model()
+
+
+class IssueStatsTest(TestCase):
+    def setUp(self):
+        # Create an open pothole.
+
+        self.today = timezone.localdate()
+        self.issue = Issue.objects.create(
+            title="Pothole", description="Deep.", category="POTHOLE", email="a@example.com",
+        )
+
+    def get_count(self, category, status):
+        stat = IssueStat.objects.filter(day=self.today, category=category, status=status).first()
+        return stat.count if stat else 0
+
+    def test_create_counts_issue(self):
+        """
+        Test that a new issue is counted under its creation day, category and status.
+        """
+
+        self.assertEqual(self.get_count("POTHOLE", "OPEN"), 1)
+        Issue.objects.create(title="Another", description="Deep.", category="POTHOLE", email="b@example.com")
+        self.assertEqual(self.get_count("POTHOLE", "OPEN"), 2)
+
+    def test_status_change_moves_issue(self):
+        """
+        Test that changing the status moves the issue to the row for its new status.
+        """
+
+        self.issue.status = "IN_PROGRESS"
+        self.issue.save()
+        self.assertEqual(self.get_count("POTHOLE", "OPEN"), 0)
+        self.assertEqual(self.get_count("POTHOLE", "IN_PROGRESS"), 1)
+
+    def test_category_change_moves_issue(self):
+        """
+        Test that changing the category moves the issue to the row for its new category.
+        """
+
+        self.issue.category = "GRAFFITI"
+        self.issue.save()
+        self.assertEqual(self.get_count("POTHOLE", "OPEN"), 0)
+        self.assertEqual(self.get_count("GRAFFITI", "OPEN"), 1)
+
+    def test_resolution_time(self):
+        """
+        Test that resolving an issue records when, and adds the time it took to the rollup.
+        Reopening the issue takes the time away again.
+        """
+
+        Issue.objects.filter(pk=self.issue.pk).update(created_at=timezone.now() - timedelta(hours=5))
+        self.issue.refresh_from_db()
+        rebuild_issue_stats()
+
+        self.issue.status = "RESOLVED"
+        self.issue.save()
+        self.assertIsNotNone(self.issue.resolved_at)
+        stat = IssueStat.objects.get(category="POTHOLE", status="RESOLVED")
+        self.assertEqual(stat.count, 1)
+        self.assertAlmostEqual(stat.total_resolution_time.total_seconds(), 5 * 3600, delta=60)
+
+        self.issue.status = "OPEN"
+        self.issue.save()
+        self.assertIsNone(self.issue.resolved_at)
+        stat.refresh_from_db()
+        self.assertEqual((stat.count, stat.total_resolution_time), (0, timedelta(0)))
+        self.assertEqual(find_stat_differences(), [])
+
+    def test_delete_removes_issue(self):
+        """
+        Test that a deleted issue is no longer counted.
+        """
+
+        self.issue.delete()
+        self.assertEqual(self.get_count("POTHOLE", "OPEN"), 0)
+
+    def test_import_updates_stats(self):
+        """
+        Test that issues created by a bulk import are counted.
+        """
+
+        rows = [{"title": f"Issue {i}", "description": "Imported.", "category": "ASB", "email": "c@example.com"}
+                for i in range(3)]
+        import_issues(iter(rows), "test-import")
+        self.assertEqual(self.get_count("ASB", "OPEN"), 3)
+
+    def test_rollups_match_recount(self):
+        """
+        Test that the rollups match a full recount after a mix of changes.
+        """
+
+        other = Issue.objects.create(title="Lights", description="Out.", category="STREET_LIGHTING", email="d@example.com")
+        other.status = "RESOLVED"
+        other.save()
+        self.issue.category = "OTHER"
+        self.issue.save()
+        Issue.objects.create(title="Drain", description="Blocked.", category="BLOCKED_DRAIN", email="e@example.com").delete()
+
+        self.assertEqual(find_stat_differences(), [])
+
+    def test_checker_finds_and_rebuild_fixes_drift(self):
+        """
+        Test that a change made without save() is reported by check_issue_stats and fixed by rebuild_issue_stats.
+        """
+
+        Issue.objects.filter(pk=self.issue.pk).update(status="IN_PROGRESS")
+        differences = find_stat_differences()
+        self.assertEqual(len(differences), 2)
+
+        with self.assertRaisesMessage(CommandError, "2 rollup rows are out of date"):
+            call_command("check_issue_stats", stdout=StringIO(), stderr=StringIO())
+
+        call_command("rebuild_issue_stats", stdout=StringIO())
+        self.assertEqual(self.get_count("POTHOLE", "IN_PROGRESS"), 1)
+        self.assertEqual(find_stat_differences(), [])
+        call_command("check_issue_stats", stdout=StringIO())
+
+
+class DashboardViewTest(TestCase):
+    def setUp(self):
+        # Create a staff user, a non-staff user and some issues.
+
+        self.staff = User.objects.create_user(username="manager", password="password", is_staff=True)
+        self.user = User.objects.create_user(username="resident", password="password")
+        for category, status in [("POTHOLE", "OPEN"), ("POTHOLE", "RESOLVED"), ("GRAFFITI", "IN_PROGRESS")]:
+            issue = Issue.objects.create(title="Issue", description="Description.", category=category, email="a@example.com")
+            issue.status = status
+            issue.save()
+
+    def test_staff_only(self):
+        """
+        Test that only staff can see the dashboard.
+        """
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 403)
+
+    def test_dashboard_counts(self):
+        """
+        Test that the dashboard shows the counts per category and status, and per day.
+        """
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+        categories = {row["category"]: row for row in response.context["categories"]}
+        self.assertEqual(categories["POTHOLE"]["counts"], [1, 0, 1])
+        self.assertEqual(categories["POTHOLE"]["total"], 2)
+        self.assertIsNotNone(categories["POTHOLE"]["average_resolution"])
+        self.assertEqual(categories["GRAFFITI"]["counts"], [0, 1, 0])
+        self.assertIsNone(categories["GRAFFITI"]["average_resolution"])
+        self.assertEqual(response.context["daily"], [{"day": timezone.localdate(), "counts": [1, 1, 1]}])
+
+    def test_dashboard_reads_only_rollups(self):
+        """
+        Test that the dashboard never queries the issue table.
+        """
+
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('dashboard'), {"days": 7})
+
+        tables = " ".join(query["sql"] for query in queries)
+        self.assertIn('"council_issuestat"', tables)
+        self.assertNotIn('"council_issue"', tables)
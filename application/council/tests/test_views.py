@@ -1,8 +1,19 @@
-from django.test import TestCase
+import csv
+import io
+import itertools
+from datetime import datetime, timezone as dt_timezone
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from council.models import Issue
+from council.signals import issue_card_cache_key
+from council.testing import QueryBudgetMixin
+from council.views import IssuesView
 from django.contrib.auth import get_user_model
 from unittest.mock import patch
+from aisummary.utils import store_summary
 
 User = get_user_model()
 
@@ -52,6 +63,256 @@ class IssuesViewTest(TestCase):
         self.assertEqual(len(response.context['object_list']), 2)
 
 
+class IssuesViewPaginationTest(TestCase):
+    def setUp(self):
+        # Create enough assigned issues for several pages and log in.
+
+        self.user = User.objects.create_user(username="staff", password="password")
+        self.issues = Issue.objects.bulk_create([
+            Issue(
+                title=f"Issue {i}",
+                ai_summary="",
+                description=f"Description for issue {i}.",
+                email=f"user{i}@example.com",
+                assigned_to=self.user,
+            )
+            for i in range(45)
+        ])
+        self.client.force_login(self.user)
+
+    def test_first_page(self):
+        """
+        Test that the first page holds the newest page_size issues and a cursor to the next page.
+        """
+
+        response = self.client.get(reverse('home'))
+        issues = response.context['object_list']
+        self.assertEqual(len(issues), 20)
+        self.assertEqual(issues[0].title, "Issue 44")
+        self.assertEqual(response.context['next_cursor'], issues[-1].pk)
+
+    def test_follow_cursor_to_last_page(self):
+        """
+        Test that following the cursors visits every issue exactly once.
+        """
+
+        seen = []
+        url = reverse('home')
+        while url:
+            response = self.client.get(url)
+            seen.extend(issue.pk for issue in response.context['object_list'])
+            cursor = response.context['next_cursor']
+            url = f"{reverse('home')}?before={cursor}" if cursor else None
+
+        self.assertEqual(seen, sorted((issue.pk for issue in self.issues), reverse=True))
+
+    def test_invalid_cursor(self):
+        """
+        Test that a malformed cursor returns 404.
+        """
+
+        response = self.client.get(reverse('home'), {"before": "abc"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_count_is_fixed_per_page(self):
+        """
+        Test that every page takes the same number of queries, with no query per assigned user.
+        The five queries are the two ETag validators, the session, the logged-in user and the page of issues.
+        """
+
+        last_page_cursor = self.issues[5].pk
+        for params in [{}, {"before": self.issues[25].pk}, {"before": last_page_cursor}]:
+            with self.assertNumQueries(5):
+                response = self.client.get(reverse('home'), params)
+            self.assertContains(response, "staff")
+
+
+class IssueCardCacheTest(TestCase):
+    def setUp(self):
+        # Start with an empty cache, create an issue and log in.
+
+        cache.clear()
+        self.issue = Issue.objects.create(
+            title="Cached card", ai_summary="Summary", description="Description.", email="a@example.com"
+        )
+        self.client.force_login(User.objects.create_user(username="staff", password="password"))
+
+    def test_card_is_cached(self):
+        """
+        Test that rendering the list caches each issue's card under its pk and updated_at.
+        """
+
+        self.client.get(reverse('home'))
+        self.assertIn("Cached card", cache.get(issue_card_cache_key(self.issue)))
+
+    def test_save_invalidates_card(self):
+        """
+        Test that saving an issue drops its cached card and the list shows the change.
+        """
+
+        self.client.get(reverse('home'))
+        old_key = issue_card_cache_key(self.issue)
+
+        self.issue.title = "Edited card"
+        self.issue.save()
+
+        self.assertIsNone(cache.get(old_key))
+        self.assertContains(self.client.get(reverse('home')), "Edited card")
+
+    def test_summary_update_shows_new_card(self):
+        """
+        Test that a summary written with QuerySet.update() shows up, as it bumps updated_at.
+        """
+
+        Issue.objects.filter(pk=self.issue.pk).update(ai_summary="")
+        self.client.get(reverse('home'))
+
+        store_summary(Issue.objects.get(pk=self.issue.pk), "Freshly generated summary")
+
+        self.assertContains(self.client.get(reverse('home')), "Freshly generated summary")
+
+    def test_delete_invalidates_card(self):
+        """
+        Test that deleting an issue drops its cached card.
+        """
+
+        self.client.get(reverse('home'))
+        key = issue_card_cache_key(self.issue)
+
+        self.issue.delete()
+
+        self.assertIsNone(cache.get(key))
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        # Create an issue and log in.
+
+        self.issue = Issue.objects.create(
+            title="Conditional", ai_summary="Summary", description="Description.", email="a@example.com"
+        )
+        self.user = User.objects.create_user(username="staff", password="password")
+        self.client.force_login(self.user)
+        self.detail_url = reverse('issue-detail', kwargs={'pk': self.issue.pk})
+
+    def test_list_not_modified(self):
+        """
+        Test that repeating a list request with its ETag returns 304 without rendering the template,
+        using only the session, user and validator queries.
+        """
+
+        response = self.client.get(reverse('home'))
+        self.assertTrue(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('home'), headers={"if-none-match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertTemplateNotUsed(response, "home.html")
+
+    def test_list_changes_after_edit_and_delete(self):
+        """
+        Test that editing or deleting an issue changes the list's ETag.
+        """
+
+        etag = self.client.get(reverse('home'))["ETag"]
+        self.issue.save()
+        response = self.client.get(reverse('home'), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        Issue.objects.create(title="Second", ai_summary="", description="Second.", email="b@example.com").delete()
+        self.assertEqual(self.client.get(reverse('home'), headers={"if-none-match": etag}).status_code, 304)
+        self.issue.delete()
+        self.assertEqual(self.client.get(reverse('home'), headers={"if-none-match": etag}).status_code, 200)
+
+    def test_list_validators_are_cheap(self):
+        """
+        Test that the list's validators read the latest change from an index and the count from the
+        rollups, rather than aggregating over the issue table.
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('home'), {"status": "OPEN"})
+        issue_queries = [query["sql"] for query in queries if 'FROM "council_issue"' in query["sql"]]
+        self.assertFalse([sql for sql in issue_queries if "COUNT(" in sql or "MAX(" in sql])
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + issue_queries[0].replace("%s", "1"))
+            self.assertIn("council_issue_updated_idx", str(cursor.fetchall()))
+
+    def test_anonymous_list_skips_validators(self):
+        """
+        Test that logged-out visitors, who only see the welcome page, get no ETag and no validator queries.
+        """
+
+        self.client.logout()
+        # Only the page of issues.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_list_etag_depends_on_filters_and_user(self):
+        """
+        Test that the ETag differs between filters and between users.
+        """
+
+        etag = self.client.get(reverse('home'))["ETag"]
+        self.assertNotEqual(self.client.get(reverse('home'), {"status": "OPEN"})["ETag"], etag)
+
+        self.client.force_login(User.objects.create_user(username="other", password="password"))
+        self.assertNotEqual(self.client.get(reverse('home'))["ETag"], etag)
+
+    def test_etag_changes_after_new_login(self):
+        """
+        Test that a page cached before logging out and in again is not reused, as its CSRF token
+        is no longer valid.
+        """
+
+        self.client.login(username="staff", password="password")
+        etag = self.client.get(reverse('home'))["ETag"]
+        self.client.logout()
+        self.client.login(username="staff", password="password")
+
+        response = self.client.get(reverse('home'), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_not_modified(self):
+        """
+        Test that the detail view honours both If-None-Match and If-Modified-Since.
+        """
+
+        response = self.client.get(self.detail_url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response = self.client.get(self.detail_url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertTemplateNotUsed(response, "issue_details.html")
+        response = self.client.get(self.detail_url, headers={"if-modified-since": last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_modified_after_summary(self):
+        """
+        Test that a summary arriving in the background changes the detail page's ETag.
+        """
+
+        Issue.objects.filter(pk=self.issue.pk).update(ai_summary="")
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        store_summary(Issue.objects.get(pk=self.issue.pk), "New summary")
+
+        response = self.client.get(self.detail_url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "New summary")
+
+    def test_missing_issue_is_404(self):
+        """
+        Test that a missing issue still returns 404.
+        """
+
+        response = self.client.get(reverse('issue-detail', kwargs={'pk': self.issue.pk + 100}))
+        self.assertEqual(response.status_code, 404)
+
+
 class IssueDetailViewTest(TestCase):
     def setUp(self):
         # Create an Issue instance for testing the detail view.
@@ -96,11 +357,23 @@ class CreateIssueViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, "create_issue.html")
 
-    @patch('council.views.generate_ai_summary_async')
+    async def test_create_issue_view_get_asgi(self):
+        """
+        Test that the form renders for a logged-in user under ASGI, where the user must be loaded
+        with the async ORM.
+        """
+
+        user = await User.objects.acreate_user(username="resident", password="password")
+        await self.async_client.aforce_login(user)
+        response = await self.async_client.get(self.create_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Logout")
+
+    @patch('council.views.agenerate_ai_summary_async')
     def test_create_issue_view_post(self, mock_generate_ai_summary_async):
         """
         Test that posting valid data to CreateIssueView creates a new Issue 
-        and calls generate_ai_summary_async with the new issue's ID.
+        and calls agenerate_ai_summary_async with the new issue's ID.
         """
 
         form_data = {
@@ -112,14 +385,41 @@ class CreateIssueViewTest(TestCase):
         response = self.client.post(self.create_url, data=form_data)
         self.assertEqual(response.status_code, 302)
         issue = Issue.objects.get(title="New Issue")
-        mock_generate_ai_summary_async.assert_called_once_with(issue.id)
+        mock_generate_ai_summary_async.assert_awaited_once_with(issue.id, run_in_loop=False)
+
+    @patch('council.views.agenerate_ai_summary_async')
+    async def test_create_issue_view_post_asgi(self, mock_generate_ai_summary_async):
+        """
+        Test that under ASGI the summary is started on the event loop.
+        """
+
+        form_data = {
+            "title": "ASGI Issue",
+            "description": "Created through the ASGI handler.",
+            "category": "POTHOLE",
+            "email": "asgi@example.com",
+        }
+        response = await self.async_client.post(self.create_url, data=form_data)
+        self.assertEqual(response.status_code, 302)
+        issue = await Issue.objects.aget(title="ASGI Issue")
+        mock_generate_ai_summary_async.assert_awaited_once_with(issue.id, run_in_loop=True)
+
+    def test_create_issue_view_post_invalid(self):
+        """
+        Test that an invalid form is shown again with its errors and nothing is saved.
+        """
+
+        response = self.client.post(self.create_url, data={"title": "No email", "description": "Missing."})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors["email"])
+        self.assertFalse(Issue.objects.exists())
 
 
 class UpdateIssueViewTest(TestCase):
     def setUp(self):
         # Create a user and an Issue instance for testing the UpdateIssueView.
 
-        self.user = User.objects.create_user(username="editor", password="password")
+        self.user = User.objects.create_user(username="editor", password="password", is_staff=True)
         self.issue = Issue.objects.create(
             title="Update Issue",
             ai_summary="",
@@ -195,3 +495,223 @@ class DeleteIssueViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         with self.assertRaises(Issue.DoesNotExist):
             Issue.objects.get(pk=self.issue.pk)
+
+
+class IssuesViewFilterTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        # Create issues across statuses, categories, assignees and dates, and log in.
+
+        self.user = User.objects.create_user(username="staff", password="password")
+        self.other = User.objects.create_user(username="other", password="password")
+        self.pothole = Issue.objects.create(
+            title="Pothole", description="Pothole.", category="POTHOLE", status="OPEN",
+            email="a@example.com", assigned_to=self.user,
+        )
+        self.graffiti = Issue.objects.create(
+            title="Graffiti", description="Graffiti.", category="GRAFFITI", status="RESOLVED",
+            email="b@example.com", assigned_to=self.other,
+        )
+        self.old = Issue.objects.create(
+            title="Old drain", description="Drain.", category="BLOCKED_DRAIN", status="OPEN",
+            email="c@example.com",
+        )
+        Issue.objects.filter(pk=self.old.pk).update(created_at=datetime(2024, 1, 15, 12, tzinfo=dt_timezone.utc))
+        self.client.force_login(self.user)
+
+    def get_titles(self, params):
+        response = self.client.get(reverse('home'), params)
+        self.assertEqual(response.status_code, 200)
+        return [issue.title for issue in response.context['object_list']]
+
+    def test_filter_by_status(self):
+        """
+        Test that the list can be filtered by status.
+        """
+
+        self.assertEqual(self.get_titles({"status": "OPEN"}), ["Old drain", "Pothole"])
+
+    def test_filter_by_category(self):
+        """
+        Test that the list can be filtered by category.
+        """
+
+        self.assertEqual(self.get_titles({"category": "GRAFFITI"}), ["Graffiti"])
+
+    def test_filter_by_assignee(self):
+        """
+        Test that the list can be filtered by the assigned user.
+        """
+
+        self.assertEqual(self.get_titles({"assigned_to": self.other.pk}), ["Graffiti"])
+
+    def test_filtered_list_within_query_budget(self):
+        """
+        Test that a filtered list stays within its query budget, fetching the assignee only once.
+        """
+
+        self.assertWithinQueryBudget("get", reverse('home'), {"assigned_to": self.other.pk, "status": "RESOLVED"})
+
+    def test_filter_by_date_range(self):
+        """
+        Test that the date range includes both end dates.
+        """
+
+        self.assertEqual(self.get_titles({"created_from": "2024-01-15", "created_to": "2024-01-15"}), ["Old drain"])
+        self.assertEqual(self.get_titles({"created_from": "2024-01-16"}), ["Graffiti", "Pothole"])
+
+    def test_invalid_filter_ignored(self):
+        """
+        Test that an invalid filter value is ignored rather than failing the page.
+        """
+
+        self.assertEqual(len(self.get_titles({"status": "NOT_A_STATUS"})), 3)
+
+    def test_next_link_keeps_filters(self):
+        """
+        Test that the link to the next page keeps the current filters.
+        """
+
+        with patch.object(IssuesView, "page_size", 1):
+            response = self.client.get(reverse('home'), {"status": "OPEN"})
+        self.assertContains(response, f"?status=OPEN&amp;before={self.old.pk}")
+
+
+class IssuesViewIndexTest(TestCase):
+    """
+    Tests that each filter combination on the issue list is answered from an index, not a full scan.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="staff", password="password")
+
+    def get_plan(self, params):
+        request = RequestFactory().get(reverse('home'), params)
+        request.user = self.user
+        view = IssuesView()
+        view.setup(request)
+        return view.get_queryset()[:IssuesView.page_size + 1].explain()
+
+    def test_filters_use_indexes(self):
+        """
+        Test that the query plan for every filter combination searches an index rather than
+        scanning the table.
+        """
+
+        filters = {
+            "status": "OPEN",
+            "category": "POTHOLE",
+            "assigned_to": self.user.pk,
+            "created_from": "2025-01-01",
+        }
+        combinations = [
+            dict(zip(keys, (filters[key] for key in keys)))
+            for size in range(1, len(filters) + 1)
+            for keys in itertools.combinations(filters, size)
+        ]
+        for params in combinations:
+            for cursor in [{}, {"before": 1000}]:
+                with self.subTest(**params, **cursor):
+                    plan = self.get_plan({**params, **cursor})
+                    self.assertIn("SEARCH council_issue USING", plan)
+                    self.assertNotIn("SCAN council_issue", plan)
+
+    def test_equality_filters_need_no_sort(self):
+        """
+        Test that single equality filters read the page in index order instead of sorting every match.
+        """
+
+        for params in [{"status": "OPEN"}, {"category": "POTHOLE"}, {"assigned_to": self.user.pk, "status": "OPEN"}]:
+            with self.subTest(**params):
+                self.assertNotIn("TEMP B-TREE", self.get_plan({**params, "before": 1000}))
+
+
+class IssueCSVExportTest(TestCase):
+    def setUp(self):
+        # Create a staff user, a non-staff user and some issues.
+
+        self.staff = User.objects.create_user(username="manager", password="password", is_staff=True)
+        self.user = User.objects.create_user(username="resident", password="password")
+        self.pothole = Issue.objects.create(
+            title="Pothole", description="Deep, near the school.", category="POTHOLE", status="OPEN",
+            email="a@example.com", assigned_to=self.staff,
+        )
+        self.graffiti = Issue.objects.create(
+            title="=HYPERLINK(\"http://example.com\")", description="Graffiti.", category="GRAFFITI",
+            status="RESOLVED", email="b@example.com",
+        )
+
+    def get_rows(self, params=None):
+        response = self.client.get(reverse('export-issues'), params or {})
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        return list(csv.reader(io.StringIO(content)))
+
+    def test_staff_only(self):
+        """
+        Test that anonymous users are sent to log in and non-staff users are refused.
+        """
+
+        response = self.client.get(reverse('export-issues'))
+        self.assertEqual(response.status_code, 302)
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('export-issues'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_rows(self):
+        """
+        Test that the export streams a header and one row per issue, oldest first.
+        """
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('export-issues'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+
+        rows = self.get_rows()
+        self.assertEqual(rows[0][:4], ["ID", "Title", "Category", "Status"])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][:6], [str(self.pothole.pk), "Pothole", "Pothole", "Open", "manager", "a@example.com"])
+        self.assertEqual(rows[1][8], "Deep, near the school.")
+
+    def test_formulas_are_escaped(self):
+        """
+        Test that text which a spreadsheet would run as a formula is prefixed with a quote.
+        """
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.get_rows()[2][1], "'=HYPERLINK(\"http://example.com\")")
+
+    def test_export_uses_list_filters(self):
+        """
+        Test that the export takes the same filters as the issue list.
+        """
+
+        self.client.force_login(self.staff)
+        rows = self.get_rows({"status": "RESOLVED"})
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.graffiti.pk)])
+
+    def test_invalid_filter_rejected(self):
+        """
+        Test that an invalid filter is rejected with its errors, as the JSON API does, rather than
+        exporting every issue.
+        """
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('export-issues'), {"status": "CLOSED"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.json()["errors"])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """
+        Test that the assigned user is joined in rather than fetched for each row.
+        """
+
+        for i in range(20):
+            Issue.objects.create(title=f"Issue {i}", description="Description.", email="c@example.com",
+                                 assigned_to=self.staff)
+        self.client.force_login(self.staff)
+
+        # The session, the user and the export itself.
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.get_rows()), 23)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import IssuesView, IssueDetailView, CreateIssueView, UpdateIssueView, DeleteIssueView
+from .views import IssuesView, IssueDetailView, CreateIssueView, UpdateIssueView, DeleteIssueView, SearchView, IssueCSVExportView, DashboardView, RequestProfilesView
 from django.contrib.auth import views as auth_views
+from .api import IssueListAPIView, IssueDetailAPIView, IssueExportView, AssigneeSearchView, IssueEventsView
 
 urlpatterns = [
     path("", IssuesView.as_view(), name="home"),
@@ -8,6 +9,15 @@ urlpatterns = [
     path("create_issue/", CreateIssueView.as_view(), name="create-issue"),
     path("issue/edit/<int:pk>", UpdateIssueView.as_view(), name="update-issue"),
     path("issue/delete/<int:pk>", DeleteIssueView.as_view(), name="delete-issue"),
+    path("export.csv", IssueCSVExportView.as_view(), name="export-issues"),
+    path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path("debug/requests/", RequestProfilesView.as_view(), name="request-profiles"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("api/v1/issues/", IssueListAPIView.as_view(), name="api-issue-list"),
+    path("api/v1/issues/<int:pk>", IssueDetailAPIView.as_view(), name="api-issue-detail"),
+    path("api/v1/issues/export.ndjson", IssueExportView.as_view(), name="api-issue-export"),
+    path("api/v1/issues/events", IssueEventsView.as_view(), name="api-issue-events"),
+    path("api/v1/assignees/", AssigneeSearchView.as_view(), name="api-assignee-search"),
     path("login/", auth_views.LoginView.as_view(), name="login"),
     path("logout/", auth_views.LogoutView.as_view(), name="logout"),
 ]
@@ -1,50 +1,421 @@
-from django.shortcuts import render
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from .models import Issue
-from .forms import IssueForm, EditForm
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.utils import timezone
+from django.views import View
+from django.views.generic import ListView, DetailView, UpdateView, DeleteView, TemplateView
+from .models import ArchivedIssue, Issue
+from .profiling import request_profiles
+from .routers import ReplicaReadMixin
+from .forms import IssueForm, EditForm, IssueFilterForm
 from django.urls import reverse_lazy
-from aisummary.utils import generate_ai_summary_async
+from aisummary.queue import enqueue_summary
+from aisummary.utils import agenerate_ai_summary_async, needs_summary
+from .duplicates import find_duplicates, loaded_duplicate_index
+from .events import publish_status
+from .exports import stream_csv
+from .search import search_issues
+from .stats import category_summary, count_from_stats, daily_summary
 
 
-class IssuesView(ListView):
+class ConditionalGetMixin:
     """
-    The view for the home page, which displays a list of all issues.
+    Answers GET requests with 304 Not Modified when the client's copy is still current.
+    Views provide get_validators(), which must be much cheaper than building the page. When the
+    request's If-None-Match or If-Modified-Since headers match, the view and template are skipped.
+    """
+
+    def get_validators(self):
+        """
+        Return the values that identify the current version of the page.
+        :return: A tuple of (etag parts, last modified datetime). Either may be None.
+        """
+
+        return None, None
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return 304 if the page has not changed, otherwise build it and add ETag and Last-Modified headers.
+        Logged-out visitors only see a static page, so their requests skip the validators.
+        """
+
+        if not request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        etag_parts, last_modified = self.get_validators()
+
+        # Pages differ between users (and logged-out visitors), so the user is part of every ETag.
+        # Every page embeds a CSRF token (the logout form), and logging in replaces the CSRF secret,
+        # so the secret is part of it too: a page cached before a new login holds a token that is
+        # no longer accepted.
+        etag = None
+        if etag_parts is not None:
+            get_token(request)
+            content = "|".join(str(part) for part in [request.user.pk, request.META["CSRF_COOKIE"], *etag_parts])
+            etag = quote_etag(hashlib.sha1(content.encode("utf-8")).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if etag:
+            response.headers["ETag"] = etag
+        if timestamp is not None:
+            response.headers["Last-Modified"] = http_date(timestamp)
+
+        # Browsers must revalidate every time, and must not share a copy between logins.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
+
+class IssuesView(ReplicaReadMixin, ConditionalGetMixin, ListView):
+    """
+    The view for the home page, which displays a list of all issues, newest first.
+    The list can be filtered by status, category, assignee and creation date (see IssueFilterForm).
+    Issues are paginated with a keyset cursor: the `before` query parameter holds the ID of the last
+    issue on the previous page, so every page is a single indexed range query however deep it is.
     """
 
     model = Issue
     template_name = "home.html"
     ordering = ["-id"]
+    page_size = 20
+
+    # The session, the user, the two validators and the page. Filtering by assignee adds the lookup of
+    # the assignee and, if the staff directory is out of date, reloading it to label the picker.
+    query_budget = 7
+
+    # The columns shown on each issue card.
+    card_fields = [
+        "id", "title", "ai_summary", "status", "created_at", "updated_at", "assigned_to__username",
+    ]
 
+    def get_cursor(self):
+        """
+        Return the keyset cursor from the query string.
+        :return: The ID to page before, or None for the first page.
+        """
+
+        cursor = self.request.GET.get("before")
+        if not cursor:
+            return None
+        try:
+            return int(cursor)
+        except ValueError:
+            raise Http404("Invalid page cursor.")
+
+    def get_filter_form(self):
+        """
+        Return the filter form bound to the query string.
+        :return: The IssueFilterForm.
+        """
+
+        if not hasattr(self, "filter_form"):
+            self.filter_form = IssueFilterForm(self.request.GET or None)
+        return self.filter_form
+
+    def get_queryset(self):
+        """
+        Return the filtered issues before the cursor, with the assigned user joined in.
+        :return: The queryset.
+        """
+
+        queryset = (
+            Issue.objects.select_related("assigned_to")
+            .only(*self.card_fields)
+            .order_by(*self.ordering)
+        )
+        queryset = self.get_filter_form().filter(queryset)
+        cursor = self.get_cursor()
+        if cursor is not None:
+            queryset = queryset.filter(id__lt=cursor)
+        return queryset
+
+    def get_validators(self):
+        """
+        Identify the current version of the list from the latest updated_at of any issue, read from
+        its index, and the number of issues, read from the rollups. Creating, editing and summarising
+        issues change the former, deleting and archiving them the latter. Neither depends on the
+        filters, so a change to any issue refreshes every list, but neither reads more than a few rows.
+        There is no Last-Modified, as the latest updated_at does not change when an issue is deleted.
+        :return: A tuple of (etag parts, None).
+        """
 
-class IssueDetailView(DetailView):
+        last_change = Issue.objects.order_by("-updated_at").values_list("updated_at", flat=True).first()
+        etag_parts = [self.request.get_full_path(), last_change, count_from_stats()]
+        return etag_parts, None
+
+    def get_context_data(self, **kwargs):
+        """
+        Fetch one page of issues and the cursor for the next page.
+        :return: The context.
+        """
+
+        # Fetch one extra issue to find out whether there is another page.
+        page = list(self.object_list[:self.page_size + 1])
+        has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+
+        context = super().get_context_data(object_list=page, **kwargs)
+        context["filter_form"] = self.get_filter_form()
+        context["card_cache_timeout"] = getattr(settings, "ISSUE_CARD_CACHE_TIMEOUT", 3600)
+        context["next_cursor"] = page[-1].pk if has_next else None
+        context["is_first_page"] = self.get_cursor() is None
+
+        # Keep the filters when moving between pages.
+        params = self.request.GET.copy()
+        params.pop("before", None)
+        context["filter_querystring"] = params.urlencode()
+
+        # The page follows the events of the issues it shows (see council.events).
+        context["issue_ids"] = ",".join(str(issue.pk) for issue in page)
+        return context
+
+
+class IssueCSVExportView(UserPassesTestMixin, View):
+    """
+    Streams the issues matching the issue list's filters to staff as a CSV file, oldest first.
+    Rows are read from a server-side cursor with the assigned user joined in, and written out as they
+    are read, so the export never holds the whole result in memory or runs a query per row.
+    """
+
+    chunk_size = 2000
+
+    def test_func(self):
+        """
+        Only staff may export issues.
+        """
+
+        return self.request.user.is_staff
+
+    def get(self, request):
+        """
+        Return a streaming CSV response, or the errors as JSON with status 400 if a filter is invalid.
+        """
+
+        form = IssueFilterForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+        queryset = form.filter(Issue.objects.select_related("assigned_to"))
+        rows = queryset.order_by("id").iterator(chunk_size=self.chunk_size)
+
+        filename = f"issues-{timezone.localdate().isoformat()}.csv"
+        response = StreamingHttpResponse(stream_csv(rows), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class IssueDetailView(ReplicaReadMixin, ConditionalGetMixin, DetailView):
     """
     The view for displaying the details of a single issue.
+    Issues that have been archived (see council.archive) are shown from the archive, read-only.
     """
 
     model = Issue
+    queryset = Issue.objects.select_related("assigned_to")
     template_name = "issue_details.html"
+    context_object_name = "issue"
+
+    # The session, the user, the two validators, the issue and its assignee, the duplicate index's
+    # check for new issues (see DuplicateIndex.catch_up) and the duplicate candidates. An archived
+    # issue takes one validator, the issue lookup and the archive lookup instead.
+    query_budget = 7
 
+    def get_validators(self):
+        """
+        Identify the current version of the page from the issue's updated_at.
+        The latest issue ID is included too, as a new issue can be listed as a possible duplicate,
+        and so is whether the duplicate index has loaded, as no duplicates are listed until it has.
+        :return: A tuple of (etag parts, last modified datetime), or (None, None) if there is no such issue.
+        """
+
+        updated_at = Issue.objects.filter(pk=self.kwargs["pk"]).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            return None, None
+        latest_id = Issue.objects.aggregate(latest_id=Max("id"))["latest_id"]
+        return [self.kwargs["pk"], updated_at, latest_id, loaded_duplicate_index() is not None], updated_at
+
+    def get_object(self, queryset=None):
+        """
+        Return the issue, looking in the archive if it is not in the issue table.
+        :return: The Issue or ArchivedIssue.
+        """
 
-class CreateIssueView(CreateView):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            archived = ArchivedIssue.objects.select_related("assigned_to").filter(pk=self.kwargs["pk"]).first()
+            if archived is None:
+                raise
+            return archived
+
+    def get_context_data(self, **kwargs):
+        """
+        Add the likely duplicates of the issue to the context. Archived issues are closed, so they
+        are not checked for duplicates. None are listed while the duplicate index is still loading.
+        :return: The context.
+        """
+
+        context = super().get_context_data(**kwargs)
+        context["archived"] = isinstance(self.object, ArchivedIssue)
+        context["duplicates"] = [] if context["archived"] else find_duplicates(self.object, wait=False)
+        return context
+
+
+class SearchView(TemplateView):
+    """
+    The view for searching issues by title, description and AI summary.
+    """
+
+    template_name = "search.html"
+    query_budget = 3
+
+    def get_context_data(self, **kwargs):
+        """
+        Add the search results for the `q` query parameter to the context.
+        :return: The context.
+        """
+
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get("q", "").strip()
+        context["query"] = query
+        context["results"] = search_issues(query) if query and self.request.user.is_authenticated else []
+        return context
+
+
+class DashboardView(UserPassesTestMixin, TemplateView):
+    """
+    The performance dashboard for staff: issues per category and status, daily counts and the
+    average time to resolve, over the last `days` days.
+    Everything is read from the IssueStat rollups, so the page costs the same however many issues there are.
+    """
+
+    template_name = "dashboard.html"
+    query_budget = 4
+    default_days = 30
+    max_days = 365
+
+    def test_func(self):
+        """
+        Only staff may see the dashboard.
+        """
+
+        return self.request.user.is_staff
+
+    def get_days(self):
+        """
+        Return the number of days to report on from the query string.
+        :return: A number of days between 1 and max_days.
+        """
+
+        try:
+            days = int(self.request.GET.get("days", self.default_days))
+        except ValueError:
+            return self.default_days
+        return min(max(days, 1), self.max_days)
+
+    def get_context_data(self, **kwargs):
+        """
+        Add the category and daily summaries to the context.
+        :return: The context.
+        """
+
+        context = super().get_context_data(**kwargs)
+        days = self.get_days()
+        start = timezone.localdate() - timedelta(days=days - 1)
+        context["days"] = days
+        context["statuses"] = [label for _, label in Issue.ISSUE_STATUS]
+        context["categories"] = category_summary(start)
+        context["daily"] = daily_summary(start)
+        return context
+
+
+class RequestProfilesView(UserPassesTestMixin, TemplateView):
+    """
+    Shows staff the profiles of the latest requests served by this process, recorded by ProfilingMiddleware.
+    """
+
+    template_name = "request_profiles.html"
+    query_budget = 2
+
+    def test_func(self):
+        """
+        Only staff may see request profiles, as they include SQL.
+        """
+
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        """
+        Add the request profiles, newest first, to the context.
+        :return: The context.
+        """
+
+        context = super().get_context_data(**kwargs)
+        context["profiles"] = request_profiles.snapshot()
+        return context
+
+
+class CreateIssueView(View):
     """
     The view for creating a new issue.
+    The view is async, so under ASGI it runs on the event loop, and the new issue's summary is
+    generated on the same loop with the async OpenAI client instead of waiting for a worker thread.
     """
 
-    model = Issue
-    form_class = IssueForm
     template_name = "create_issue.html"
 
-    def form_valid(self, form):
+    # Saving the issue, updating the statistics rollups and queueing its summary job.
+    query_budget = 7
+
+    async def render_form(self, request, form):
         """
-        If the form is valid, generate the AI summary asynchronously and return the response.
-        :param form: The form instance.
+        Render the form page.
+        The user is loaded with the async ORM first, as the template reads it and lazy loading from
+        a template would be a synchronous query.
+        :param request: The request.
+        :param form: The IssueForm to show.
         :return: The response.
         """
 
-        # Call the parent form_valid method to save the form data.
-        response = super().form_valid(form)
-        generate_ai_summary_async(self.object.id)
-        return response
+        request.user = await request.auser()
+        return render(request, self.template_name, {"form": form})
+
+    async def get(self, request):
+        """
+        Show an empty form.
+        """
+
+        return await self.render_form(request, IssueForm())
+
+    async def post(self, request):
+        """
+        If the form is valid, save the issue, queue its AI summary and redirect to the issue list.
+        Otherwise show the form again with its errors.
+        """
+
+        form = IssueForm(request.POST)
+        if not form.is_valid():
+            return await self.render_form(request, form)
+
+        issue = form.save(commit=False)
+        await issue.asave()
+
+        # An ASGI server keeps the loop running after the response is sent, so the summary can be
+        # generated on it. Under WSGI the loop ends with the request, so the workers do it instead.
+        await agenerate_ai_summary_async(issue.id, run_in_loop=isinstance(request, ASGIRequest))
+        return redirect(issue.get_absolute_url())
 
 
 class UpdateIssueView(UpdateView):
@@ -56,6 +427,24 @@ class UpdateIssueView(UpdateView):
     form_class = EditForm
     template_name = "update_issue.html"
 
+    # Saving checks the assignee, reads the issue's old values and updates the statistics rollups.
+    query_budget = 10
+
+    def form_valid(self, form):
+        """
+        Save the issue, and tell open pages if its status changed once the change is committed.
+        If the description of an issue still waiting for its summary changed, the issue is queued
+        again, as a summary of the old description is thrown away as stale (see aisummary.utils.store_summary).
+        """
+
+        response = super().form_valid(form)
+        issue = self.object
+        if "status" in form.changed_data:
+            transaction.on_commit(lambda: publish_status(issue.pk, issue.status))
+        if "description" in form.changed_data and needs_summary(issue):
+            enqueue_summary(issue.pk)
+        return response
+
 
 class DeleteIssueView(DeleteView):
     """
@@ -64,4 +453,5 @@ class DeleteIssueView(DeleteView):
 
     model = Issue
     template_name = "delete_issue.html"
+    query_budget = 4
     success_url = reverse_lazy("home")
\ No newline at end of file
@@ -0,0 +1,41 @@
+from django import forms
+from django.urls import reverse
+from .assignees import assignee_label, user_label
+
+
+class AssigneePicker(forms.Widget):
+    """
+    A type-ahead picker for choosing a user, in place of a select listing every user.
+    Only the selected user is rendered. The browser searches the assignee endpoint as the user types
+    and fills in the hidden ID field (see council/static/council/assignee_picker.js).
+    """
+
+    template_name = "widgets/assignee_picker.html"
+
+    # The selected user, if the form has already loaded them, so their label needs no query.
+    selected_user = None
+
+    class Media:
+        js = ["council/assignee_picker.js"]
+
+    def __init__(self, attrs=None, placeholder="Start typing a name"):
+        """
+        :param attrs: HTML attributes of the visible text input.
+        :param placeholder: The placeholder of the text input.
+        """
+
+        super().__init__({"placeholder": placeholder, "autocomplete": "off", **(attrs or {})})
+
+    def get_context(self, name, value, attrs):
+        """
+        Add the selected user's label and the search URL to the template context.
+        """
+
+        context = super().get_context(name, value, attrs)
+        user = self.selected_user
+        if user is not None and value is not None and str(user.pk) == str(value):
+            context["widget"]["label"] = user_label(user.username, user.first_name, user.last_name)
+        else:
+            context["widget"]["label"] = assignee_label(value) if value else ""
+        context["widget"]["search_url"] = reverse("api-assignee-search")
+        return context